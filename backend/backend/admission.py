@@ -0,0 +1,212 @@
+"""
+Admission control for API requests.
+Token buckets limit each client's request rate per endpoint class, and a priority gate caps
+how many requests run against storage at once, letting queued writes in before queued reads.
+Overload is answered at once with 429 or 503 and a Retry-After header instead of a timeout.
+"""
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Counter as CounterType, Dict, List, Optional, Tuple
+
+from flask import Flask, g, jsonify, request
+
+# Queues in the order they are admitted, and the queue of each endpoint class
+QUEUES = ('write', 'read')
+PRIORITIES = {'scores': 0, 'write': 0, 'read': 1}
+# Requests per second and burst size per client for each endpoint class
+DEFAULT_RATES = {'read': (20.0, 40), 'write': (5.0, 10), 'scores': (20.0, 60)}
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class TokenBucket:
+    """Allows rate requests per second on average and bursts of up to burst requests."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token; return 0 if one was available, else the seconds until there is one."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+
+class RateLimiter:
+    """Token buckets per (client, endpoint class), keeping only the most recent clients."""
+
+    def __init__(self, rates: Dict[str, Tuple[float, int]], max_clients: int = 10000):
+        self.rates = rates
+        self.max_clients = max_clients
+        self._buckets: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, client: str, endpoint_class: str) -> float:
+        """Take a token for the client; return 0 if allowed, else the seconds to wait."""
+        key = (client, endpoint_class)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(*self.rates[endpoint_class])
+                if len(self._buckets) > self.max_clients:
+                    # A forgotten client starts again with a full bucket
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket.take()
+
+
+class PriorityGate:
+    """
+    Caps concurrent requests; waiting requests are admitted by priority, then arrival.
+
+    Each priority has its own queue limit, so a flood of reads cannot take the queue places
+    of writes. A request that finds its queue full, or waits longer than queue_timeout
+    seconds, is refused.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._waiters: List[List[Any]] = []  # heap of [priority, sequence, event, state]
+        self._queued: CounterType[int] = Counter()
+        self._peak_queued: CounterType[int] = Counter()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def acquire(self, priority: int) -> Optional[str]:
+        """Wait for a slot; return None once admitted, or why the request was refused."""
+        with self._lock:
+            if self._active < self.max_concurrent and not self._waiters:
+                self._active += 1
+                return None
+            if self._queued[priority] >= self.max_queue:
+                return 'queue full'
+            waiter: List[Any] = [priority, next(self._sequence), threading.Event(), 'waiting']
+            heapq.heappush(self._waiters, waiter)
+            self._queued[priority] += 1
+            self._peak_queued[priority] = max(self._peak_queued[priority],
+                                              self._queued[priority])
+        waiter[2].wait(self.queue_timeout)
+        with self._lock:
+            if waiter[3] == 'admitted':
+                return None
+            # Timed out; release() skips cancelled waiters
+            waiter[3] = 'cancelled'
+            self._queued[priority] -= 1
+            return 'queue timeout'
+
+    def release(self):
+        """Free a slot, handing it straight to the first waiting request if there is one."""
+        with self._lock:
+            while self._waiters:
+                waiter = heapq.heappop(self._waiters)
+                if waiter[3] == 'waiting':
+                    waiter[3] = 'admitted'
+                    self._queued[waiter[0]] -= 1
+                    waiter[2].set()
+                    return
+            self._active -= 1
+
+    def metrics(self) -> Dict:
+        """Get the running and queued request counts and the deepest queues seen."""
+        with self._lock:
+            return {
+                'active': self._active,
+                'maxConcurrent': self.max_concurrent,
+                'queued': dict(self._queued),
+                'peakQueued': dict(self._peak_queued),
+            }
+
+
+def endpoint_class(method: str, endpoint: Optional[str]) -> str:
+    """Classify a request as a live score entry, another write, or a read."""
+    if method == 'PATCH' and (endpoint or '').endswith('update_hole_scores'):
+        return 'scores'
+    return 'write' if method in WRITE_METHODS else 'read'
+
+
+def parse_rate(value: str) -> Tuple[float, int]:
+    """Parse a "rate/burst" setting such as "20/40"."""
+    rate_text, _, burst = value.partition('/')
+    rate = float(rate_text)
+    return rate, int(burst) if burst else max(1, math.ceil(rate))
+
+
+def init_admission(app: Flask):
+    """
+    Limit API requests when ADMISSION_ENABLED=true.
+
+    Each client (remote address) gets RATE_LIMIT_READ, RATE_LIMIT_WRITE and RATE_LIMIT_SCORES
+    requests per second as "rate/burst" (defaults 20/40, 5/10 and 20/60); beyond that it gets
+    429. At most ADMISSION_MAX_CONCURRENT requests run at once (default 8); up to
+    ADMISSION_MAX_QUEUE more per priority wait (default 32) for up to ADMISSION_QUEUE_TIMEOUT
+    seconds (default 2), after which they get 503. Counters are served at
+    /api/admission/metrics.
+    """
+    if os.getenv('ADMISSION_ENABLED', 'false').lower() != 'true':
+        return
+    rates = {name: parse_rate(os.getenv(f'RATE_LIMIT_{name.upper()}', f'{rate:g}/{burst}'))
+             for name, (rate, burst) in DEFAULT_RATES.items()}
+    limiter = RateLimiter(rates, int(os.getenv('ADMISSION_MAX_CLIENTS', '10000')))
+    gate = PriorityGate(int(os.getenv('ADMISSION_MAX_CONCURRENT', '8')),
+                        int(os.getenv('ADMISSION_MAX_QUEUE', '32')),
+                        float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '2')))
+    counters: Dict[str, CounterType[str]] = {
+        name: Counter() for name in ('admitted', 'rateLimited', 'shed')}
+    counters_lock = threading.Lock()
+
+    def count(name: str, request_class: str):
+        with counters_lock:
+            counters[name][request_class] += 1
+
+    def refuse(status: int, message: str, retry_after: float):
+        response = jsonify({'error': message})
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response, status
+
+    @app.before_request
+    def admit():
+        if request.method == 'OPTIONS' or not request.path.startswith('/api/') or \
+                request.endpoint == 'admission_metrics':
+            return None
+        request_class = endpoint_class(request.method, request.endpoint)
+        wait = limiter.check(request.remote_addr or 'unknown', request_class)
+        if wait > 0:
+            count('rateLimited', request_class)
+            return refuse(429, 'Too many requests', wait)
+        reason = gate.acquire(PRIORITIES[request_class])
+        if reason is not None:
+            count('shed', request_class)
+            return refuse(503, f'Server busy ({reason})', gate.queue_timeout)
+        g.admitted = True
+        count('admitted', request_class)
+        return None
+
+    @app.teardown_request
+    def release_slot(exc):
+        if g.pop('admitted', False):
+            gate.release()
+
+    @app.route('/api/admission/metrics', endpoint='admission_metrics')
+    def admission_metrics():
+        metrics = gate.metrics()
+        for key in ('queued', 'peakQueued'):
+            metrics[key] = {name: metrics[key].get(priority, 0)
+                            for priority, name in enumerate(QUEUES)}
+        with counters_lock:
+            metrics.update({name: dict(counter) for name, counter in counters.items()})
+        return jsonify(metrics)
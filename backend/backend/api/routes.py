@@ -2,17 +2,199 @@
 REST API routes for the golf league application.
 Provides endpoints for CRUD operations on courses, teams, players, and matches.
 """
-from flask import Blueprint, jsonify, request
-from backend.storage.base import StorageInterface
+import re
+from datetime import date
+from typing import Optional, cast
+from flask import Blueprint, Response, g, jsonify, request, stream_with_context
+from werkzeug.local import LocalProxy
+from backend.services import archive, snapshot
+from backend.services.pairing import PairingService
+from backend.services.projection import ProjectionService
+from backend.services.scheduler import generate_schedule
+from backend.services.scoring import HOLES
+from backend.services.stats import LEADERBOARD_METRICS
+from backend.services.strokes import StrokeService
+from backend.storage import deadline, journal
+from backend.storage.base import (
+    IntegrityViolationError, StorageTimeoutError, VersionConflictError
+)
+from backend.storage.tenancy import Storage, TenantRegistry, validate_league
 
 api = Blueprint('api', __name__)
-storage = None  # Will be injected by app.py
+default_storage = None  # Will be injected by app.py
+tenants = None
+# The storage of the league addressed by the current request, or the default storage
+storage = cast(Storage, LocalProxy(lambda: g.get('storage') or default_storage))
+pairing_service = None
+stroke_service = None
+projection_service = None
+# Writes that can change a course's hole handicaps
+COURSE_WRITES = ('create_course', 'update_course', 'delete_course', 'initialize_data',
+                 'import_snapshot')
+# Seconds a request's storage calls may take in total (0 for no limit), and the longer limit
+# of the bulk endpoints
+storage_timeout = 0.0
+bulk_timeout = 0.0
+BULK_ENDPOINTS = ('initialize_data', 'export_snapshot', 'import_snapshot',
+                  'get_standings_projection')
+# Simulations of a projection by default and at most
+DEFAULT_SIMULATIONS = 5000
+MAX_SIMULATIONS = 100_000
+
+
+def init_routes(storage_instance: Storage, registry: Optional[TenantRegistry] = None,
+                timeout: float = 0.0, bulk: float = 0.0, workers: int = 1):
+    """
+    Initialize routes with the default storage instance and the per-league registry.
+
+    timeout and bulk are the storage deadlines of ordinary and bulk requests in seconds.
+    workers is the number of processes a standings projection may use.
+    """
+    global default_storage, tenants, pairing_service, stroke_service, projection_service
+    global storage_timeout, bulk_timeout
+    default_storage = storage_instance
+    tenants = registry
+    pairing_service = PairingService(storage)
+    stroke_service = StrokeService(storage)
+    projection_service = ProjectionService(storage, workers)
+    storage_timeout = timeout
+    bulk_timeout = bulk
+
+
+@api.url_value_preprocessor
+def select_league(endpoint, values):
+    """Route requests under /api/leagues/<league> to that league's storage."""
+    league = values.pop('league', None) if values else None
+    if league is None:
+        return
+    try:
+        validate_league(league)
+    except ValueError as e:
+        g.league_error = str(e)
+        return
+    g.league = league
+    if tenants is not None:
+        g.storage = tenants.acquire(league)
+
+
+@api.before_request
+def reject_invalid_league():
+    """Answer requests for unknown or malformed league identifiers."""
+    if 'league_error' in g:
+        return jsonify({'error': g.league_error}), 400
+    if 'league' in g and tenants is None:
+        return jsonify({'error': 'Leagues are not enabled'}), 404
+
+
+@api.before_request
+def start_deadline():
+    """Bound the storage calls of this request by its deadline."""
+    bulk = request.endpoint.rpartition('.')[2] in BULK_ENDPOINTS
+    g.deadline_token = deadline.set_deadline(bulk_timeout if bulk else storage_timeout)
+
+
+@api.teardown_request
+def clear_deadline(exc):
+    token = g.pop('deadline_token', None)
+    if token is not None:
+        deadline.reset_deadline(token)
+
+
+@api.before_request
+def start_journal_actor():
+    """Attribute this request's writes in the journal to its X-Actor header."""
+    g.actor_token = journal.set_actor(request.headers.get('X-Actor'))
+
+
+@api.teardown_request
+def clear_journal_actor(exc):
+    token = g.pop('actor_token', None)
+    if token is not None:
+        journal.reset_actor(token)
+
+
+@api.teardown_request
+def release_league(exc):
+    """Hand the league's storage back to the registry once the request is done."""
+    league_storage = g.pop('storage', None)
+    if league_storage is not None:
+        tenants.release(g.league, league_storage)
+
+
+# Registered after release_league so it runs first, while the league is still held
+@api.teardown_request
+def release_connection(exc):
+    """Hand this request's database connection to the next request's thread."""
+    storage.release_connection()
+
+
+@api.after_request
+def invalidate_derived_caches(response):
+    """Drop cached results derived from stored data after any successful write."""
+    if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and response.status_code < 400:
+        endpoint = request.endpoint.rpartition('.')[2]
+        # Hole scores do not feed any cached result
+        if endpoint != 'update_hole_scores':
+            pairing_service.invalidate(g.get('league'))
+            projection_service.invalidate(g.get('league'))
+        if endpoint in COURSE_WRITES:
+            stroke_service.invalidate(g.get('league'))
+    return response
+
+
+@api.errorhandler(VersionConflictError)
+def version_conflict(e):
+    """Answer a failed If-Match precondition with the version the record has now."""
+    response = jsonify({'error': 'Changed by another request; reload and retry',
+                        'version': e.current})
+    if e.current is not None:
+        response.set_etag(str(e.current))
+    return response, 412
+
+
+@api.errorhandler(StorageTimeoutError)
+def storage_timed_out(e):
+    """Answer a request whose storage calls ran past its deadline or waited on a lock."""
+    response = jsonify({'error': 'Storage did not respond in time; try again'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
+@api.errorhandler(IntegrityViolationError)
+def integrity_violation(e):
+    """Answer a write that would break a reference between records."""
+    return jsonify({'error': str(e), 'references': e.references}), 409
+
+
+def _if_match_version() -> Optional[int]:
+    """Get the version required by the If-Match header, or None without one (or for *)."""
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return None
+    tags = if_match.as_set()
+    if len(tags) != 1 or not next(iter(tags)).isdigit():
+        raise ValueError('If-Match must name a single version, e.g. If-Match: "3"')
+    return int(next(iter(tags)))
 
-
-def init_routes(storage_instance: StorageInterface):
-    """Initialize routes with storage instance."""
-    global storage
-    storage = storage_instance
+
+def _as_of(table: str, record_id: str, label: str):
+    """Respond with a record as of the time in the asOf query parameter."""
+    try:
+        at = journal.parse_time(request.args['asOf'])
+    except ValueError:
+        return jsonify({'error': 'asOf must be an ISO 8601 time or seconds since the epoch'}), 400
+    record = storage.get_as_of(table, record_id, at)
+    if record is None:
+        return jsonify({'error': f'{label} not found at that time'}), 404
+    return jsonify(record)
+
+
+def _versioned(record):
+    """Respond with a versioned record and its version as the ETag."""
+    response = jsonify(record)
+    if record.get('version') is not None:
+        response.set_etag(str(record['version']))
+    return response
 
 
 # Course endpoints
@@ -32,6 +214,19 @@ def get_course(course_id):
     return jsonify({'error': 'Course not found'}), 404
 
 
+@api.route('/courses/<course_id>/strokes', methods=['GET'])
+def get_course_strokes(course_id):
+    """
+    Get the course's stroke table: strokes received per hole for each handicap differential.
+
+    strokes[differential][hole - 1] for differentials 0 to maxDifferential.
+    """
+    table = stroke_service.table(course_id, g.get('league'))
+    if table is None:
+        return jsonify({'error': 'Course not found'}), 404
+    return jsonify(table.to_dict())
+
+
 @api.route('/courses', methods=['POST'])
 def create_course():
     """Create a new course."""
@@ -99,6 +294,22 @@ def delete_team(team_id):
     return jsonify({'error': 'Team not found'}), 404
 
 
+@api.route('/teams/<team_id>/h2h', methods=['GET'])
+def get_team_head_to_head(team_id):
+    """Get a team's record against each opponent, or one with ?opponent=t2."""
+    if not storage.get_team(team_id):
+        return jsonify({'error': 'Team not found'}), 404
+    return jsonify(storage.get_team_h2h(team_id, request.args.get('opponent')))
+
+
+@api.route('/teams/<team_id>/seasons', methods=['GET'])
+def get_team_seasons(team_id):
+    """Get a team's record and match points for each season and day."""
+    if not storage.get_team(team_id):
+        return jsonify({'error': 'Team not found'}), 404
+    return jsonify(storage.get_team_seasons(team_id))
+
+
 # Player endpoints
 @api.route('/players', methods=['GET'])
 def get_players():
@@ -109,10 +320,21 @@ def get_players():
 
 @api.route('/players/<player_id>', methods=['GET'])
 def get_player(player_id):
-    """Get a specific player."""
+    """Get a specific player, or as it was at a time with ?asOf=2024-06-01T18:00:00Z."""
+    if 'asOf' in request.args:
+        return _as_of('players', player_id, 'Player')
     player = storage.get_player(player_id)
     if player:
-        return jsonify(player)
+        return _versioned(player)
+    return jsonify({'error': 'Player not found'}), 404
+
+
+@api.route('/players/<player_id>/stats', methods=['GET'])
+def get_player_stats(player_id):
+    """Get the precomputed statistics for a player."""
+    stats = storage.get_player_stats(player_id)
+    if stats:
+        return jsonify(stats)
     return jsonify({'error': 'Player not found'}), 404
 
 
@@ -121,15 +343,19 @@ def create_player():
     """Create a new player."""
     player_data = request.json
     player = storage.create_player(player_data)
-    return jsonify(player), 201
+    return _versioned(player), 201
 
 
 @api.route('/players/<player_id>', methods=['PUT'])
 def update_player(player_id):
-    """Update a player."""
+    """Update a player; with If-Match only if it is still at that version."""
+    try:
+        expected_version = _if_match_version()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     player_data = request.json
-    player = storage.update_player(player_id, player_data)
-    return jsonify(player)
+    player = storage.update_player(player_id, player_data, expected_version)
+    return _versioned(player)
 
 
 @api.route('/players/<player_id>', methods=['DELETE'])
@@ -149,12 +375,31 @@ def get_matches():
     return jsonify(matches)
 
 
+@api.route('/matches/pairings', methods=['GET'])
+def get_match_pairings():
+    """Get handicap pairings for every match on a night, e.g. /matches/pairings?date=2024-05-14."""
+    night = request.args.get('date')
+    if not night:
+        return jsonify({'error': 'date is required'}), 400
+    try:
+        night = date.fromisoformat(night).isoformat()
+    except ValueError:
+        return jsonify({'error': 'date must be an ISO date, e.g. 2024-05-14'}), 400
+    return jsonify(pairing_service.pairings_for_date(night, g.get('league')))
+
+
 @api.route('/matches/<match_id>', methods=['GET'])
 def get_match(match_id):
-    """Get a specific match."""
+    """Get a specific match, or as it was at a time with ?asOf=2024-06-01T18:00:00Z."""
+    if 'asOf' in request.args:
+        return _as_of('matches', match_id, 'Match')
+    if hasattr(storage, 'flush_scores'):
+        # The ETag must name the version holding buffered scores, or an If-Match write based
+        # on this read would be refused once they are flushed
+        storage.flush_scores(match_id)
     match = storage.get_match(match_id)
     if match:
-        return jsonify(match)
+        return _versioned(match)
     return jsonify({'error': 'Match not found'}), 404
 
 
@@ -163,15 +408,66 @@ def create_match():
     """Create a new match."""
     match_data = request.json
     match = storage.create_match(match_data)
-    return jsonify(match), 201
+    return _versioned(match), 201
 
 
 @api.route('/matches/<match_id>', methods=['PUT'])
 def update_match(match_id):
-    """Update a match."""
+    """Update a match; with If-Match only if it is still at that version."""
+    try:
+        expected_version = _if_match_version()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     match_data = request.json
-    match = storage.update_match(match_id, match_data)
-    return jsonify(match)
+    match = storage.update_match(match_id, match_data, expected_version)
+    return _versioned(match)
+
+
+def _hole_scores(match_id, data):
+    """Read [(match id, player id, hole, score)] from a hole score request body."""
+    entries = data.get('scores') if isinstance(data, dict) and 'scores' in data else [data]
+    if not isinstance(entries, list) or not entries:
+        raise ValueError('Expected {playerId, hole, score} or {scores: [...]}')
+    result = []
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get('playerId'):
+            raise ValueError('Each score needs a playerId')
+        hole, score = entry.get('hole'), entry.get('score')
+        if not isinstance(hole, int) or not 1 <= hole <= HOLES:
+            raise ValueError(f'hole must be a number from 1 to {HOLES}')
+        if score is not None and (not isinstance(score, int) or score < 1):
+            raise ValueError('score must be a positive whole number, or null to clear the hole')
+        result.append((match_id, entry['playerId'], hole, score))
+    return result
+
+
+@api.route('/matches/<match_id>/scores', methods=['PATCH'])
+def update_hole_scores(match_id):
+    """
+    Record hole scores for a match, e.g. {"playerId": "p1", "hole": 3, "score": 5}.
+
+    Scores are acknowledged once logged and written to the match in the background; the
+    returned match already includes them. With If-Match the scores are written at once, and
+    only if the match is still at that version.
+    """
+    try:
+        scores = _hole_scores(match_id, request.json)
+        expected_version = _if_match_version()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if storage.get_match(match_id) is None:
+        return jsonify({'error': 'Match not found'}), 404
+    if expected_version is None and hasattr(storage, 'record_hole_scores'):
+        storage.record_hole_scores(scores)
+        return jsonify(storage.get_match(match_id)), 202
+    updates = {}
+    for _, player_id, hole, score in scores:
+        updates.setdefault(player_id, {})[str(hole)] = score
+    if expected_version is None:
+        storage.apply_hole_scores({match_id: updates})
+        return jsonify(storage.get_match(match_id)), 202
+    storage.apply_hole_scores({match_id: updates}, {match_id: expected_version})
+    return _versioned(storage.get_match(match_id))
 
 
 @api.route('/matches/<match_id>', methods=['DELETE'])
@@ -183,6 +479,118 @@ def delete_match(match_id):
     return jsonify({'error': 'Match not found'}), 404
 
 
+# Schedule endpoints
+@api.route('/schedule/generate', methods=['POST'])
+def generate_season_schedule():
+    """Generate and store a round-robin season for each day group."""
+    options = request.json or {}
+    if 'startDate' not in options:
+        return jsonify({'error': 'startDate is required'}), 400
+    try:
+        schedule = generate_schedule(
+            storage.get_teams(),
+            start_date=options['startDate'],
+            days=options.get('days'),
+            cycles=int(options.get('cycles', 1)),
+            interval_weeks=int(options.get('intervalWeeks', 1)),
+            skip_dates=options.get('skipDates')
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    if not options.get('dryRun'):
+        storage.create_matches(schedule['matches'])
+    return jsonify(schedule), 200 if options.get('dryRun') else 201
+
+
+# Statistics endpoints
+@api.route('/leaderboard', methods=['GET'])
+def get_leaderboard():
+    """Get the top players for a metric, e.g. /leaderboard?metric=avg&limit=20."""
+    metric = request.args.get('metric', 'avg')
+    if metric not in LEADERBOARD_METRICS:
+        expected = ', '.join(LEADERBOARD_METRICS)
+        return jsonify({'error': f'Unknown metric, expected one of: {expected}'}), 400
+    limit = request.args.get('limit', 20, type=int)
+    if limit is None or limit < 1:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    leaderboard = storage.get_leaderboard(metric, min(limit, 500))
+    return jsonify(leaderboard)
+
+
+@api.route('/standings', methods=['GET'])
+def get_standings():
+    """Get the standings of a season, e.g. /standings?season=2024&day=Monday."""
+    season = request.args.get('season', str(date.today().year))
+    if not re.fullmatch(r'\d{4}', season):
+        return jsonify({'error': 'season must be a four digit year'}), 400
+    return jsonify(storage.get_standings(season, request.args.get('day')))
+
+
+@api.route('/standings/projection', methods=['GET'])
+def get_standings_projection():
+    """
+    Simulate the rest of a season and get each team's chance of every finishing position,
+    e.g. /standings/projection?season=2024&day=Monday&simulations=5000&playoffs=4.
+    """
+    season = request.args.get('season', str(date.today().year))
+    if not re.fullmatch(r'\d{4}', season):
+        return jsonify({'error': 'season must be a four digit year'}), 400
+    simulations = request.args.get('simulations', DEFAULT_SIMULATIONS, type=int)
+    if simulations is None or simulations < 1:
+        return jsonify({'error': 'simulations must be a positive integer'}), 400
+    playoffs = request.args.get('playoffs', 4, type=int)
+    if playoffs is None or playoffs < 1:
+        return jsonify({'error': 'playoffs must be a positive integer'}), 400
+    return jsonify(projection_service.projection(season, request.args.get('day'),
+                                                 min(simulations, MAX_SIMULATIONS), playoffs,
+                                                 g.get('league')))
+
+
+# Journal endpoints
+@api.route('/<any(courses, teams, players, matches):table>/<record_id>/history',
+           methods=['GET'])
+def get_history(table, record_id):
+    """Get every journalled change of a record, oldest first, with who made it."""
+    return jsonify(storage.get_history(table, record_id))
+
+
+# Search endpoints
+@api.route('/search', methods=['GET'])
+def search():
+    """Search player, team and course names by word prefix, e.g. /search?q=smi&limit=10."""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+    limit = request.args.get('limit', 10, type=int)
+    if limit is None or limit < 1:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    return jsonify(storage.search(query[:200], min(limit, 100)))
+
+
+# Archive endpoints
+@api.route('/archive/seasons', methods=['GET'])
+def get_archived_seasons():
+    """List the seasons moved into columnar archives."""
+    return jsonify(archive.list_archives(archive.get_archive_dir(g.get('league'))))
+
+
+@api.route('/archive/hole-averages', methods=['GET'])
+def get_archived_hole_averages():
+    """Average score per hole per course across archived seasons."""
+    course_id = request.args.get('courseId')
+    return jsonify(archive.hole_averages(archive.get_archive_dir(g.get('league')), course_id))
+
+
+@api.route('/archive/h2h', methods=['GET'])
+def get_archived_head_to_head():
+    """Head-to-head record of two teams across archived seasons."""
+    team1_id, team2_id = request.args.get('team1'), request.args.get('team2')
+    if not team1_id or not team2_id:
+        return jsonify({'error': 'team1 and team2 are required'}), 400
+    archive_dir = archive.get_archive_dir(g.get('league'))
+    return jsonify(archive.head_to_head(archive_dir, team1_id, team2_id))
+
+
 # Initialization endpoints
 @api.route('/initialize', methods=['POST'])
 def initialize_data():
@@ -194,6 +602,27 @@ def initialize_data():
     return jsonify({'error': 'Failed to initialize database'}), 500
 
 
+@api.route('/export', methods=['GET'])
+def export_snapshot():
+    """Stream the whole league as a binary snapshot."""
+    league_storage = storage._get_current_object()
+    return Response(stream_with_context(snapshot.write_snapshot(league_storage)),
+                    mimetype='application/octet-stream',
+                    headers={'Content-Disposition': 'attachment; filename=league.glcs'})
+
+
+@api.route('/import', methods=['POST'])
+def import_snapshot():
+    """Load a binary snapshot from the request body; ?merge=true writes over existing data."""
+    if storage.is_initialized() and request.args.get('merge') != 'true':
+        return jsonify({'error': 'League already has data; use ?merge=true to write over it'}), 409
+    try:
+        counts = snapshot.import_snapshot(storage, request.stream)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(counts), 200
+
+
 @api.route('/status', methods=['GET'])
 def get_status():
     """Check if database is initialized."""
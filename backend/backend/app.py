@@ -1,35 +1,57 @@
 """
 Flask application entry point for the golf league REST API.
 """
+import os
 
 from dotenv import load_dotenv
 from flask import Flask
 from flask_cors import CORS
 
+from backend.admission import init_admission
 from backend.api.routes import api, init_routes
-from backend.storage import get_storage
+from backend.profiling import init_profiling
+from backend.storage import get_buffered_storage, get_storage, get_tenant_registry
 
 
-def create_app():
-    """Create and configure the Flask application."""
+def create_app(buffer_scores: bool = True):
+    """
+    Create and configure the Flask application.
+
+    buffer_scores=False writes hole scores directly instead of opening the score log, for a
+    process that never serves requests.
+    """
     app = Flask(__name__)
 
     # Enable CORS for frontend communication
     CORS(app, resources={r"/api/*": {"origins": "*"}})
 
-    # Initialize storage
-    storage = get_storage()
-    init_routes(storage)
+    # Initialize storage; requests get STORAGE_TIMEOUT seconds of storage calls, and bulk
+    # loads, exports and projections STORAGE_BULK_TIMEOUT (0 for no limit). Projections use
+    # PROJECTION_WORKERS processes, by default one per core
+    storage = get_buffered_storage() if buffer_scores else get_storage()
+    init_routes(storage, get_tenant_registry(),
+                timeout=float(os.getenv('STORAGE_TIMEOUT', '10')),
+                bulk=float(os.getenv('STORAGE_BULK_TIMEOUT', '300')),
+                workers=int(os.getenv('PROJECTION_WORKERS', '0')) or os.cpu_count() or 1)
 
-    # Register blueprints
+    # Register blueprints; the same API is served per league under /api/leagues/<league>
     app.register_blueprint(api, url_prefix="/api")
+    app.register_blueprint(api, url_prefix="/api/leagues/<league>", name="league_api")
+
+    # Opt-in rate limiting and load shedding (ADMISSION_ENABLED)
+    init_admission(app)
+
+    # Opt-in request profiling (PROFILE_ENABLED)
+    init_profiling(app)
 
     return app
 
 
 def main():
     load_dotenv()
-    app = create_app()
+    # The reloader serves from a child process (WERKZEUG_RUN_MAIN=true); the parent only
+    # watches files, so it leaves the score log, which one process may hold, to the child
+    app = create_app(buffer_scores=os.getenv('WERKZEUG_RUN_MAIN') == 'true')
     print("Starting Golf League API server on http://localhost:5000")
     print("API endpoints available at http://localhost:5000/api/")
     app.run(debug=True, host="0.0.0.0", port=5000)
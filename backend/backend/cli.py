@@ -0,0 +1,179 @@
+"""
+Command line maintenance tools for the golf league backend.
+Uses the same environment configuration as the API server.
+"""
+import argparse
+import json
+import sys
+import time
+from contextlib import nullcontext
+
+from dotenv import load_dotenv
+
+from backend.services import archive, snapshot
+from backend.storage import get_storage, journal
+
+
+def rebuild_stats(storage, args):
+    """Recompute every player's statistics from their history."""
+    count = storage.rebuild_player_stats()
+    print(f"Rebuilt statistics for {count} players")
+
+
+def rebuild_search(storage, args):
+    """Rebuild the name search index from the courses, teams and players."""
+    count = storage.rebuild_search_index()
+    print(f"Indexed {count} names")
+
+
+def rebuild_team_records(storage, args):
+    """Rebuild the head-to-head and season records of every team from the matches."""
+    count = storage.rebuild_team_records()
+    print(f"Rebuilt team records from {count} completed matches")
+
+
+def compact(storage, args):
+    """
+    Purge records orphaned by deleted teams and courses and compact the journal in batches,
+    then reclaim space.
+    """
+    totals = {}
+    while True:
+        counts = storage.purge_orphans(args.batch_size)
+        for kind, count in counts.items():
+            totals[kind] = totals.get(kind, 0) + count
+        if not any(counts.values()):
+            break
+        # Let the API's writes in between batches
+        time.sleep(args.pause)
+    print(f"Purged {totals['players']} players and {totals['matches']} matches, cleared "
+          f"{totals['winners']} winners and {totals['courses']} courses")
+    if args.journal_days > 0:
+        before = journal.now() - args.journal_days * 86400
+        dropped = 0
+        while True:
+            count = storage.compact_journal(before, args.batch_size)
+            dropped += count
+            if not count:
+                break
+            time.sleep(args.pause)
+        print(f"Dropped {dropped} journal entries from before {journal.format_time(before)}")
+    if not args.skip_optimize:
+        print(f"Optimized: {json.dumps(storage.optimize(args.force))}")
+
+
+def export_snapshot(storage, args):
+    """Write the whole league to a binary snapshot file ('-' for stdout)."""
+    with nullcontext(sys.stdout.buffer) if args.file == '-' else open(args.file, 'wb') as out:
+        for chunk in snapshot.write_snapshot(storage):
+            out.write(chunk)
+    if args.file != '-':
+        print(f"Exported to {args.file}")
+
+
+def import_snapshot(storage, args):
+    """Load a binary snapshot file ('-' for stdin) into the configured storage."""
+    if storage.is_initialized() and not args.merge:
+        sys.exit("Error: the league already has data; pass --merge to write over it")
+    with nullcontext(sys.stdin.buffer) if args.file == '-' else open(args.file, 'rb') as source:
+        try:
+            counts = snapshot.import_snapshot(storage, source)
+        except ValueError as e:
+            sys.exit(f"Error: {e}")
+    print("Imported " + ", ".join(f"{count} {table}" for table, count in counts.items()))
+
+
+def archive_season(storage, args):
+    """Move a completed season out of the live tables into a columnar archive."""
+    try:
+        summary = archive.archive_season(storage, args.season, args.dir, force=args.force)
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+    print(f"Archived {summary['matches']} matches, {summary['scores']} scorecards and "
+          f"{summary['history']} history entries to {summary['path']} ({summary['bytes']} bytes)")
+
+
+def hole_averages(storage, args):
+    """Print the average score per hole per course across archived seasons."""
+    print(json.dumps(archive.hole_averages(args.dir, args.course), indent=2))
+
+
+def head_to_head(storage, args):
+    """Print two teams' head-to-head record across archived seasons."""
+    print(json.dumps(archive.head_to_head(args.dir, args.team1, args.team2), indent=2))
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(prog='league', description='Golf league maintenance tools')
+    parser.add_argument('--league', help='league id, as in /api/leagues/<league> '
+                                         '(default: the default league)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    rebuild = commands.add_parser('rebuild-stats', help=rebuild_stats.__doc__)
+    rebuild.set_defaults(handler=rebuild_stats)
+
+    reindex = commands.add_parser('rebuild-search', help=rebuild_search.__doc__)
+    reindex.set_defaults(handler=rebuild_search)
+
+    records = commands.add_parser('rebuild-team-records', help=rebuild_team_records.__doc__)
+    records.set_defaults(handler=rebuild_team_records)
+
+    compaction = commands.add_parser('compact', help=compact.__doc__)
+    compaction.add_argument('--batch-size', type=int, default=500,
+                            help='records repaired per transaction (default: 500)')
+    compaction.add_argument('--pause', type=float, default=0.05,
+                            help='seconds to wait between batches (default: 0.05)')
+    compaction.add_argument('--journal-days', type=int, default=365,
+                            help='keep every journal entry of the last this many days, only '
+                                 'the state before them (default: 365, 0 keeps all)')
+    compaction.add_argument('--skip-optimize', action='store_true',
+                            help='only purge orphans, do not VACUUM or OPTIMIZE')
+    compaction.add_argument('--force', action='store_true',
+                            help='VACUUM or OPTIMIZE even below the free space threshold')
+    compaction.set_defaults(handler=compact)
+
+    export = commands.add_parser('export', help=export_snapshot.__doc__)
+    export.add_argument('file')
+    export.set_defaults(handler=export_snapshot)
+
+    load = commands.add_parser('import', help=import_snapshot.__doc__)
+    load.add_argument('file')
+    load.add_argument('--merge', action='store_true',
+                      help='import into a league that already has data, replacing same ids')
+    load.set_defaults(handler=import_snapshot)
+
+    season = commands.add_parser('archive', help=archive_season.__doc__)
+    season.add_argument('season', help='four digit season year')
+    season.add_argument('--force', action='store_true',
+                        help='archive even if the season is current or has uncompleted matches')
+    season.set_defaults(handler=archive_season)
+
+    averages = commands.add_parser('hole-averages', help=hole_averages.__doc__)
+    averages.add_argument('--course', help='only this course id')
+    averages.set_defaults(handler=hole_averages)
+
+    h2h = commands.add_parser('h2h', help=head_to_head.__doc__)
+    h2h.add_argument('team1')
+    h2h.add_argument('team2')
+    h2h.set_defaults(handler=head_to_head)
+
+    for command in (season, averages, h2h):
+        command.add_argument('--dir', help="archive directory (default: ARCHIVE_PATH, or the "
+                                           "league's directory below it)")
+
+    args = parser.parse_args()
+    if 'dir' in args and args.dir is None:
+        args.dir = archive.get_archive_dir(args.league)
+    try:
+        storage = get_storage(args.league)
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+    try:
+        args.handler(storage, args)
+    finally:
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
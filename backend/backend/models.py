@@ -0,0 +1,113 @@
+"""
+Compact typed models for courses and match scorecards.
+The API and the storage backends keep the JSON shapes; computations convert once to these
+models and then work on flat byte arrays instead of walking nested dictionaries.
+"""
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from backend.services.scoring import HOLES, iter_player_cards
+
+
+def _byte(value) -> int:
+    """Convert a JSON number to 0-255, clamping out-of-range values; non-numbers become 0."""
+    try:
+        return min(max(int(value), 0), 255)
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+class CourseLayout:
+    """
+    The 18 pars and hole handicaps of a course as byte arrays indexed by hole - 1.
+
+    A hole missing from the course data has par 0 and handicap 0. Values are whole numbers
+    clamped to 0-255.
+    """
+
+    __slots__ = ('id', 'name', 'pars', 'handicaps')
+
+    def __init__(self, course_id: str, name: str, pars: array, handicaps: array):
+        self.id = course_id
+        self.name = name
+        self.pars = pars
+        self.handicaps = handicaps
+
+    @classmethod
+    def from_dict(cls, course: Dict) -> 'CourseLayout':
+        """Build a layout from an API course with holes as {number, par, handicap}."""
+        pars = array('B', bytes(HOLES))
+        handicaps = array('B', bytes(HOLES))
+        for hole in course.get('holes') or []:
+            number = hole.get('number')
+            if isinstance(number, int) and 1 <= number <= HOLES:
+                pars[number - 1] = _byte(hole.get('par'))
+                handicaps[number - 1] = _byte(hole.get('handicap'))
+        return cls(course['id'], course.get('name', ''), pars, handicaps)
+
+    def to_dict(self) -> Dict:
+        """Convert back to the API course shape."""
+        return {'id': self.id, 'name': self.name,
+                'holes': [{'number': hole + 1, 'par': self.pars[hole],
+                           'handicap': self.handicaps[hole]} for hole in range(HOLES)]}
+
+    @property
+    def par(self) -> int:
+        """Total par."""
+        return sum(self.pars)
+
+
+class MatchCard:
+    """
+    Hole-by-hole gross scores of every player in a match.
+
+    gross holds 18 bytes per player in the order of players; 0 means no score. Scores are
+    clamped to 0-255.
+    """
+
+    __slots__ = ('match_id', 'course_id', 'players', 'gross')
+
+    def __init__(self, match_id: str, course_id: Optional[str], players: List[str],
+                 gross: array):
+        self.match_id = match_id
+        self.course_id = course_id
+        self.players = players
+        self.gross = gross
+
+    @classmethod
+    def from_match(cls, match: Dict) -> 'MatchCard':
+        """Build a card from an API match; malformed entries are skipped as in scoring."""
+        players = []
+        gross = array('B')
+        for player_id, holes in iter_player_cards(match):
+            players.append(player_id)
+            gross.extend(_byte(holes.get(hole, 0)) for hole in range(1, HOLES + 1))
+        return cls(match['id'], match.get('courseId'), players, gross)
+
+    def to_scores(self) -> List[Dict]:
+        """Convert to the API match 'scores' list of {playerId, scores: {hole: gross}}."""
+        return [{'playerId': player_id,
+                 'scores': {str(hole + 1): gross for hole, gross in enumerate(self.card(index))
+                            if gross}}
+                for index, player_id in enumerate(self.players)]
+
+    def card(self, index: int) -> array:
+        """Get the 18 gross scores of the player at index."""
+        return self.gross[index * HOLES:(index + 1) * HOLES]
+
+    def cards(self) -> Iterator[Tuple[str, array]]:
+        """Yield (player id, 18 gross scores) for every player."""
+        for index, player_id in enumerate(self.players):
+            yield player_id, self.card(index)
+
+    def hole(self, number: int) -> array:
+        """Get every player's gross score on a hole (1-18), in player order."""
+        return self.gross[number - 1::HOLES]
+
+    def total(self, index: int) -> int:
+        """Sum of the entered gross scores of the player at index."""
+        return sum(self.card(index))
+
+    def holes_played(self, index: int) -> int:
+        """Number of holes the player at index has a score for."""
+        return HOLES - self.card(index).count(0)
@@ -0,0 +1,168 @@
+"""
+Opt-in sampling profiler for API requests.
+A background thread samples the stacks of profiled request threads at a fixed interval and
+writes them as collapsed stacks ("frame;frame;frame count" lines), the input format of
+flamegraph.pl, speedscope and similar tools.
+"""
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+from flask import Flask, g, request
+
+# Innermost matching frame decides where a sample's time is attributed
+CATEGORIES = (
+    ('decoding', lambda module, name: name.startswith('row_to_')),
+    ('storage', lambda module, name: module.startswith('backend.storage')),
+    ('handler', lambda module, name: module == 'backend.api.routes'),
+)
+
+
+def frame_label(frame) -> str:
+    """Label a frame as module:qualified function name."""
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def attribute(stacks: Counter) -> Dict[str, int]:
+    """Count samples per category (decoding, storage, handler, other) from collapsed stacks."""
+    totals = {name: 0 for name, _ in CATEGORIES}
+    totals['other'] = 0
+    for stack, count in stacks.items():
+        category = 'other'
+        for frame in reversed(stack.split(';')):
+            module, _, name = frame.partition(':')
+            name = name.rpartition('.')[2]
+            matched = next((label for label, test in CATEGORIES if test(module, name)), None)
+            if matched:
+                category = matched
+                break
+        totals[category] += count
+    return totals
+
+
+class SamplingProfiler:
+    """Samples the stacks of registered threads from a single background thread."""
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 128):
+        """
+        Initialize the profiler.
+
+        interval is the time between samples in seconds. The sampler only runs while at least
+        one thread is registered, and stacks deeper than max_depth keep their innermost frames.
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self._targets: Dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, thread_id: Optional[int] = None):
+        """Start sampling a thread, by default the calling one."""
+        thread_id = thread_id or threading.get_ident()
+        with self._lock:
+            self._targets[thread_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='sampling-profiler',
+                                                daemon=True)
+                self._thread.start()
+
+    def stop(self, thread_id: Optional[int] = None) -> Counter:
+        """Stop sampling a thread and return its collapsed stacks with sample counts."""
+        with self._lock:
+            return self._targets.pop(thread_id or threading.get_ident(), Counter())
+
+    def active(self) -> int:
+        """Get the number of threads being sampled."""
+        with self._lock:
+            return len(self._targets)
+
+    def _collapse(self, frame) -> str:
+        """Build the collapsed stack, outermost frame first."""
+        labels: List[str] = []
+        while frame is not None and len(labels) < self.max_depth:
+            labels.append(frame_label(frame))
+            frame = frame.f_back
+        labels.reverse()
+        return ';'.join(labels)
+
+    def _run(self):
+        """Sample every registered thread until none are left."""
+        while True:
+            with self._lock:
+                if not self._targets:
+                    self._thread = None
+                    return
+                thread_ids = list(self._targets)
+            frames = sys._current_frames()
+            samples = [(thread_id, self._collapse(frames[thread_id]))
+                       for thread_id in thread_ids if thread_id in frames]
+            del frames
+            with self._lock:
+                for thread_id, stack in samples:
+                    counter = self._targets.get(thread_id)
+                    if counter is not None:
+                        counter[stack] += 1
+            time.sleep(self.interval)
+
+
+def write_collapsed(stacks: Counter, path: str):
+    """Write collapsed stacks to a file, one "stack count" line each."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+
+def init_profiling(app: Flask):
+    """
+    Profile requests when PROFILE_ENABLED=true.
+
+    A request is profiled when it sends an X-Profile header or is picked at
+    PROFILE_SAMPLE_RATE (0-1, default 0). At most PROFILE_MAX_CONCURRENT requests (default 2)
+    are profiled at once, sampling every PROFILE_INTERVAL_MS (default 5). Each profile is
+    written to PROFILE_DIR (default ./profiles) and named in the X-Profile-File header.
+    """
+    if os.getenv('PROFILE_ENABLED', 'false').lower() != 'true':
+        return
+    sample_rate = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+    max_concurrent = int(os.getenv('PROFILE_MAX_CONCURRENT', '2'))
+    profile_dir = os.getenv('PROFILE_DIR', './profiles')
+    profiler = SamplingProfiler(interval=float(os.getenv('PROFILE_INTERVAL_MS', '5')) / 1000)
+    os.makedirs(profile_dir, exist_ok=True)
+
+    @app.before_request
+    def start_profile():
+        wanted = 'X-Profile' in request.headers or (sample_rate and random.random() < sample_rate)
+        if wanted and profiler.active() < max_concurrent:
+            g.profile_start = time.perf_counter()
+            profiler.start()
+
+    @app.after_request
+    def finish_profile(response):
+        if 'profile_start' not in g:
+            return response
+        elapsed_ms = (time.perf_counter() - g.pop('profile_start')) * 1000
+        stacks = profiler.stop()
+        endpoint = (request.endpoint or 'unknown').replace('.', '-')
+        name = f'{time.strftime("%Y%m%dT%H%M%S")}-{endpoint}-{uuid.uuid4().hex[:8]}.folded'
+        try:
+            write_collapsed(stacks, os.path.join(profile_dir, name))
+        except OSError as e:
+            print(f"Error writing profile: {e}")
+            return response
+        totals = attribute(stacks)
+        response.headers['X-Profile-File'] = name
+        response.headers['X-Profile-Summary'] = ', '.join(
+            [f'{elapsed_ms:.1f}ms', f'{sum(stacks.values())} samples'] +
+            [f'{category}={count}' for category, count in totals.items() if count])
+        return response
+
+    @app.teardown_request
+    def discard_profile(exc):
+        # A request that failed before after_request still has to stop its sampling
+        if g.pop('profile_start', None) is not None:
+            profiler.stop()
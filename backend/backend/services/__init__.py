@@ -0,0 +1 @@
+"""Domain services built on top of the storage layer."""
@@ -0,0 +1,332 @@
+"""
+Columnar season archives and cross-season analytics.
+Completed seasons are moved out of the live matches/players tables into one compact file per
+season. Each column is a typed array, compressed on its own, so analytics read only the
+columns they need and scan them with C-level slicing instead of walking match dictionaries.
+
+File layout: struct '<4sHI' (magic, format version, header length), a JSON header describing
+tables, columns and the shared string dictionary, then the zlib-compressed column blocks.
+"""
+import json
+import math
+import os
+import re
+import struct
+import sys
+import zlib
+from array import array
+from collections import Counter
+from datetime import date
+from itertools import filterfalse
+from typing import Any, Dict, List, Optional, Sequence
+
+from backend.models import MatchCard
+from backend.services.scoring import HOLES, parse_score
+
+MAGIC = b'GLCA'
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct('<4sHI')
+ARCHIVE_PATTERN = re.compile(r'^season-(\d{4})\.glc$')
+
+
+def get_archive_dir(league: Optional[str] = None) -> str:
+    """Get the configured archive directory, or a league's own directory below it."""
+    archive_dir = os.getenv('ARCHIVE_PATH', './database/archive')
+    return os.path.join(archive_dir, 'leagues', league) if league else archive_dir
+
+
+def archive_path(archive_dir: str, season: str) -> str:
+    """Get the archive file path for a season."""
+    return os.path.join(archive_dir, f'season-{season}.glc')
+
+
+class _ColumnBuilder:
+    """Accumulates typed columns and a string dictionary shared by every string column."""
+
+    def __init__(self):
+        self.strings: List[str] = ['']
+        self._codes: Dict[str, int] = {'': 0}
+        self.tables: Dict[str, Dict] = {}
+        self.blocks: List[bytes] = []
+        self._offset = 0
+
+    def code(self, value: Optional[str]) -> int:
+        """Get the dictionary code for a string; None and '' share code 0."""
+        value = value or ''
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def add(self, table: str, name: str, values: array, kind: str = 'number'):
+        """Compress a typed array and register it as a column of a table."""
+        if sys.byteorder == 'big':
+            values = array(values.typecode, values)
+            values.byteswap()
+        block = zlib.compress(values.tobytes(), 6)
+        self.tables.setdefault(table, {})[name] = {
+            'type': values.typecode,
+            'kind': kind,
+            'count': len(values),
+            'offset': self._offset,
+            'length': len(block)
+        }
+        self.blocks.append(block)
+        self._offset += len(block)
+
+    def add_strings(self, table: str, name: str, values: Sequence[Optional[str]]):
+        """Dictionary-encode a string column."""
+        self.add(table, name, array('I', [self.code(value) for value in values]), 'string')
+
+
+def write_archive(path: str, season: str, matches: List[Dict], history: List[Dict]) -> Dict:
+    """
+    Write a season archive atomically and return a summary of its contents.
+
+    history holds {'playerId', 'date', 'score', 'handicapAfter'} rows. Matches are stored
+    ordered by course so each course's hole scores form one contiguous range.
+    """
+    matches = sorted(matches, key=lambda m: (m.get('courseId') or '', m['date'], m['id']))
+    builder = _ColumnBuilder()
+
+    points = [parse_score(match.get('score')) for match in matches]
+    builder.add_strings('matches', 'id', [m['id'] for m in matches])
+    builder.add_strings('matches', 'date', [m['date'] for m in matches])
+    builder.add_strings('matches', 'day', [m['day'] for m in matches])
+    builder.add_strings('matches', 'team1', [m['team1Id'] for m in matches])
+    builder.add_strings('matches', 'team2', [m['team2Id'] for m in matches])
+    builder.add_strings('matches', 'winner', [m.get('winnerId') for m in matches])
+    builder.add_strings('matches', 'course', [m.get('courseId') for m in matches])
+    builder.add_strings('matches', 'score', [m.get('score') for m in matches])
+    builder.add('matches', 'completed',
+                array('B', [1 if m.get('completed') else 0 for m in matches]))
+    builder.add('matches', 'team1_points', array('f', [p[0] if p else math.nan for p in points]))
+    builder.add('matches', 'team2_points', array('f', [p[1] if p else math.nan for p in points]))
+
+    # Hole-level scores: one row per player card, gross scores flattened 18 per row (0 = no score)
+    card_match = array('I')
+    card_player = []
+    gross = array('B')
+    course_ranges: Dict[str, List[int]] = {}
+    for index, match in enumerate(matches):
+        card = MatchCard.from_match(match)
+        if card.players:
+            row = len(card_match)
+            course_ranges.setdefault(card.course_id or '', [row, row])[1] = row + len(card.players)
+            card_match.extend([index] * len(card.players))
+            card_player.extend(card.players)
+            gross.extend(card.gross)
+    builder.add('scores', 'match', card_match)
+    builder.add_strings('scores', 'player', card_player)
+    builder.add('scores', 'gross', gross)
+
+    builder.add_strings('history', 'player', [entry['playerId'] for entry in history])
+    builder.add_strings('history', 'date', [entry.get('date') for entry in history])
+    builder.add('history', 'score', array('H', [int(entry.get('score') or 0) for entry in history]))
+    builder.add('history', 'handicap_after', array('h', [
+        int(entry['handicapAfter']) if isinstance(entry.get('handicapAfter'), (int, float)) else -1
+        for entry in history
+    ]))
+
+    header = json.dumps({
+        'season': season,
+        'rows': {'matches': len(matches), 'scores': len(card_match), 'history': len(history)},
+        'courseRanges': course_ranges,
+        'strings': builder.strings,
+        'tables': builder.tables
+    }, separators=(',', ':')).encode('utf-8')
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        f.writelines(builder.blocks)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return {'season': season, 'matches': len(matches), 'scores': len(card_match),
+            'history': len(history), 'path': path, 'bytes': os.path.getsize(path)}
+
+
+class SeasonArchive:
+    """Read access to one season archive; columns are decompressed lazily and cached."""
+
+    def __init__(self, path: str):
+        """Open an archive and read its header."""
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, version, header_length = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f'{path} is not a season archive')
+            if version > FORMAT_VERSION:
+                raise ValueError(f'{path} uses archive format {version}, newer than supported')
+            header = json.loads(f.read(header_length))
+        self._data_start = _PREAMBLE.size + header_length
+        self.season: str = header['season']
+        self.rows: Dict[str, int] = header['rows']
+        self.course_ranges: Dict[str, List[int]] = header['courseRanges']
+        self.strings: List[str] = header['strings']
+        self._codes = {value: code for code, value in enumerate(self.strings)}
+        self._tables: Dict[str, Dict] = header['tables']
+        self._columns: Dict[tuple, array] = {}
+
+    def column(self, table: str, name: str) -> array:
+        """Get a column as a typed array (dictionary codes for string columns)."""
+        key = (table, name)
+        if key not in self._columns:
+            meta = self._tables[table][name]
+            with open(self.path, 'rb') as f:
+                f.seek(self._data_start + meta['offset'])
+                values = array(meta['type'])
+                values.frombytes(zlib.decompress(f.read(meta['length'])))
+            if sys.byteorder == 'big':
+                values.byteswap()
+            self._columns[key] = values
+        return self._columns[key]
+
+    def code(self, value: str) -> int:
+        """Get the dictionary code of a string, or -1 if it does not occur in this archive."""
+        return self._codes.get(value, -1)
+
+    def decode(self, table: str, name: str) -> List[str]:
+        """Get a string column as Python strings."""
+        strings = self.strings
+        return [strings[code] for code in self.column(table, name)]
+
+
+def open_archives(archive_dir: str) -> List[SeasonArchive]:
+    """Open every season archive in a directory, oldest season first."""
+    if not os.path.isdir(archive_dir):
+        return []
+    names = sorted(name for name in os.listdir(archive_dir) if ARCHIVE_PATTERN.match(name))
+    return [SeasonArchive(os.path.join(archive_dir, name)) for name in names]
+
+
+def list_archives(archive_dir: str) -> List[Dict]:
+    """Describe the archived seasons."""
+    return [{'season': archive.season, **archive.rows, 'bytes': os.path.getsize(archive.path)}
+            for archive in open_archives(archive_dir)]
+
+
+def archive_season(storage, season: str, archive_dir: str, force: bool = False) -> Dict:
+    """
+    Move a completed season out of the live tables into a columnar archive.
+
+    A season is the year of the match date. Unless force is set, the current season and
+    seasons with uncompleted matches are refused. The archive is written before anything is
+    deleted, so an interrupted run never loses data.
+    """
+    if not re.fullmatch(r'\d{4}', season):
+        raise ValueError('season must be a four digit year')
+    if not force and season >= str(date.today().year):
+        raise ValueError(f'Season {season} is not over yet')
+    path = archive_path(archive_dir, season)
+    if os.path.exists(path):
+        raise ValueError(f'Season {season} is already archived')
+
+    matches = [match for match in storage.get_matches() if match['date'][:4] == season]
+    if not force and not all(match.get('completed') for match in matches):
+        raise ValueError(f'Season {season} still has uncompleted matches')
+
+    history: List[Dict] = []
+    trimmed: List[Dict] = []
+    for player in storage.get_players():
+        archived: List[Dict] = []
+        kept: List[Dict] = []
+        for entry in player.get('history') or []:
+            (archived if (entry.get('date') or '')[:4] == season else kept).append(entry)
+        if archived:
+            history.extend({**entry, 'playerId': player['id']} for entry in archived)
+            trimmed.append({**player, 'history': kept})
+
+    os.makedirs(archive_dir, exist_ok=True)
+    summary = write_archive(path, season, matches, history)
+    storage.delete_matches([match['id'] for match in matches])
+    for player in trimmed:
+        storage.update_player(player['id'], player)
+    return summary
+
+
+def hole_averages(archive_dir: str, course_id: Optional[str] = None) -> List[Dict]:
+    """Average gross score per hole for each course across every archived season."""
+    totals: Dict[str, List[List[int]]] = {}
+    for archive in open_archives(archive_dir):
+        ranges = archive.course_ranges
+        if course_id is not None:
+            ranges = {course_id: ranges[course_id]} if course_id in ranges else {}
+        if not ranges:
+            continue
+        gross = archive.column('scores', 'gross')
+        for course, (start, end) in ranges.items():
+            sums = totals.setdefault(course, [[0, 0] for _ in range(HOLES)])
+            for hole in range(HOLES):
+                # Every 18th byte of the course's range is this hole's gross score
+                values = gross[start * HOLES + hole:end * HOLES:HOLES]
+                sums[hole][0] += sum(values)
+                sums[hole][1] += len(values) - values.count(0)
+    return [{
+        'courseId': course or None,
+        'holes': [{'number': hole + 1,
+                   'average': round(total / count, 3) if count else None,
+                   'scores': count}
+                  for hole, (total, count) in enumerate(sums)]
+    } for course, sums in sorted(totals.items())]
+
+
+def _rows_with(column: array, code: int) -> List[int]:
+    """Indexes of a code in a column, found by a byte search over the whole column in C."""
+    data = column.tobytes()
+    pattern = array(column.typecode, [code]).tobytes()
+    size = column.itemsize
+    rows = []
+    offset = data.find(pattern)
+    while offset >= 0:
+        if offset % size:
+            # Straddles two values
+            offset = data.find(pattern, offset + 1)
+            continue
+        rows.append(offset // size)
+        offset = data.find(pattern, offset + size)
+    return rows
+
+
+def _pair_rows(first: array, second: array, completed: array, a: int, b: int) -> List[int]:
+    """Indexes of completed matches with first == a and second == b."""
+    return [row for row in _rows_with(first, a) if second[row] == b and completed[row]]
+
+
+def _points(points: array, rows: List[int]) -> float:
+    """Sum a points column over rows, skipping matches without a parsed score (NaN)."""
+    return sum(filterfalse(math.isnan, map(points.__getitem__, rows)))
+
+
+def head_to_head(archive_dir: str, team1_id: str, team2_id: str) -> Dict:
+    """Head-to-head record of two teams across every archived season."""
+    record: Dict[str, Any] = {'team1Id': team1_id, 'team2Id': team2_id, 'played': 0,
+                              'team1Wins': 0, 'team2Wins': 0, 'ties': 0, 'team1Points': 0.0,
+                              'team2Points': 0.0, 'seasons': []}
+    for archive in open_archives(archive_dir):
+        a, b = archive.code(team1_id), archive.code(team2_id)
+        if a < 0 or b < 0:
+            continue
+        first, second = archive.column('matches', 'team1'), archive.column('matches', 'team2')
+        completed = archive.column('matches', 'completed')
+        # Matches with team1 as the match's team1, and those with the sides the other way
+        forward = _pair_rows(first, second, completed, a, b)
+        reverse = _pair_rows(first, second, completed, b, a) if a != b else []
+        played = len(forward) + len(reverse)
+        if not played:
+            continue
+        wins = Counter(map(archive.column('matches', 'winner').__getitem__, forward + reverse))
+        # Points columns are stored from the match's team1 perspective
+        points1 = archive.column('matches', 'team1_points')
+        points2 = archive.column('matches', 'team2_points')
+        season = {'season': archive.season, 'played': played, 'team1Wins': wins[a],
+                  'team2Wins': wins[b], 'ties': played - wins[a] - wins[b],
+                  'team1Points': _points(points1, forward) + _points(points2, reverse),
+                  'team2Points': _points(points2, forward) + _points(points1, reverse)}
+        record['seasons'].append(season)
+        for key in ('played', 'team1Wins', 'team2Wins', 'ties', 'team1Points', 'team2Points'):
+            record[key] += season[key]
+    return record
@@ -0,0 +1,158 @@
+"""
+Handicap-based player pairing for matches.
+Pairs the players of two teams so the total handicap difference across pairs is minimal,
+using the Hungarian assignment algorithm. Players left over on the larger roster are
+reported as unpaired instead of being dropped.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+INFINITY = float('inf')
+
+
+def assign(cost: List[List[float]]) -> List[int]:
+    """
+    Solve a rectangular assignment problem with the Hungarian algorithm in O(n^2 * m).
+
+    cost has n rows and m >= n columns. Returns, for each row, the column assigned to it
+    such that the total cost is minimal and no column is used twice.
+    """
+    n = len(cost)
+    m = len(cost[0]) if n else 0
+    if n > m:
+        raise ValueError('assign() needs at least as many columns as rows')
+    # 1-based potentials and matching, following the classic shortest augmenting path form
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    row_of = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for row in range(1, n + 1):
+        row_of[0] = row
+        col0 = 0
+        min_to = [INFINITY] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[col0] = True
+            row0 = row_of[col0]
+            delta = INFINITY
+            col1 = 0
+            cost_row = cost[row0 - 1]
+            for col in range(1, m + 1):
+                if not used[col]:
+                    reduced = cost_row[col - 1] - u[row0] - v[col]
+                    if reduced < min_to[col]:
+                        min_to[col] = reduced
+                        way[col] = col0
+                    if min_to[col] < delta:
+                        delta = min_to[col]
+                        col1 = col
+            for col in range(m + 1):
+                if used[col]:
+                    u[row_of[col]] += delta
+                    v[col] -= delta
+                else:
+                    min_to[col] -= delta
+            col0 = col1
+            if row_of[col0] == 0:
+                break
+        while col0:
+            col1 = way[col0]
+            row_of[col0] = row_of[col1]
+            col0 = col1
+    assignment = [0] * n
+    for col in range(1, m + 1):
+        if row_of[col]:
+            assignment[row_of[col] - 1] = col - 1
+    return assignment
+
+
+def _summary(player: Dict) -> Dict:
+    """Strip a player down to the fields a pairing needs."""
+    return {'id': player['id'], 'name': player['name'], 'teamId': player['teamId'],
+            'handicap': player['handicap']}
+
+
+def pair_players(team1_players: List[Dict], team2_players: List[Dict]) -> Dict:
+    """
+    Pair two rosters with minimum total handicap difference.
+
+    Returns {'pairings': [{'player1', 'player2', 'handicapDifference'}], 'unpaired': [players]}
+    with pairings ordered by player1 handicap. Ties are broken by player id so the result is
+    deterministic.
+    """
+    team1 = sorted(team1_players, key=lambda player: (player['handicap'], player['id']))
+    team2 = sorted(team2_players, key=lambda player: (player['handicap'], player['id']))
+    swapped = len(team1) > len(team2)
+    rows, cols = (team2, team1) if swapped else (team1, team2)
+    if not rows:
+        return {'pairings': [], 'unpaired': [_summary(player) for player in cols]}
+
+    cost = [[abs(row['handicap'] - col['handicap']) for col in cols] for row in rows]
+    assignment = assign(cost)
+    pairings = []
+    for row_index, col_index in enumerate(assignment):
+        player1, player2 = rows[row_index], cols[col_index]
+        if swapped:
+            player1, player2 = player2, player1
+        pairings.append({
+            'player1': _summary(player1),
+            'player2': _summary(player2),
+            'handicapDifference': abs(player1['handicap'] - player2['handicap'])
+        })
+    paired = set(assignment)
+    unpaired = [_summary(player) for index, player in enumerate(cols) if index not in paired]
+    pairings.sort(key=lambda pairing: (pairing['player1']['handicap'], pairing['player1']['id']))
+    return {'pairings': pairings, 'unpaired': unpaired}
+
+
+class PairingService:
+    """
+    Computes and caches the pairings for every match on a given night.
+
+    Cached results are keyed by scope (the league when several share one process) and date;
+    the least recently used are dropped beyond max_entries.
+    """
+
+    def __init__(self, storage, max_entries: int = 256):
+        """Initialize the service with the storage it reads matches and rosters from."""
+        self.storage = storage
+        self.max_entries = max_entries
+        self._cache: 'OrderedDict[Tuple[Optional[str], str], List[Dict]]' = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self, scope: Optional[str] = None):
+        """Drop the cached pairings of a scope, e.g. after a player or match write."""
+        with self._lock:
+            for key in [key for key in self._cache if key[0] == scope]:
+                del self._cache[key]
+            self._generation += 1
+
+    def pairings_for_date(self, date: str, scope: Optional[str] = None) -> List[Dict]:
+        """Get the pairings for every match on the given date."""
+        with self._lock:
+            cached = self._cache.get((scope, date))
+            if cached is not None:
+                self._cache.move_to_end((scope, date))
+            generation = self._generation
+        if cached is not None:
+            return cached
+
+        rosters: Dict[str, List[Dict]] = {}
+        result = []
+        for match in sorted(self.storage.get_matches_by_date(date), key=lambda m: m['id']):
+            for team_id in (match['team1Id'], match['team2Id']):
+                if team_id not in rosters:
+                    rosters[team_id] = self.storage.get_players_by_team(team_id)
+            pairing = pair_players(rosters[match['team1Id']], rosters[match['team2Id']])
+            result.append({'matchId': match['id'], 'team1Id': match['team1Id'],
+                           'team2Id': match['team2Id'], **pairing})
+
+        with self._lock:
+            # Only cache if no write invalidated the inputs while we were computing
+            if generation == self._generation:
+                self._cache[(scope, date)] = result
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return result
@@ -0,0 +1,354 @@
+"""
+Monte Carlo projection of season standings.
+Each remaining match gets an exact distribution of its score, built from the players' hole
+results so far, the strokes their handicaps give in each pairing and the course. The rest of
+the season is then simulated many times from those distributions. Results are the chance of
+each team finishing in each position.
+"""
+import multiprocessing
+import random
+import threading
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from operator import add
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from backend.models import CourseLayout, MatchCard
+from backend.services.pairing import pair_players
+from backend.services.scoring import HOLES
+from backend.services.strokes import StrokeTable
+from backend.services.team_records import match_season
+
+# Points a match is scored out of, as in a match score like '10.5 - 7.5'
+MATCH_POINTS = 18
+# Hole scores are modelled as net strokes against par, clipped to this range
+RESIDUALS = range(-4, 9)
+# Holes of league-wide results mixed into each player's own, so a few rounds do not decide
+PRIOR_HOLES = 36
+# Net to par of a player without any results in a league without any
+DEFAULT_RESIDUALS = {-1: 0.15, 0: 0.35, 1: 0.3, 2: 0.15, 3: 0.05}
+# Standing points, wins and doubled points for are packed into one sort key per team
+KEY_BASE = 1 << 20
+# Draws are 16-bit uniforms looked up in a table of outcomes per fixture
+DRAW_RESOLUTION = 1 << 16
+# Split the simulations across processes once they need this many match draws
+PARALLEL_MIN_DRAWS = 200_000
+
+# (team1 index, team2 index, outcome keys of team1, outcome keys of team2, cumulative weights)
+Fixture = Tuple[int, int, List[int], List[int], List[float]]
+# (player 1 residual distribution, player 2 residual distribution, net stroke offset per hole)
+Pairing = Tuple[List[float], List[float], Sequence[int]]
+
+
+def _normalize(counts: Sequence[float]) -> List[float]:
+    total = sum(counts)
+    return [count / total for count in counts]
+
+
+def residual_pmfs(matches: List[Dict], handicaps: Dict[str, float],
+                  layouts: Dict[str, CourseLayout]) -> Tuple[Dict[str, List[float]], List[float]]:
+    """
+    Distributions of net score to par per player, and league-wide.
+
+    A hole's residual is gross - par - the strokes the player's full handicap gets there.
+    Only completed matches on a known course count. Distributions are lists over RESIDUALS.
+    """
+    counts: Dict[str, Counter] = {}
+    expected: Dict[tuple, List[int]] = {}
+    low, high = RESIDUALS[0], RESIDUALS[-1]
+    for match in matches:
+        layout = layouts.get(match.get('courseId') or '')
+        if layout is None or not match.get('completed'):
+            continue
+        card = MatchCard.from_match(match)
+        for player_id, gross in card.cards():
+            if player_id not in handicaps:
+                continue
+            handicap = round(handicaps[player_id])
+            key = (layout.id, handicap)
+            if key not in expected:
+                table = StrokeTable.from_layout(layout)
+                expected[key] = list(map(add, layout.pars, table.row(handicap)))
+            counts.setdefault(player_id, Counter()).update(
+                min(max(score - par, low), high)
+                for score, par in zip(gross, expected[key]) if score)
+    league: Counter = Counter()
+    for player_counts in counts.values():
+        league.update(player_counts)
+    if league:
+        league_pmf = _normalize([league[r] for r in RESIDUALS])
+    else:
+        league_pmf = _normalize([DEFAULT_RESIDUALS.get(r, 0) for r in RESIDUALS])
+    pmfs = {player_id: _normalize([player_counts[r] + PRIOR_HOLES * league_pmf[index]
+                                   for index, r in enumerate(RESIDUALS)])
+            for player_id, player_counts in counts.items()}
+    return pmfs, league_pmf
+
+
+def pairing_pmf(pmf1: List[float], pmf2: List[float], offsets: Sequence[int]) -> List[float]:
+    """
+    Distribution of player 1's hole points (0-36) in an 18-hole pairing.
+
+    offsets[hole] is how many strokes net1 - net2 is above residual1 - residual2 on that
+    hole. A lower net wins the hole's 2 points, and a tie gives 1 each.
+    """
+    size = len(RESIDUALS)
+    # Distribution of residual1 - residual2, indexed by difference + size - 1
+    difference = [0.0] * (2 * size - 1)
+    for i, p1 in enumerate(pmf1):
+        for j, p2 in enumerate(pmf2):
+            difference[i - j + size - 1] += p1 * p2
+    below = [0.0]
+    for p in difference:
+        below.append(below[-1] + p)
+    points = [1.0]
+    for offset in offsets:
+        # Player 1 wins when difference < -offset and ties when it equals -offset
+        index = min(max(-offset + size - 1, 0), 2 * size - 1)
+        win = below[index]
+        tie = difference[index] if index < len(difference) else 0.0
+        lose = 1.0 - win - tie
+        hole = (lose, tie, win)
+        merged = [0.0] * (len(points) + 2)
+        for total, p in enumerate(points):
+            for gained, q in enumerate(hole):
+                merged[total + gained] += p * q
+        points = merged
+    return points
+
+
+def match_outcomes(pairings: List[Pairing]) -> Tuple[List[int], List[float]]:
+    """
+    Distribution of team 1's match score, doubled (0-36 for 0-18 points), from its pairings.
+
+    Team 1's share of the hole points is scaled to MATCH_POINTS and rounded to half points.
+    Returns (doubled scores, cumulative weights) for random.choices.
+    """
+    team = [1.0]
+    for pmf1, pmf2, offsets in pairings:
+        pairing = pairing_pmf(pmf1, pmf2, offsets)
+        merged = [0.0] * (len(team) + len(pairing) - 1)
+        for total, p in enumerate(team):
+            for gained, q in enumerate(pairing):
+                merged[total + gained] += p * q
+        team = merged
+    hole_points = len(team) - 1
+    by_score: Dict[int, float] = {}
+    for points, p in enumerate(team):
+        doubled = round(2 * MATCH_POINTS * points / hole_points) if hole_points else MATCH_POINTS
+        by_score[doubled] = by_score.get(doubled, 0.0) + p
+    scores = sorted(by_score)
+    cumulative, running = [], 0.0
+    for score in scores:
+        running += by_score[score]
+        cumulative.append(running)
+    return scores, cumulative
+
+
+def _result_key(doubled_for: int) -> int:
+    """Sort key increment of a team that scored doubled_for of 2 * MATCH_POINTS."""
+    standing_points = 2 if doubled_for > MATCH_POINTS else 1 if doubled_for == MATCH_POINTS else 0
+    return (standing_points * KEY_BASE + (standing_points == 2)) * KEY_BASE + doubled_for
+
+
+def _draw_table(keys: List[int], cumulative: List[float]) -> List[int]:
+    """Map each 16-bit uniform to the outcome key whose cumulative weight covers it."""
+    table: List[int] = []
+    for key, weight in zip(keys, cumulative):
+        table += [key] * (min(round(weight * DRAW_RESOLUTION), DRAW_RESOLUTION) - len(table))
+    return table + [keys[-1]] * (DRAW_RESOLUTION - len(table))
+
+
+def simulate_chunk(base: List[int], fixtures: List[Fixture], simulations: int,
+                   seed: int) -> Tuple[List[List[int]], List[int]]:
+    """
+    Play the fixtures simulations times and count each team's finishing positions.
+
+    base holds each team's current sort key, teams in the order that breaks exact ties.
+    Simulations run column-wise: each fixture draws all its results from one block of random
+    bytes and adds them to every simulation's totals, so the loops over simulations run in C.
+    Returns (counts[team][position], summed final standing points).
+    """
+    rng = random.Random(seed)
+    keys = [[key] * simulations for key in base]
+    for team1, team2, keys1, keys2, cumulative in fixtures:
+        drawn = array('H', rng.randbytes(2 * simulations))
+        keys[team1] = list(map(add, keys[team1],
+                               map(_draw_table(keys1, cumulative).__getitem__, drawn)))
+        keys[team2] = list(map(add, keys[team2],
+                               map(_draw_table(keys2, cumulative).__getitem__, drawn)))
+    teams = range(len(base))
+    counts = [[0] * len(base) for _ in teams]
+    for simulation in zip(*keys):
+        # Stable, so teams with equal keys keep their tie-break order
+        for position, team in enumerate(sorted(teams, key=simulation.__getitem__,
+                                               reverse=True)):
+            counts[team][position] += 1
+    points = [sum(key // (KEY_BASE * KEY_BASE) for key in team_keys) for team_keys in keys]
+    return counts, points
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    """Get the shared worker pool, started on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawned, since forking a threaded server can copy held locks into the workers
+            _executor = ProcessPoolExecutor(max_workers=workers,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+
+def simulate(base: List[int], fixtures: List[Fixture], simulations: int, seed: int = 0,
+             workers: int = 1) -> Tuple[List[List[int]], List[int]]:
+    """Run simulate_chunk, split across up to workers processes for large projections."""
+    if workers <= 1 or simulations * len(fixtures) < PARALLEL_MIN_DRAWS:
+        return simulate_chunk(base, fixtures, simulations, seed)
+    sizes = [simulations // workers + (index < simulations % workers)
+             for index in range(workers)]
+    executor = _get_executor(workers)
+    futures = [executor.submit(simulate_chunk, base, fixtures, size, seed * workers + index)
+               for index, size in enumerate(sizes) if size]
+    counts = [[0] * len(base) for _ in base]
+    points = [0] * len(base)
+    for future in futures:
+        chunk_counts, chunk_points = future.result()
+        for team, row in enumerate(chunk_counts):
+            counts[team] = list(map(add, counts[team], row))
+            points[team] += chunk_points[team]
+    return counts, points
+
+
+def project_standings(storage, season: str, day: Optional[str] = None,
+                      simulations: int = 5000, playoffs: int = 4, seed: int = 0,
+                      workers: int = 1) -> Dict:
+    """
+    Project the final standings of a season, optionally for one day group.
+
+    Starts from the current standings and plays every uncompleted match of the season
+    simulations times. Players are paired as on match night; a match without players on
+    both sides is played by two league-average players. Teams are ranked as in the
+    standings. Each team gets the chance of every finishing position and of finishing in
+    the top playoffs places.
+    """
+    matches = storage.get_matches()
+    remaining = [match for match in matches
+                 if not match.get('completed') and match_season(match) == season
+                 and (day is None or match.get('day') == day)]
+    players = storage.get_players()
+    handicaps = {player['id']: player['handicap'] for player in players}
+    layouts = {course['id']: CourseLayout.from_dict(course) for course in storage.get_courses()}
+    pmfs, league_pmf = residual_pmfs(matches, handicaps, layouts)
+    rosters: Dict[str, List[Dict]] = {}
+    for player in players:
+        rosters.setdefault(player['teamId'], []).append(player)
+
+    current = {record['teamId']: record for record in storage.get_standings(season, day)}
+    team_ids = sorted(current.keys() | {team_id for match in remaining
+                                        for team_id in (match['team1Id'], match['team2Id'])})
+    index = {team_id: position for position, team_id in enumerate(team_ids)}
+    # Ties that survive standing points, wins and points for go to the lower team id, as in
+    # the standings, so the packed keys are ranked with the team ids reversed
+    base = []
+    for team_id in team_ids:
+        record = current.get(team_id, {})
+        base.append((record.get('standingPoints', 0) * KEY_BASE + record.get('wins', 0))
+                    * KEY_BASE + round(2 * record.get('pointsFor', 0)))
+
+    fixtures: List[Fixture] = []
+    tables: Dict[str, StrokeTable] = {}
+    for match in remaining:
+        layout = layouts.get(match.get('courseId'))
+        if layout is not None and layout.id not in tables:
+            tables[layout.id] = StrokeTable.from_layout(layout)
+        table = tables.get(layout.id) if layout is not None else None
+        paired = pair_players(rosters.get(match['team1Id'], []),
+                              rosters.get(match['team2Id'], []))['pairings']
+        pairings: List[Pairing] = []
+        for pairing in paired:
+            player1, player2 = pairing['player1'], pairing['player2']
+            offsets = [0] * HOLES
+            if table is not None:
+                handicap1, handicap2 = round(player1['handicap']), round(player2['handicap'])
+                # Strokes of each full handicap, less those received in the pairing
+                offsets = [full1 - full2 - received1 + received2
+                           for full1, full2, received1, received2 in zip(
+                               table.row(handicap1), table.row(handicap2),
+                               table.row(handicap1 - handicap2),
+                               table.row(handicap2 - handicap1))]
+            pairings.append((pmfs.get(player1['id'], league_pmf),
+                             pmfs.get(player2['id'], league_pmf), offsets))
+        scores, cumulative = match_outcomes(pairings or [(league_pmf, league_pmf, [0] * HOLES)])
+        fixtures.append((index[match['team1Id']], index[match['team2Id']],
+                         [_result_key(score) for score in scores],
+                         [_result_key(2 * MATCH_POINTS - score) for score in scores],
+                         cumulative))
+
+    # Reverse the team order so a stable descending sort favours the lower id on exact ties
+    order = list(reversed(range(len(team_ids))))
+    counts, points = simulate([base[team] for team in order],
+                              [(order.index(team1), order.index(team2), keys1, keys2, weights)
+                               for team1, team2, keys1, keys2, weights in fixtures],
+                              simulations, seed, workers)
+    teams = []
+    for position, team in enumerate(order):
+        record = current.get(team_ids[team], {})
+        chances = [count / simulations for count in counts[position]]
+        teams.append({
+            'teamId': team_ids[team],
+            'standingPoints': record.get('standingPoints', 0),
+            'projectedPoints': round(points[position] / simulations, 2),
+            'positions': [round(chance, 4) for chance in chances],
+            'playoffChance': round(sum(chances[:playoffs]), 4),
+        })
+    teams.sort(key=lambda team: (-team['projectedPoints'], team['teamId']))
+    return {'season': season, 'day': day, 'simulations': simulations,
+            'remainingMatches': len(remaining), 'playoffs': playoffs, 'teams': teams}
+
+
+class ProjectionService:
+    """
+    Computes and caches standings projections.
+
+    Cached results are keyed by scope (the league when several share one process) and the
+    projection's parameters, and dropped after any match write.
+    """
+
+    def __init__(self, storage, workers: int = 1):
+        """Initialize the service with its storage and the processes a projection may use."""
+        self.storage = storage
+        self.workers = workers
+        self._cache: Dict[tuple, Dict] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self, scope: Optional[str] = None):
+        """Drop the cached projections of a scope."""
+        with self._lock:
+            for key in [key for key in self._cache if key[0] == scope]:
+                del self._cache[key]
+            self._generation += 1
+
+    def projection(self, season: str, day: Optional[str] = None, simulations: int = 5000,
+                   playoffs: int = 4, scope: Optional[str] = None) -> Dict:
+        """Get the projection of a season, computing it unless it is cached."""
+        key = (scope, season, day, simulations, playoffs)
+        with self._lock:
+            cached = self._cache.get(key)
+            generation = self._generation
+        if cached is not None:
+            return cached
+
+        result = project_standings(self.storage, season, day, simulations, playoffs,
+                                   workers=self.workers)
+        with self._lock:
+            # Only cache if no write invalidated the inputs while we were simulating
+            if generation == self._generation:
+                self._cache[key] = result
+        return result
+
@@ -0,0 +1,114 @@
+"""
+Round-robin season schedule generation.
+Builds a balanced schedule per day group with the circle method: every team meets every other
+team once per cycle, odd-sized groups rotate a bye, and home/away sides alternate.
+"""
+import uuid
+from collections import deque
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+def round_robin(team_ids: List[str]) -> List[List[Tuple[Optional[str], Optional[str]]]]:
+    """
+    Pair teams for a single round robin.
+
+    Returns one list of (team1, team2) pairs per round. With an odd number of teams one side of
+    a pair is None, meaning the other team has a bye that round. Runs in O(n) per round.
+    """
+    teams: List[Optional[str]] = list(team_ids)
+    if len(teams) < 2:
+        return []
+    if len(teams) % 2:
+        teams.append(None)
+    fixed, rotating = teams[0], deque(teams[1:])
+    half = len(teams) // 2
+    rounds = []
+    for round_index in range(len(teams) - 1):
+        lineup = [fixed, *rotating]
+        pairs = []
+        for i in range(half):
+            home, away = lineup[i], lineup[-1 - i]
+            # Alternate sides so every team gets a near-even split of team1/team2 slots
+            if (i == 0 and round_index % 2) or (i > 0 and i % 2):
+                home, away = away, home
+            pairs.append((home, away))
+        rounds.append(pairs)
+        rotating.rotate(1)
+    return rounds
+
+
+def first_weekday_on_or_after(start: date, day: str) -> date:
+    """Get the first date on or after start that falls on the named weekday."""
+    if day not in WEEKDAYS:
+        raise ValueError(f"Unknown day group '{day}', expected a weekday name")
+    return start + timedelta(days=(WEEKDAYS.index(day) - start.weekday()) % 7)
+
+
+def round_dates(first: date, count: int, interval_weeks: int,
+                skip_dates: Iterable[date]) -> List[date]:
+    """Get count weekly round dates starting at first, stepping over skipped dates."""
+    skipped = set(skip_dates)
+    dates: List[date] = []
+    current = first
+    while len(dates) < count:
+        if current not in skipped:
+            dates.append(current)
+        current += timedelta(weeks=interval_weeks)
+    return dates
+
+
+def generate_schedule(teams: List[Dict], start_date: str, days: Optional[List[str]] = None,
+                      cycles: int = 1, interval_weeks: int = 1,
+                      skip_dates: Optional[List[str]] = None) -> Dict:
+    """
+    Build a round-robin season for each day group.
+
+    teams are team dictionaries; only those whose day is in days (default: every day group
+    present) are scheduled. Each cycle is a full round robin, with sides swapped on even
+    cycles so a double round robin is home-and-away. Returns
+    {'matches': [match dictionaries], 'byes': [{'date', 'day', 'teamId'}]}.
+    """
+    if cycles < 1 or interval_weeks < 1:
+        raise ValueError('cycles and intervalWeeks must be at least 1')
+    if days is not None and (not isinstance(days, list) or
+                             not all(isinstance(day, str) and day in WEEKDAYS for day in days)):
+        raise ValueError(f"days must be a list of weekday names: {', '.join(WEEKDAYS)}")
+    start = date.fromisoformat(start_date)
+    skipped = [date.fromisoformat(value) for value in skip_dates or []]
+
+    groups: Dict[str, List[str]] = {}
+    for team in sorted(teams, key=lambda team: team['id']):
+        groups.setdefault(team['day'], []).append(team['id'])
+    selected = list(dict.fromkeys(days)) if days is not None else sorted(
+        groups, key=lambda day: (WEEKDAYS.index(day) if day in WEEKDAYS else len(WEEKDAYS), day))
+
+    matches: List[Dict] = []
+    byes: List[Dict] = []
+    for day in selected:
+        rounds = round_robin(groups.get(day, []))
+        if not rounds:
+            continue
+        first = first_weekday_on_or_after(start, day)
+        dates = round_dates(first, len(rounds) * cycles, interval_weeks, skipped)
+        for cycle in range(cycles):
+            for round_index, pairs in enumerate(rounds):
+                when = dates[cycle * len(rounds) + round_index].isoformat()
+                for home, away in pairs:
+                    if home is None or away is None:
+                        byes.append({'date': when, 'day': day, 'teamId': home or away})
+                        continue
+                    if cycle % 2:
+                        home, away = away, home
+                    matches.append({
+                        'id': f'm_{uuid.uuid4().hex[:12]}',
+                        'date': when,
+                        'day': day,
+                        'team1Id': home,
+                        'team2Id': away,
+                        'completed': False,
+                        'scores': []
+                    })
+    return {'matches': matches, 'byes': byes}
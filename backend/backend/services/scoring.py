@@ -0,0 +1,79 @@
+"""
+Match scoring helpers shared by the backend services.
+"""
+from typing import Dict, Iterator, List, Optional, Tuple
+
+HOLES = 18
+
+
+def parse_score(score: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Parse a match score such as '10.5 - 7.5' into (team1 points, team2 points)."""
+    if not score:
+        return None
+    parts = score.split('-')
+    if len(parts) != 2:
+        return None
+    try:
+        return float(parts[0]), float(parts[1])
+    except ValueError:
+        return None
+
+
+def iter_player_cards(match: dict) -> Iterator[Tuple[str, Dict[int, int]]]:
+    """
+    Yield (player id, {hole number: gross score}) for each player card in a match.
+
+    Cards are the entries of match['scores'] shaped like the scorecard's player state,
+    {'playerId': 'p1', 'scores': {'1': 5, '2': 4, ...}}. Malformed entries and holes
+    outside 1-18 are skipped.
+    """
+    for card in match.get('scores') or []:
+        if not isinstance(card, dict) or not isinstance(card.get('scores'), dict):
+            continue
+        player_id = card.get('playerId')
+        if not player_id:
+            continue
+        holes = {}
+        for hole, gross in card['scores'].items():
+            try:
+                hole, gross = int(hole), int(gross)
+            except (TypeError, ValueError):
+                continue
+            if 1 <= hole <= HOLES and gross > 0:
+                holes[hole] = gross
+        yield player_id, holes
+
+
+def merge_hole_scores(cards: List[Dict],
+                      updates: Dict[str, Dict[str, Optional[int]]]) -> List[Dict]:
+    """
+    Apply hole score updates to a match's player cards and return the new card list.
+
+    updates maps player id -> hole number -> gross score, where None clears the hole. Players
+    without a card get one appended. The input cards are not modified.
+    """
+    merged = []
+    seen = set()
+    for card in cards or []:
+        player_id = card.get('playerId') if isinstance(card, dict) else None
+        if player_id in updates and player_id not in seen:
+            seen.add(player_id)
+            holes = dict(card.get('scores') or {})
+            _apply_holes(holes, updates[player_id])
+            card = {**card, 'scores': holes}
+        merged.append(card)
+    for player_id, holes_update in updates.items():
+        if player_id not in seen:
+            holes = {}
+            _apply_holes(holes, holes_update)
+            merged.append({'playerId': player_id, 'scores': holes})
+    return merged
+
+
+def _apply_holes(holes: Dict[str, int], update: Dict[str, Optional[int]]):
+    """Set or clear holes in a card's hole -> gross mapping."""
+    for hole, gross in update.items():
+        if gross is None:
+            holes.pop(str(hole), None)
+        else:
+            holes[str(hole)] = gross
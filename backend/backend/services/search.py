@@ -0,0 +1,53 @@
+"""
+Name search over players, teams and courses.
+Backends find candidates with their own text index; tokenizing and the final ranking live
+here so every backend returns the same results in the same order.
+"""
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+ENTITIES = ('player', 'team', 'course')
+# Backends fetch this many candidates per requested result before the final ranking
+CANDIDATE_FACTOR = 4
+
+_WORD = re.compile(r'[^\W_]+')
+
+# (entity, entity id, name, team id or None)
+Candidate = Tuple[str, str, str, Optional[str]]
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase words with accents removed, as the SQL indexes do."""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    folded = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return _WORD.findall(folded)
+
+
+def matches(terms: List[str], tokens: List[str]) -> bool:
+    """Check that every term is a prefix of some token."""
+    return all(any(token.startswith(term) for token in tokens) for term in terms)
+
+
+def _rank_key(terms: List[str], candidate: Candidate):
+    """Sort key: exact names, then names starting with the query, then earlier matches."""
+    entity, entity_id, name, _ = candidate
+    tokens = tokenize(name)
+    query = ' '.join(terms)
+    joined = ' '.join(tokens)
+    first = min((index for index, token in enumerate(tokens)
+                 if any(token.startswith(term) for term in terms)), default=len(tokens))
+    return (joined != query, not joined.startswith(query), first, len(name), name.casefold(),
+            ENTITIES.index(entity), entity_id)
+
+
+def rank_results(terms: List[str], candidates: Iterable[Candidate], limit: int) -> List[Dict]:
+    """Order candidates for a query and shape the top results for the API."""
+    ranked = sorted(set(candidates), key=lambda candidate: _rank_key(terms, candidate))
+    results = []
+    for entity, entity_id, name, team_id in ranked[:limit]:
+        result = {'type': entity, 'id': entity_id, 'name': name}
+        if team_id is not None:
+            result['teamId'] = team_id
+        results.append(result)
+    return results
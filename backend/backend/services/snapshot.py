@@ -0,0 +1,123 @@
+"""
+Binary snapshots of a whole league, for backups, clones and moving between storage backends.
+Records are streamed table by table in chunks, so neither side holds more than one chunk.
+
+File layout: struct '<4sHII' (magic, format version, header length, header CRC-32) and a JSON
+header naming each table's columns, then chunks of struct '<BIII' (table number, record
+count, payload length, CRC-32) followed by the zlib-compressed JSON array of rows in column
+order. A chunk with table number 0 ends the snapshot; its payload holds the record count of
+every table.
+"""
+import json
+import struct
+import time
+import zlib
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+
+MAGIC = b'GLCS'
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct('<4sHII')
+_CHUNK = struct.Struct('<BIII')
+END_OF_SNAPSHOT = 0
+
+# Tables in load order (teams before the players and matches that reference them), with the
+# record fields stored for each; a field missing from a record is stored as null
+COLUMNS = {
+    'courses': ('id', 'name', 'holes'),
+    'teams': ('id', 'name', 'day'),
+    'players': ('id', 'name', 'teamId', 'handicap', 'history'),
+    'matches': ('id', 'date', 'day', 'team1Id', 'team2Id', 'completed', 'winnerId', 'score',
+                'scores', 'courseId'),
+}
+TABLES = tuple(COLUMNS)
+CHUNK_RECORDS = 1000
+
+
+def _chunk(number: int, count: int, rows) -> bytes:
+    """Encode one chunk: its header and compressed payload."""
+    payload = zlib.compress(json.dumps(rows, separators=(',', ':')).encode('utf-8'), 6)
+    return _CHUNK.pack(number, count, len(payload), zlib.crc32(payload)) + payload
+
+
+def write_snapshot(storage, chunk_records: int = CHUNK_RECORDS) -> Iterator[bytes]:
+    """
+    Yield a snapshot of every table as bytes, one chunk at a time.
+
+    Tables are read in pages of chunk_records, so memory use does not grow with the league.
+    Each page is read separately; writes made during the export may be partly included.
+    """
+    header = json.dumps({'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                         'tables': {table: list(columns) for table, columns in COLUMNS.items()}},
+                        separators=(',', ':')).encode('utf-8')
+    yield _PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header), zlib.crc32(header)) + header
+    counts = {}
+    for number, (table, columns) in enumerate(COLUMNS.items(), start=1):
+        counts[table] = 0
+        for records in storage.export_records(table, chunk_records):
+            rows = [[record.get(column) for column in columns] for record in records]
+            counts[table] += len(rows)
+            yield _chunk(number, len(rows), rows)
+    yield _chunk(END_OF_SNAPSHOT, 0, counts)
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    """Read exactly size bytes, failing on a truncated snapshot."""
+    data = b''
+    while len(data) < size:
+        block = stream.read(size - len(data))
+        if not block:
+            raise ValueError('Snapshot is truncated')
+        data += block
+    return data
+
+
+def read_snapshot(stream: BinaryIO) -> Iterator[Tuple[str, List[Dict]]]:
+    """
+    Yield (table, records) for each chunk of a snapshot stream.
+
+    Raises ValueError for anything that is not a complete, intact snapshot. Records are only
+    yielded after their chunk's checksum matched; the record counts are checked at the end.
+    """
+    magic, version, header_length, checksum = _PREAMBLE.unpack(
+        _read_exact(stream, _PREAMBLE.size))
+    if magic != MAGIC:
+        raise ValueError('Not a league snapshot')
+    if version > FORMAT_VERSION:
+        raise ValueError(f'Snapshot format {version} is newer than supported')
+    header = _read_exact(stream, header_length)
+    if zlib.crc32(header) != checksum:
+        raise ValueError('Snapshot header is corrupt')
+    header = json.loads(header)
+    tables = list(header['tables'].items())
+    counts = {table: 0 for table, _ in tables}
+    while True:
+        number, count, length, checksum = _CHUNK.unpack(_read_exact(stream, _CHUNK.size))
+        payload = _read_exact(stream, length)
+        if zlib.crc32(payload) != checksum:
+            raise ValueError('Snapshot chunk is corrupt')
+        rows = json.loads(zlib.decompress(payload))
+        if number == END_OF_SNAPSHOT:
+            if rows != counts:
+                raise ValueError('Snapshot record counts do not match its contents')
+            return
+        if not 1 <= number <= len(tables) or len(rows) != count:
+            raise ValueError('Snapshot chunk is malformed')
+        table, columns = tables[number - 1]
+        counts[table] += count
+        if table in COLUMNS:
+            yield table, [{column: value for column, value in zip(columns, row)
+                           if value is not None} for row in rows]
+
+
+def import_snapshot(storage, stream: BinaryIO) -> Dict[str, int]:
+    """
+    Load a snapshot stream into storage chunk by chunk and return the records per table.
+
+    Records are written over existing ones with the same id. A snapshot that turns out to be
+    damaged stops the import at that chunk, leaving the chunks before it loaded.
+    """
+    counts = {table: 0 for table in TABLES}
+    for table, records in read_snapshot(stream):
+        storage.import_records(table, records)
+        counts[table] += len(records)
+    return counts
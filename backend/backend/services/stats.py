@@ -0,0 +1,73 @@
+"""
+Player statistics derived from players.history.
+Aggregates are computed once per player write and stored, so leaderboards and stat lookups
+never decode history arrays.
+"""
+from typing import Dict
+
+# Leaderboard metric -> (stats key, storage column, sort direction)
+LEADERBOARD_METRICS = {
+    'avg': ('averageScore', 'average_score', 'ASC'),
+    'recent': ('recentAverage', 'recent_average', 'ASC'),
+    'best': ('bestScore', 'best_score', 'ASC'),
+    'rounds': ('rounds', 'rounds', 'DESC'),
+    'handicap': ('handicap', 'handicap', 'ASC'),
+    'trend': ('handicapTrend', 'handicap_trend', 'ASC'),
+}
+
+# Rounds used for the rolling average, matching calculateHandicap in the frontend
+RECENT_ROUNDS = 3
+
+
+def is_round(entry: Dict) -> bool:
+    """Whether a history entry holds a played round's score."""
+    score = entry.get('score')
+    return isinstance(score, (int, float)) and not isinstance(score, bool) and score > 0
+
+
+def compute_player_stats(player: Dict) -> Dict:
+    """
+    Compute the aggregate statistics for a player from its history.
+
+    Only entries with a positive score are rounds; the player editor adds new rows with score 0
+    until one is entered.
+    """
+    rounds = sorted((entry for entry in player.get('history') or [] if is_round(entry)),
+                    key=lambda entry: entry.get('date') or '')
+    stats = {
+        'playerId': player['id'],
+        'name': player['name'],
+        'teamId': player['teamId'],
+        'rounds': len(rounds),
+        'totalScore': 0,
+        'averageScore': None,
+        'recentAverage': None,
+        'bestScore': None,
+        'bestDate': None,
+        'worstScore': None,
+        'lastScore': None,
+        'lastDate': None,
+        'handicap': player['handicap'],
+        'handicapTrend': 0,
+    }
+    if not rounds:
+        return stats
+
+    scores = [entry['score'] for entry in rounds]
+    best = min(rounds, key=lambda entry: entry['score'])
+    recent = scores[-RECENT_ROUNDS:]
+    stats.update({
+        'totalScore': sum(scores),
+        'averageScore': round(sum(scores) / len(scores), 2),
+        'recentAverage': round(sum(recent) / len(recent), 2),
+        'bestScore': best['score'],
+        'bestDate': best.get('date'),
+        'worstScore': max(scores),
+        'lastScore': scores[-1],
+        'lastDate': rounds[-1].get('date'),
+    })
+    handicaps = [entry['handicapAfter'] for entry in rounds
+                 if isinstance(entry.get('handicapAfter'), (int, float))]
+    if handicaps:
+        stats['handicapTrend'] = handicaps[-1] - handicaps[0]
+    return stats
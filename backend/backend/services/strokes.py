@@ -0,0 +1,128 @@
+"""
+Handicap stroke allocation per course.
+A course's stroke table holds the strokes a player receives on each hole for every handicap
+differential from 0 to MAX_DIFFERENTIAL, so net scores and hole points are table lookups.
+Tables are built once per course and cached until the course is written.
+"""
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+from backend.models import CourseLayout
+from backend.services.scoring import HOLES
+
+# Largest differential with its own row: three strokes on every hole
+MAX_DIFFERENTIAL = 54
+
+
+def strokes_received(differential: int, hole_handicap: int) -> int:
+    """
+    Strokes received on a hole by the player giving away differential strokes.
+
+    One stroke on every hole per 18, plus one on the holes ranked 1 to the remainder (hole
+    handicap 1 is the hardest). As the scorecard's calculateStrokesReceived for differentials
+    up to 18. A hole without a ranking (0) gets only the strokes on every hole.
+    """
+    if differential <= 0:
+        return 0
+    base, remainder = divmod(differential, HOLES)
+    return base + (1 if 0 < hole_handicap <= remainder else 0)
+
+
+class StrokeTable:
+    """
+    Strokes received on each hole of one course for differentials 0-MAX_DIFFERENTIAL.
+
+    strokes holds 18 bytes per differential, indexed by differential * 18 + hole - 1.
+    """
+
+    __slots__ = ('course_id', 'handicaps', 'strokes')
+
+    def __init__(self, course_id: str, handicaps: Sequence[int], strokes: bytes):
+        self.course_id = course_id
+        self.handicaps = handicaps
+        self.strokes = strokes
+
+    @classmethod
+    def from_layout(cls, layout: CourseLayout) -> 'StrokeTable':
+        """Build the table from a course layout's hole handicaps."""
+        strokes = bytes(strokes_received(differential, layout.handicaps[hole])
+                        for differential in range(MAX_DIFFERENTIAL + 1)
+                        for hole in range(HOLES))
+        return cls(layout.id, layout.handicaps, strokes)
+
+    def row(self, differential: int) -> bytes:
+        """Get the 18 strokes received for a differential, capped at MAX_DIFFERENTIAL."""
+        start = min(max(differential, 0), MAX_DIFFERENTIAL) * HOLES
+        return self.strokes[start:start + HOLES]
+
+    def pairing_points(self, gross1: Sequence[int], gross2: Sequence[int],
+                       handicap1: float, handicap2: float) -> Tuple[int, int]:
+        """
+        Match play points of a pairing from two players' 18 gross scores (0 for no score).
+
+        The higher handicap receives strokes for the rounded difference. Each hole both
+        players have a score for gives 2 points to the lower net score, or 1 each when tied.
+        """
+        differential = round(handicap1 - handicap2)
+        strokes1 = self.row(differential)
+        strokes2 = self.row(-differential)
+        points1 = points2 = 0
+        for hole in range(HOLES):
+            if gross1[hole] and gross2[hole]:
+                net1 = gross1[hole] - strokes1[hole]
+                net2 = gross2[hole] - strokes2[hole]
+                if net1 == net2:
+                    points1 += 1
+                    points2 += 1
+                elif net1 < net2:
+                    points1 += 2
+                else:
+                    points2 += 2
+        return points1, points2
+
+    def to_dict(self) -> Dict:
+        """The API shape: hole handicaps and one row of 18 strokes per differential."""
+        return {'courseId': self.course_id, 'maxDifferential': MAX_DIFFERENTIAL,
+                'handicaps': list(self.handicaps),
+                'strokes': [list(self.row(differential))
+                            for differential in range(MAX_DIFFERENTIAL + 1)]}
+
+
+class StrokeService:
+    """
+    Builds and caches the stroke table of each course.
+
+    Cached tables are keyed by scope (the league when several share one process) and course.
+    """
+
+    def __init__(self, storage):
+        """Initialize the service with the storage it reads courses from."""
+        self.storage = storage
+        self._cache: Dict[Tuple[Optional[str], str], StrokeTable] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self, scope: Optional[str] = None):
+        """Drop the cached tables of a scope, e.g. after a course write."""
+        with self._lock:
+            for key in [key for key in self._cache if key[0] == scope]:
+                del self._cache[key]
+            self._generation += 1
+
+    def table(self, course_id: str, scope: Optional[str] = None) -> Optional[StrokeTable]:
+        """Get a course's stroke table, or None if the course does not exist."""
+        with self._lock:
+            cached = self._cache.get((scope, course_id))
+            generation = self._generation
+        if cached is not None:
+            return cached
+
+        course = self.storage.get_course(course_id)
+        if course is None:
+            return None
+        table = StrokeTable.from_layout(CourseLayout.from_dict(course))
+        with self._lock:
+            # Only cache if no write invalidated the course while we were building
+            if generation == self._generation:
+                self._cache[(scope, course_id)] = table
+        return table
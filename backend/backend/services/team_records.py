@@ -0,0 +1,81 @@
+"""
+Team records derived from completed matches.
+Head-to-head and per-season totals are kept as running sums: every match write subtracts the
+old match's contribution and adds the new one, so reads are keyed lookups that never scan
+the matches.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.services.scoring import parse_score
+
+# Totals kept per record, in storage column order
+RECORD_FIELDS = ('played', 'wins', 'losses', 'ties', 'pointsFor', 'pointsAgainst')
+
+
+def match_season(match: Dict) -> str:
+    """The season of a match: the year of its date."""
+    return (match.get('date') or '')[:4]
+
+
+def match_results(match: Dict) -> List[Tuple[str, str, tuple]]:
+    """
+    Get (team id, opponent id, totals) for each side of a completed match.
+
+    totals are in RECORD_FIELDS order. A completed match without a winner is a tie; points
+    come from the match score, e.g. '10.5 - 7.5', and count as 0 if it is missing.
+    """
+    team1, team2 = match.get('team1Id'), match.get('team2Id')
+    if not match.get('completed') or not team1 or not team2 or team1 == team2:
+        return []
+    points1, points2 = parse_score(match.get('score')) or (0.0, 0.0)
+    winner = match.get('winnerId')
+    results = []
+    for team, opponent, points_for, points_against in ((team1, team2, points1, points2),
+                                                       (team2, team1, points2, points1)):
+        won, lost = int(winner == team), int(winner == opponent)
+        results.append((team, opponent,
+                        (1, won, lost, 1 - won - lost, points_for, points_against)))
+    return results
+
+
+def record_deltas(old_matches: Iterable[Optional[Dict]],
+                  new_matches: Iterable[Optional[Dict]]) -> Tuple[Dict, Dict]:
+    """
+    Net changes to the totals when old_matches are replaced by new_matches.
+
+    Returns (head-to-head deltas keyed by (team id, opponent id), season deltas keyed by
+    (team id, season, day)), each a list in RECORD_FIELDS order. Keys whose totals do not
+    change are left out, so rewriting a match without changing its result costs nothing.
+    None entries stand for matches that did not exist.
+    """
+    h2h: Dict[tuple, List] = {}
+    seasons: Dict[tuple, List] = {}
+    for sign, matches in ((-1, old_matches), (1, new_matches)):
+        for match in matches:
+            if match is None:
+                continue
+            season, day = match_season(match), match.get('day') or ''
+            for team, opponent, totals in match_results(match):
+                for table, key in ((h2h, (team, opponent)), (seasons, (team, season, day))):
+                    delta = table.setdefault(key, [0] * len(RECORD_FIELDS))
+                    for index, value in enumerate(totals):
+                        delta[index] += sign * value
+    return ({key: delta for key, delta in h2h.items() if any(delta)},
+            {key: delta for key, delta in seasons.items() if any(delta)})
+
+
+def to_record(totals, **keys) -> Dict:
+    """Build an API record from totals in RECORD_FIELDS order and its key fields."""
+    record = dict(keys)
+    record.update(zip(RECORD_FIELDS, totals))
+    record['pointsFor'] = round(record['pointsFor'], 2)
+    record['pointsAgainst'] = round(record['pointsAgainst'], 2)
+    # Standings points as on the standings page: 2 for a win, 1 for a tie
+    record['standingPoints'] = record['wins'] * 2 + record['ties']
+    return record
+
+
+def standings_order(records: List[Dict]) -> List[Dict]:
+    """Sort season records by standings points, then wins, then match points."""
+    return sorted(records, key=lambda record: (-record['standingPoints'], -record['wins'],
+                                               -record['pointsFor'], record['teamId']))
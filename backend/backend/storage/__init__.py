@@ -1,24 +1,154 @@
 """Storage package initialization."""
+import importlib
 import os
-from .base import StorageInterface
-from .sqlite_storage import SQLiteStorage
-from .mariadb_storage import MariaDBStorage
+from typing import Callable, Dict, Optional
+from .base import (
+    IntegrityViolationError, StorageInterface, StorageTimeoutError, VersionConflictError
+)
+from .tenancy import Storage, TenantRegistry, validate_league
+from .write_buffer import BufferedStorage, ScoreWriteBuffer
 
-def get_storage() -> StorageInterface:
-    """Factory function to get the configured storage instance."""
-    storage_type = os.getenv('STORAGE_TYPE', 'sqlite').lower()
+# Storage plugins by STORAGE_TYPE. Each factory imports its backend module when called, so a
+# process only loads the driver it is configured for (mysql.connector is never imported for
+# SQLite).
+_BACKENDS: Dict[str, Callable[[Optional[str]], StorageInterface]] = {}
+
+# Backend classes importable from this package, loaded on first access
+_LAZY_CLASSES = {
+    'SQLiteStorage': '.sqlite_storage',
+    'MariaDBStorage': '.mariadb_storage',
+    'MemoryStorage': '.memory_storage',
+    'CachedStorage': '.cache',
+    'LRUCache': '.cache',
+    'LocalSharedTier': '.cache',
+    'MemorySharedTier': '.cache',
+}
+
+def __getattr__(name: str):
+    """Import backend classes on first use (PEP 562)."""
+    if name in _LAZY_CLASSES:
+        return getattr(importlib.import_module(_LAZY_CLASSES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def register_storage(name: str, factory: Callable[[Optional[str]], StorageInterface]):
+    """
+    Register a storage plugin.
     
-    if storage_type == 'mariadb':
-        return MariaDBStorage(
-            host=os.getenv('MARIADB_HOST', 'localhost'),
-            port=int(os.getenv('MARIADB_PORT', '3306')),
-            database=os.getenv('MARIADB_DATABASE', 'golf_league'),
-            user=os.getenv('MARIADB_USER', 'admin'),
-            password=os.getenv('MARIADB_PASSWORD', 'admin')
-        )
+    factory(league) builds the storage for STORAGE_TYPE=name; league is None for the default
+    database. Registering an existing name replaces it.
+    """
+    _BACKENDS[name.lower()] = factory
+
+def _integrity_mode() -> str:
+    """What deleting a referenced team or course does: 'restrict' (default) or 'cascade'."""
+    return os.getenv('INTEGRITY_MODE', 'restrict')
+
+def _sqlite_storage(league: Optional[str]) -> StorageInterface:
+    from .sqlite_storage import SQLiteStorage
+    if league:
+        db_path = os.path.join(os.getenv('DATABASE_DIR', './database/leagues'), f'{league}.db')
     else:
-        # Default to SQLite
         db_path = os.getenv('DATABASE_PATH', './database/golf_league.db')
-        return SQLiteStorage(db_path)
+    return SQLiteStorage(db_path, integrity_mode=_integrity_mode(),
+                         busy_timeout=float(os.getenv('SQLITE_BUSY_TIMEOUT', '5')))
+
+def _mariadb_storage(league: Optional[str]) -> StorageInterface:
+    from .mariadb_storage import MariaDBStorage
+    database = os.getenv('MARIADB_DATABASE', 'golf_league')
+    return MariaDBStorage(
+        host=os.getenv('MARIADB_HOST', 'localhost'),
+        port=int(os.getenv('MARIADB_PORT', '3306')),
+        database=f'{database}_{league}' if league else database,
+        user=os.getenv('MARIADB_USER', 'admin'),
+        password=os.getenv('MARIADB_PASSWORD', 'admin'),
+        create_database=league is not None,
+        integrity_mode=_integrity_mode(),
+        connect_timeout=int(os.getenv('MARIADB_CONNECT_TIMEOUT', '5'))
+    )
+
+def _memory_storage(league: Optional[str]) -> StorageInterface:
+    from .memory_storage import MemoryStorage
+    snapshot_path = os.getenv('MEMORY_SNAPSHOT_PATH') or None
+    if snapshot_path and league:
+        snapshot_dir = os.path.join(os.path.dirname(snapshot_path), 'leagues')
+        snapshot_path = os.path.join(snapshot_dir, f'{league}.json')
+    return MemoryStorage(
+        snapshot_path=snapshot_path,
+        snapshot_interval=int(os.getenv('MEMORY_SNAPSHOT_INTERVAL', '1000')),
+        sync_writes=os.getenv('MEMORY_SYNC_WRITES', 'false').lower() == 'true',
+        integrity_mode=_integrity_mode()
+    )
+
+# Cache tiers shared by every league this process opens, created on first use
+_cache_tiers = None
+
+def _get_cache_tiers():
+    """Get this process's L1 cache and the shared tier configured by CACHE_SHARED_DIR."""
+    global _cache_tiers
+    if _cache_tiers is None:
+        from .cache import LocalSharedTier, LRUCache, MemorySharedTier
+        shared_dir = os.getenv('CACHE_SHARED_DIR', './database/cache')
+        shared = MemorySharedTier() if shared_dir == 'memory' else LocalSharedTier(shared_dir)
+        _cache_tiers = (LRUCache(int(os.getenv('CACHE_L1_ENTRIES', '256'))), shared)
+    return _cache_tiers
+
+register_storage('sqlite', _sqlite_storage)
+register_storage('mariadb', _mariadb_storage)
+register_storage('memory', _memory_storage)
+
+def get_storage(league: Optional[str] = None) -> Storage:
+    """
+    Factory function to get the configured storage instance.
+    
+    With a league identifier the storage is routed to that league's own SQLite file
+    (DATABASE_DIR/<league>.db), MariaDB schema (<MARIADB_DATABASE>_<league>) or memory snapshot.
+    SQL backends create or check their schema on first use, not here. With CACHE_ENABLED=true
+    the storage is wrapped in a CachedStorage whose writes invalidate every process's cache.
+    """
+    storage_type = os.getenv('STORAGE_TYPE', 'sqlite').lower()
+    if league is not None:
+        validate_league(league)
+    # Default to SQLite
+    factory = _BACKENDS.get(storage_type, _BACKENDS['sqlite'])
+    storage: Storage = factory(league)
+    if os.getenv('CACHE_ENABLED', 'false').lower() == 'true':
+        from .cache import CachedStorage
+        local, shared = _get_cache_tiers()
+        storage = CachedStorage(storage, shared, local, scope=league or '')
+    return storage
+
+def get_buffered_storage(league: Optional[str] = None) -> Storage:
+    """
+    Get the configured storage with write-behind buffering of hole scores.
+    
+    Only the API server should use this: the score log at SCORE_BUFFER_DIR/<league>.log is
+    owned by a single process, and a second process opening it fails. Servers with several
+    worker processes set SCORE_BUFFER_ENABLED=false to write scores directly.
+    """
+    storage = get_storage(league)
+    if os.getenv('SCORE_BUFFER_ENABLED', 'true').lower() != 'true':
+        return storage
+    log_dir = os.getenv('SCORE_BUFFER_DIR', './database/score_buffer')
+    buffer = ScoreWriteBuffer(
+        storage,
+        os.path.join(log_dir, f'{league or "default"}.log'),
+        flush_interval=float(os.getenv('SCORE_FLUSH_INTERVAL', '0.5')),
+        max_pending=int(os.getenv('SCORE_FLUSH_SIZE', '200')),
+        sync_writes=os.getenv('SCORE_BUFFER_SYNC', 'true').lower() == 'true'
+    )
+    return BufferedStorage(storage, buffer)
+
+def get_tenant_registry() -> TenantRegistry:
+    """Create the registry that keeps per-league storage open for the API."""
+    return TenantRegistry(
+        get_buffered_storage,
+        max_open=int(os.getenv('MAX_OPEN_LEAGUES', '64')),
+        idle_seconds=float(os.getenv('LEAGUE_IDLE_SECONDS', '600'))
+    )
 
-__all__ = ["StorageInterface", "SQLiteStorage", "MariaDBStorage", "get_storage"]
+__all__ = ["StorageInterface", "Storage", "VersionConflictError", "IntegrityViolationError",
+           "StorageTimeoutError",
+           "SQLiteStorage", "MariaDBStorage", "MemoryStorage", "TenantRegistry", "BufferedStorage",
+           "ScoreWriteBuffer", "CachedStorage", "LRUCache", "LocalSharedTier", "MemorySharedTier",
+           "get_storage", "get_buffered_storage", "get_tenant_registry",
+           "register_storage"]
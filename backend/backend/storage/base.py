@@ -3,11 +3,65 @@ Abstract base class defining the storage interface for the golf league applicati
 This allows for different storage backends (SQLite, PostgreSQL, etc.) to be used interchangeably.
 """
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
+
+
+class VersionConflictError(Exception):
+    """Raised when a conditional update finds a different version than the caller expected."""
+
+    def __init__(self, current: Optional[int]):
+        """current is the stored version, or None if the record does not exist."""
+        super().__init__(f'Expected another version, current version is {current}')
+        self.current = current
+
+
+class StorageTimeoutError(Exception):
+    """Raised when a storage operation passes its deadline or waits too long for a lock."""
+
+
+# What deleting a team or course that is still referenced does: refuse with
+# IntegrityViolationError, or delete the team's players and matches and clear the course from
+# its matches
+RESTRICT = 'restrict'
+CASCADE = 'cascade'
+INTEGRITY_MODES = (RESTRICT, CASCADE)
+
+
+class IntegrityViolationError(Exception):
+    """Raised when a write would reference a missing record or a restricted delete is refused."""
+
+    def __init__(self, message: str, references: Optional[Dict[str, int]] = None):
+        """references counts the records per table that still point at a deleted record."""
+        super().__init__(message)
+        self.references = references or {}
+
+
+def check_integrity_mode(mode: str) -> str:
+    """Validate an integrity mode and return it in lowercase."""
+    mode = mode.lower()
+    if mode not in INTEGRITY_MODES:
+        raise ValueError(f"Unknown integrity mode '{mode}', expected one of: "
+                         f"{', '.join(INTEGRITY_MODES)}")
+    return mode
 
 
 class StorageInterface(ABC):
-    """Abstract interface for data storage operations."""
+    """
+    Abstract interface for data storage operations.
+    
+    Players must belong to an existing team and matches must name existing teams (and course,
+    if any); creates and updates that break this raise IntegrityViolationError. Deleting a
+    referenced team or course follows integrity_mode. Bulk loads (initialize_data,
+    import_records) are trusted and not checked.
+
+    Backends that wait on I/O bound each operation by the caller's deadline (see
+    backend.storage.deadline) and raise StorageTimeoutError once it has passed.
+
+    Every change to a course, team, player or match, including cascades and bulk loads, is
+    journalled with the acting user (see backend.storage.journal) as part of the write.
+    """
+    
+    integrity_mode = RESTRICT
     
     # Course operations
     @abstractmethod
@@ -32,7 +86,12 @@ class StorageInterface(ABC):
     
     @abstractmethod
     def delete_course(self, course_id: str) -> bool:
-        """Delete a course."""
+        """
+        Delete a course.
+        
+        If matches are played on it, restrict mode raises IntegrityViolationError and cascade
+        mode removes the course from those matches.
+        """
         pass
     
     # Team operations
@@ -58,7 +117,12 @@ class StorageInterface(ABC):
     
     @abstractmethod
     def delete_team(self, team_id: str) -> bool:
-        """Delete a team."""
+        """
+        Delete a team.
+        
+        If players or matches reference it, restrict mode raises IntegrityViolationError and
+        cascade mode deletes them in the same transaction.
+        """
         pass
     
     # Player operations
@@ -72,14 +136,25 @@ class StorageInterface(ABC):
         """Get a specific player by ID."""
         pass
     
+    @abstractmethod
+    def get_players_by_team(self, team_id: str) -> List[Dict]:
+        """Get the players on a team."""
+        pass
+    
     @abstractmethod
     def create_player(self, player_data: Dict) -> Dict:
         """Create a new player."""
         pass
     
     @abstractmethod
-    def update_player(self, player_id: str, player_data: Dict) -> Dict:
-        """Update an existing player."""
+    def update_player(self, player_id: str, player_data: Dict,
+                      expected_version: Optional[int] = None) -> Dict:
+        """
+        Update an existing player and return it with its new version (None if not found).
+        
+        With expected_version the update only applies if the stored player still has that
+        version; otherwise VersionConflictError is raised and nothing is written.
+        """
         pass
     
     @abstractmethod
@@ -98,14 +173,30 @@ class StorageInterface(ABC):
         """Get a specific match by ID."""
         pass
     
+    @abstractmethod
+    def get_matches_by_date(self, date: str) -> List[Dict]:
+        """Get the matches played on a date."""
+        pass
+    
     @abstractmethod
     def create_match(self, match_data: Dict) -> Dict:
         """Create a new match."""
         pass
     
     @abstractmethod
-    def update_match(self, match_id: str, match_data: Dict) -> Dict:
-        """Update an existing match."""
+    def create_matches(self, matches: List[Dict]) -> List[Dict]:
+        """Create many matches in a single bulk insert."""
+        pass
+    
+    @abstractmethod
+    def update_match(self, match_id: str, match_data: Dict,
+                     expected_version: Optional[int] = None) -> Dict:
+        """
+        Update an existing match and return it with its new version (None if not found).
+        
+        With expected_version the update only applies if the stored match still has that
+        version; otherwise VersionConflictError is raised and nothing is written.
+        """
         pass
     
     @abstractmethod
@@ -113,6 +204,147 @@ class StorageInterface(ABC):
         """Delete a match."""
         pass
     
+    @abstractmethod
+    def delete_matches(self, match_ids: List[str]) -> int:
+        """Delete many matches in one transaction and return how many were deleted."""
+        pass
+    
+    @abstractmethod
+    def apply_hole_scores(self, updates: Dict[str, Dict[str, Dict[str, Optional[int]]]],
+                          expected_versions: Optional[Dict[str, int]] = None) -> int:
+        """
+        Merge hole scores into many matches in one transaction.
+        
+        updates maps match id -> player id -> hole number -> gross score (None clears the
+        hole). Returns the number of matches updated; unknown matches are skipped. Each
+        updated match gets a new version. If expected_versions maps a match id to a version
+        the match no longer has, VersionConflictError is raised and nothing is written.
+        """
+        pass
+    
+    # Statistics operations
+    @abstractmethod
+    def get_player_stats(self, player_id: str) -> Optional[Dict]:
+        """Get the precomputed statistics for a player."""
+        pass
+    
+    @abstractmethod
+    def get_leaderboard(self, metric: str, limit: int) -> List[Dict]:
+        """Get the top players for a metric in LEADERBOARD_METRICS."""
+        pass
+    
+    @abstractmethod
+    def rebuild_player_stats(self) -> int:
+        """Recompute statistics for every player and return the number of players."""
+        pass
+    
+    # Team record operations
+    @abstractmethod
+    def get_team_h2h(self, team_id: str, opponent_id: Optional[str] = None) -> List[Dict]:
+        """
+        Get a team's record against each opponent it has completed matches with.
+        
+        Records hold played, wins, losses, ties, pointsFor, pointsAgainst and
+        standingPoints, ordered by opponent id; with opponent_id only that opponent's.
+        """
+        pass
+    
+    @abstractmethod
+    def get_team_seasons(self, team_id: str) -> List[Dict]:
+        """Get a team's record for each season and day it has completed matches in."""
+        pass
+    
+    @abstractmethod
+    def get_standings(self, season: str, day: Optional[str] = None) -> List[Dict]:
+        """Get every team's season record, optionally for one day, best standing first."""
+        pass
+    
+    @abstractmethod
+    def rebuild_team_records(self) -> int:
+        """Recompute the team records from the matches and return the completed matches."""
+        pass
+    
+    # Search operations
+    @abstractmethod
+    def search(self, query: str, limit: int) -> List[Dict]:
+        """Find players, teams and courses whose names match every word of query as a prefix."""
+        pass
+    
+    @abstractmethod
+    def rebuild_search_index(self) -> int:
+        """Rebuild the name search index and return the number of indexed names."""
+        pass
+    
+    # Bulk transfer
+    @abstractmethod
+    def export_records(self, table: str, batch_size: int) -> Iterator[List[Dict]]:
+        """
+        Yield every record of a table in id order, at most batch_size records at a time.
+        
+        table is 'courses', 'teams', 'players' or 'matches'. Each batch is read separately.
+        """
+        pass
+    
+    @abstractmethod
+    def import_records(self, table: str, records: List[Dict]) -> int:
+        """
+        Insert or update a batch of records of a table in one bulk write.
+        
+        Existing records are updated in place, and versioned ones get their next version as
+        with any update. Player statistics, team records and the search index are updated with
+        them. Returns the count.
+        """
+        pass
+    
+    # Journal
+    @abstractmethod
+    def get_history(self, table: str, record_id: str) -> List[Dict]:
+        """
+        Get the journal entries of a record, oldest first.
+
+        table is one of backend.storage.journal.JOURNAL_TABLES. Each entry has seq, at (ISO
+        8601 UTC), actor, op ('put' or 'delete') and the record as written (None if deleted).
+        """
+        pass
+
+    @abstractmethod
+    def get_as_of(self, table: str, record_id: str, at: float) -> Optional[Dict]:
+        """Get a record as it was at a time (seconds since the epoch), or None if absent then."""
+        pass
+
+    @abstractmethod
+    def compact_journal(self, before: float, limit: int) -> int:
+        """
+        Drop up to limit journal entries older than before that no longer decide a read.
+
+        Of each record's entries before that time only the last is kept, and not even that
+        one if it is a deletion, so reads as of before or later are unchanged. Returns the
+        count; call again until it is 0.
+        """
+        pass
+
+    # Maintenance
+    @abstractmethod
+    def purge_orphans(self, limit: int) -> Dict[str, int]:
+        """
+        Repair up to limit records per kind left behind by deletes without integrity checks.
+        
+        Deletes players of missing teams and matches of missing teams, and clears missing
+        winners and courses from matches, keeping derived data in step. Returns the count
+        per kind ('players', 'matches', 'winners', 'courses'); call again until all are 0.
+        """
+        pass
+    
+    @abstractmethod
+    def optimize(self, force: bool = False) -> Dict:
+        """
+        Reclaim space and refresh planner statistics once enough of the storage is unused.
+        
+        Without force, the expensive rewrite only runs past the backend's free space
+        threshold. Returns what was done.
+        """
+        pass
+    
     # Initialization
     @abstractmethod
     def initialize_data(self, data: Dict) -> bool:
@@ -123,3 +355,11 @@ class StorageInterface(ABC):
     def is_initialized(self) -> bool:
         """Check if the database has been initialized with data."""
         pass
+    
+    def release_connection(self):
+        """Let other threads reuse what the calling thread holds; called as a request ends."""
+        pass
+    
+    def close(self):
+        """Release connections and other resources held by the storage."""
+        pass
@@ -0,0 +1,295 @@
+"""
+Two-tier caching of full-table reads for API servers running several worker processes.
+Each process keeps its recent results in an LRU (L1). A shared tier (L2) in local files holds
+serialized results and a write generation per cached table for every process on the host.
+Writes through CachedStorage bump the generations of the tables they can change, so a result
+cached by any process is used only while no process has written its table since it was read.
+"""
+import fcntl
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+# Cached reads and the table each one reads
+CACHED_READS = {
+    'get_courses': 'courses',
+    'get_teams': 'teams',
+    'get_players': 'players',
+    'get_matches': 'matches',
+}
+
+# Cached tables each write can change. Deleting a team or a course counts its cascades even
+# when INTEGRITY_MODE restricts it; an extra invalidation only costs a reload.
+WRITE_TABLES = {
+    'create_course': ('courses',),
+    'update_course': ('courses',),
+    'delete_course': ('courses', 'matches'),
+    'create_team': ('teams',),
+    'update_team': ('teams',),
+    'delete_team': ('teams', 'players', 'matches'),
+    'create_player': ('players',),
+    'update_player': ('players',),
+    'delete_player': ('players',),
+    'create_match': ('matches',),
+    'create_matches': ('matches',),
+    'update_match': ('matches',),
+    'delete_match': ('matches',),
+    'delete_matches': ('matches',),
+    'apply_hole_scores': ('matches',),
+    'purge_orphans': ('players', 'matches'),
+    'initialize_data': tuple(CACHED_READS.values()),
+}
+
+
+class LRUCache:
+    """Thread-safe least-recently-used map holding at most max_entries entries."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """Get an entry and mark it recently used, or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any):
+        """Store an entry, evicting the least recently used one when full."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class MemorySharedTier:
+    """
+    In-process stand-in for LocalSharedTier, for tests and single-process servers.
+
+    CachedStorage instances sharing one tier behave like workers sharing the local files.
+    Values are stored serialized, so every get returns new objects as the local tier does.
+    """
+
+    def __init__(self):
+        self._generations: Dict[str, int] = {}
+        self._values: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def generation(self, key: str) -> int:
+        """Get the write generation of a key."""
+        return self._generations.get(key, 0)
+
+    def bump(self, keys: Iterable[str]):
+        """Advance the write generation of the keys, invalidating their cached values."""
+        with self._lock:
+            for key in set(keys):
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+    def get(self, key: str, generation: int) -> Optional[Any]:
+        """Get the value cached for a key at a generation, or None."""
+        entry = self._values.get(key)
+        if entry is None or entry[0] != generation:
+            return None
+        return json.loads(entry[1])
+
+    def put(self, key: str, generation: int, value: Any):
+        """Cache a value read at a generation, unless a newer one is already cached."""
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None or entry[0] <= generation:
+                self._values[key] = (generation, json.dumps(value))
+
+
+class LocalSharedTier:
+    """
+    Shared tier kept in a local directory that every worker process opens.
+
+    Generations are 8-byte counters in a memory-mapped file, hashed into a fixed number of
+    slots; reading one is a memory load, and bumps take an exclusive file lock. Keys sharing a
+    slot only invalidate each other more often. Values are JSON in a SQLite file. Put the
+    directory on tmpfs (e.g. /dev/shm) to keep it off disk. When the generations file is
+    created the values are cleared, since they can no longer be checked.
+    """
+
+    def __init__(self, directory: str, slots: int = 4096, max_value_bytes: int = 64 << 20):
+        self.directory = directory
+        self.slots = slots
+        self.max_value_bytes = max_value_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(os.path.join(directory, 'generations'), os.O_RDWR | os.O_CREAT, 0o600)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, 'values.db'), timeout=0.05,
+                                   check_same_thread=False, isolation_level=None)
+        with self._file_lock():
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=OFF')
+            self._db.execute('CREATE TABLE IF NOT EXISTS cache_values ('
+                             'key TEXT PRIMARY KEY, generation INTEGER NOT NULL, '
+                             'value BLOB NOT NULL)')
+            if os.fstat(self._fd).st_size < slots * 8:
+                os.ftruncate(self._fd, slots * 8)
+                self._db.execute('DELETE FROM cache_values')
+        self._map = mmap.mmap(self._fd, slots * 8)
+
+    @contextmanager
+    def _file_lock(self):
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _offset(self, key: str) -> int:
+        return zlib.crc32(key.encode('utf-8')) % self.slots * 8
+
+    def generation(self, key: str) -> int:
+        """Get the write generation of a key."""
+        return struct.unpack_from('<Q', self._map, self._offset(key))[0]
+
+    def bump(self, keys: Iterable[str]):
+        """Advance the write generation of the keys, invalidating their cached values."""
+        with self._file_lock():
+            for offset in {self._offset(key) for key in keys}:
+                current = struct.unpack_from('<Q', self._map, offset)[0]
+                struct.pack_into('<Q', self._map, offset, current + 1)
+
+    def get(self, key: str, generation: int) -> Optional[Any]:
+        """Get the value cached for a key at a generation, or None."""
+        try:
+            with self._lock:
+                row = self._db.execute('SELECT value FROM cache_values '
+                                       'WHERE key = ? AND generation = ?',
+                                       (key, generation)).fetchone()
+        except sqlite3.OperationalError:
+            # Busy or locked: the caller reads storage instead
+            return None
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, generation: int, value: Any):
+        """Cache a value read at a generation, unless a newer one is already cached."""
+        data = json.dumps(value, separators=(',', ':')).encode('utf-8')
+        if len(data) > self.max_value_bytes:
+            return
+        try:
+            with self._lock:
+                self._db.execute('INSERT INTO cache_values (key, generation, value) '
+                                 'VALUES (?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+                                 'generation = excluded.generation, value = excluded.value '
+                                 'WHERE excluded.generation >= cache_values.generation',
+                                 (key, generation, data))
+        except sqlite3.OperationalError:
+            pass
+
+    def close(self):
+        with self._lock:
+            self._map.close()
+            os.close(self._fd)
+            self._db.close()
+
+
+class CachedStorage:
+    """
+    Storage wrapper serving get_courses, get_teams, get_players and get_matches from the L1
+    and shared tiers.
+
+    A read takes the table's generation before loading from storage, and writes bump it after
+    they return, so a result loaded concurrently with a write is never used after that write.
+    Cached results are shared between callers and must not be modified. Everything else is
+    delegated to the wrapped storage.
+    """
+
+    def __init__(self, storage, shared, local: Optional[LRUCache] = None, scope: str = ''):
+        """
+        Wrap storage. scope separates leagues sharing the tiers, e.g. the league identifier.
+        """
+        self.storage = storage
+        self.shared = shared
+        self.local = local if local is not None else LRUCache()
+        self.scope = scope
+        self._stats = {'l1Hits': 0, 'l2Hits': 0, 'misses': 0}
+        self._stats_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        attr = getattr(self.storage, name)
+        tables = WRITE_TABLES.get(name)
+        if tables is None:
+            return attr
+
+        def write(*args, **kwargs):
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                # Also after a failed write, which may have reached storage before failing
+                self.invalidate(tables)
+        return write
+
+    def _key(self, table: str) -> str:
+        return f'{self.scope}:{table}'
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _read(self, table: str, load) -> List[Dict]:
+        key = self._key(table)
+        generation = self.shared.generation(key)
+        entry = self.local.get(key)
+        if entry is not None and entry[0] == generation:
+            self._count('l1Hits')
+            return entry[1]
+        value = self.shared.get(key, generation)
+        if value is None:
+            self._count('misses')
+            value = load()
+            self.shared.put(key, generation, value)
+        else:
+            self._count('l2Hits')
+        self.local.put(key, (generation, value))
+        return value
+
+    def get_courses(self) -> List[Dict]:
+        return self._read('courses', self.storage.get_courses)
+
+    def get_teams(self) -> List[Dict]:
+        return self._read('teams', self.storage.get_teams)
+
+    def get_players(self) -> List[Dict]:
+        return self._read('players', self.storage.get_players)
+
+    def get_matches(self) -> List[Dict]:
+        return self._read('matches', self.storage.get_matches)
+
+    def import_records(self, table: str, records: List[Dict]) -> int:
+        """Load records, then invalidate their table."""
+        try:
+            return self.storage.import_records(table, records)
+        finally:
+            self.invalidate([table])
+
+    def invalidate(self, tables: Iterable[str]):
+        """Invalidate the cached reads of tables in every process."""
+        self.shared.bump(self._key(table) for table in tables)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Hits per tier and misses of this wrapper's cached reads."""
+        with self._stats_lock:
+            return dict(self._stats)
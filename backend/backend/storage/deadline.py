@@ -0,0 +1,77 @@
+"""
+Per-operation deadlines for storage calls.
+The API sets a deadline for each request; storage backends read it to bound lock waits and
+statement run times, and raise StorageTimeoutError once it has passed. Deadlines are context
+variables, so they follow the request's thread but not threads it hands work to.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Optional
+from backend.storage.base import StorageTimeoutError
+
+# time.monotonic() value after which storage calls fail, or None for no limit
+_deadline: ContextVar[Optional[float]] = ContextVar('storage_deadline', default=None)
+
+
+def set_deadline(seconds: Optional[float]) -> Token:
+    """
+    Limit storage calls to the next seconds, or keep an enclosing deadline if it is sooner.
+
+    None or 0 leaves the current deadline as it is. Returns a token for reset_deadline.
+    """
+    current = _deadline.get()
+    if seconds:
+        at = time.monotonic() + seconds
+        current = at if current is None else min(current, at)
+    return _deadline.set(current)
+
+
+def reset_deadline(token: Token):
+    """Restore the deadline in force before set_deadline returned token."""
+    _deadline.reset(token)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """Run the block with set_deadline(seconds)."""
+    token = set_deadline(seconds)
+    try:
+        yield
+    finally:
+        reset_deadline(token)
+
+
+@contextmanager
+def no_deadline():
+    """Run the block without a deadline, e.g. one-time schema setup."""
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def current() -> Optional[float]:
+    """Get the current deadline as a time.monotonic() value, or None."""
+    return _deadline.get()
+
+
+def remaining(at: Optional[float] = None) -> Optional[float]:
+    """Get the seconds left before the current deadline or at (0 once passed), or None."""
+    if at is None:
+        at = _deadline.get()
+    return None if at is None else max(at - time.monotonic(), 0.0)
+
+
+def expired(at: Optional[float] = None) -> bool:
+    """Whether the current deadline, or the deadline at, has passed."""
+    if at is None:
+        at = _deadline.get()
+    return at is not None and time.monotonic() >= at
+
+
+def check():
+    """Raise StorageTimeoutError if the current deadline has passed."""
+    if expired():
+        raise StorageTimeoutError('Storage deadline exceeded')
@@ -2,17 +2,69 @@
 MariaDB implementation of the storage interface.
 Provides persistent storage for the golf league application using MariaDB database.
 """
-import json
+import time
 import mysql.connector
-from typing import List, Dict, Optional
-from backend.storage.base import StorageInterface
+from mysql.connector.constants import ClientFlag
+from typing import Dict, List
+from backend.services.search import matches, tokenize
+from backend.storage import deadline
+from backend.storage.base import RESTRICT, StorageTimeoutError
+from backend.storage.sql_storage import SQLStorage
+from backend.storage.statements import MARIADB
 
+# Connections idle for longer than this are pinged before reuse
+IDLE_PING_SECONDS = 30
 
-class MariaDBStorage(StorageInterface):
+# Server errors for a statement stopped by max_statement_time (MariaDB, and MySQL's
+# max_execution_time) and for an InnoDB lock wait that timed out
+TIMEOUT_ERRNOS = (1969, 3024, 1205)
+
+# OPTIMIZE TABLE rebuilds a table, so it only runs once this fraction of its space is free
+OPTIMIZE_FREE_FRACTION = 0.2
+TABLE_SPACE = ('SELECT table_name, data_free, data_length + index_length '
+               'FROM information_schema.tables WHERE table_schema = DATABASE()')
+
+# InnoDB leaves words shorter than innodb_ft_min_token_size (default 3) out of FULLTEXT indexes
+FULLTEXT_MIN_TOKEN = 3
+# InnoDB's default stopwords (INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD), also left out
+FULLTEXT_STOPWORDS = frozenset((
+    'a', 'about', 'an', 'are', 'as', 'at', 'be', 'by', 'com', 'de', 'en', 'for', 'from', 'how',
+    'i', 'in', 'is', 'it', 'la', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'what',
+    'when', 'where', 'who', 'will', 'with', 'und', 'www',
+))
+
+SEARCH_UPSERT = ('REPLACE INTO search_entries (entity, entity_id, name, team_id, words) '
+                 'VALUES (%s, %s, %s, %s, %s)')
+SEARCH_DELETE = 'DELETE FROM search_entries WHERE entity = %s AND entity_id = %s'
+SEARCH_SELECT = 'SELECT entity, entity_id, name, team_id FROM search_entries WHERE '
+SEARCH_FULLTEXT = 'MATCH (name) AGAINST (%s IN BOOLEAN MODE)'
+# words holds the name's tokens, each after a space, so this matches the start of any word
+SEARCH_WORD_START = 'words LIKE %s'
+SEARCH_MISSING_WORDS = "SELECT 1 FROM search_entries WHERE words = '' LIMIT 1"
+
+
+def fulltext_indexed(term: str) -> bool:
+    """Whether the FULLTEXT index holds every word a search term is a prefix of."""
+    return len(term) >= FULLTEXT_MIN_TOKEN and \
+        not any(stopword.startswith(term) for stopword in FULLTEXT_STOPWORDS)
+
+
+class MariaDBStorage(SQLStorage):
     """MariaDB implementation of the storage interface."""
     
-    def __init__(self, host, port, database, user, password):
-        """Initialize MariaDB storage with the given connection details."""
+    sql = MARIADB
+    driver_error = mysql.connector.Error
+    
+    def __init__(self, host, port, database, user, password, create_database=False,
+                 integrity_mode: str = RESTRICT, connect_timeout: int = 5):
+        """
+        Initialize MariaDB storage with the given connection details.
+        
+        With create_database the schema is created first if it does not exist, as needed for
+        per-league schemas. connect_timeout is in seconds. Statements run under the caller's
+        deadline get it as the session's max_statement_time.
+        """
+        super().__init__(integrity_mode)
         self.config = {
             'host': host,
             'port': port,
@@ -20,13 +72,196 @@ class MariaDBStorage(StorageInterface):
             'user': user,
             'password': password,
             'charset': 'utf8mb4',
-            'collation': 'utf8mb4_unicode_ci'
+            'collation': 'utf8mb4_unicode_ci',
+            # Reads run outside transactions so long-lived connections never see a stale
+            # snapshot; writes open explicit transactions in _begin.
+            'autocommit': True,
+            # Report matched rather than changed rows, as SQLite does
+            'client_flags': [ClientFlag.FOUND_ROWS],
+            'connection_timeout': connect_timeout
         }
-        self._init_database()
+        # Created on the first connection, together with the schema check
+        self._create_database_pending = create_database
+    
+    def _create_database(self):
+        """Create the configured schema if it does not exist."""
+        config = {key: value for key, value in self.config.items() if key != 'database'}
+        conn = mysql.connector.connect(**config)
+        cursor = conn.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{self.config['database']}` "
+                       "CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+        cursor.close()
+        conn.close()
+    
+    def _connect(self):
+        """Open a database connection, creating the database first if requested."""
+        if self._create_database_pending:
+            self._create_database()
+            self._create_database_pending = False
+        try:
+            return mysql.connector.connect(**self.config)
+        except mysql.connector.errors.InterfaceError as e:
+            if 'timed out' in str(e):
+                raise StorageTimeoutError(f'Connecting to MariaDB timed out: {e}') from e
+            raise
     
     def _get_connection(self):
-        """Get a database connection."""
-        return mysql.connector.connect(**self.config)
+        """Get this thread's connection, replacing it if it died while idle."""
+        conn = super()._get_connection()
+        now = time.monotonic()
+        last_used = getattr(self._local, 'last_used', now)
+        self._local.last_used = now
+        if now - last_used > IDLE_PING_SECONDS and not conn.is_connected():
+            self._discard_connection()
+            conn = super()._get_connection()
+        return conn
+    
+    def _discard_connection(self):
+        """Forget this thread's connection, its prepared statements and its statement limit."""
+        self._local.cursors = {}
+        self._local.statement_deadline = None
+        super()._discard_connection()
+    
+    def _limit_statements(self, conn):
+        """
+        Set the session's max_statement_time to the time left before the caller's deadline.
+        
+        Set once per deadline rather than per statement, so a request costs one extra round
+        trip; later statements of the request may run up to the time already used past it,
+        which the deadline checks between statements catch.
+        """
+        at = deadline.current()
+        if getattr(self._local, 'statement_deadline', None) == at:
+            return
+        cursor = conn.cursor()
+        if at is None:
+            cursor.execute('SET SESSION max_statement_time = DEFAULT')
+        else:
+            cursor.execute('SET SESSION max_statement_time = %s',
+                           (max(deadline.remaining(), 0.001),))
+        cursor.close()
+        self._local.statement_deadline = at
+    
+    def _prepared_cursor(self, conn, sql: str):
+        """Get the prepared-statement cursor for sql on this thread's connection."""
+        cursors = getattr(self._local, 'cursors', None)
+        if cursors is None or getattr(self._local, 'cursors_conn', None) is not conn:
+            cursors = self._local.cursors = {}
+            self._local.cursors_conn = conn
+        cursor = cursors.get(sql)
+        if cursor is None:
+            cursor = cursors[sql] = conn.cursor(prepared=True)
+        return cursor
+    
+    def _execute(self, conn, sql: str, params=()):
+        """Execute a statement through a cached server-side prepared statement."""
+        self._limit_statements(conn)
+        cursor = self._prepared_cursor(conn, sql)
+        cursor.execute(sql, params)
+        return cursor
+    
+    def _executemany(self, conn, sql: str, rows: List[tuple]):
+        """Execute a statement once per parameter tuple."""
+        self._limit_statements(conn)
+        self._prepared_cursor(conn, sql).executemany(sql, rows)
+    
+    def _begin(self, conn):
+        """Start an explicit transaction; the connection otherwise autocommits."""
+        conn.start_transaction()
+    
+    def _timed_out(self, error: Exception) -> bool:
+        """Statements stopped by max_statement_time, and lock waits that timed out."""
+        return getattr(error, 'errno', None) in TIMEOUT_ERRNOS
+    
+    # Search index
+    def _index_search(self, conn, entity: str, entity_id: str, name: str, team_id=None):
+        """Add or replace a search entry."""
+        words = ''.join(f' {token}' for token in tokenize(name))
+        self._execute(conn, SEARCH_UPSERT, (entity, entity_id, name, team_id, words))
+    
+    def _unindex_search(self, conn, entity: str, entity_id: str):
+        """Remove a search entry."""
+        self._execute(conn, SEARCH_DELETE, (entity, entity_id))
+    
+    def _clear_search(self, conn):
+        """Empty the search entries."""
+        self._execute(conn, 'DELETE FROM search_entries')
+    
+    def _search_candidates(self, terms: List[str], limit: int) -> List[tuple]:
+        """
+        Match terms through the FULLTEXT index, best relevance first.
+
+        Terms the FULLTEXT index cannot find, too short or the start of a stopword, must
+        start a word of the stored words, the prefix rule of the other backends, in the same
+        query. Without an indexed term the entries are scanned in name order.
+        """
+        indexed = [term for term in terms if fulltext_indexed(term)]
+        unindexed = [term for term in terms if not fulltext_indexed(term)]
+        conditions = [SEARCH_WORD_START] * len(unindexed)
+        params: List = [f'% {term}%' for term in unindexed]
+        if indexed:
+            expression = ' '.join(f'+{term}*' for term in indexed)
+            where = ' AND '.join([SEARCH_FULLTEXT, *conditions])
+            sql = f'{SEARCH_SELECT}{where} ORDER BY {SEARCH_FULLTEXT} DESC LIMIT %s'
+            params = [expression, *params, expression]
+        else:
+            sql = f'{SEARCH_SELECT}{" AND ".join(conditions)} ORDER BY name LIMIT %s'
+        rows = self._fetchall(sql, (*params, limit))
+        # FULLTEXT splits words its own way, so check every term against our tokens too
+        return [row for row in rows if matches(terms, tokenize(row[2]))]
+
+    def _backfill_search_index(self):
+        """Index names, and store the words of entries indexed before words were kept."""
+        if self._fetchone(SEARCH_MISSING_WORDS):
+            self.rebuild_search_index()
+        else:
+            super()._backfill_search_index()
+    
+    # Maintenance
+    def optimize(self, force: bool = False) -> Dict:
+        """Rebuild tables with OPTIMIZE_FREE_FRACTION of their space free, then ANALYZE all."""
+        rows = self._fetchall(TABLE_SPACE)
+        tables = [row[0] for row in rows]
+        rebuilt = [name for name, free, used in rows
+                   if force or (free and free / (free + used) >= OPTIMIZE_FREE_FRACTION)]
+        if not tables:
+            return {'optimized': []}
+        cursor = self._get_connection().cursor()
+        try:
+            # Both statements return a result set per table that must be read
+            for statement, names in (('OPTIMIZE', rebuilt), ('ANALYZE', tables)):
+                if names:
+                    cursor.execute(f"{statement} TABLE {', '.join(names)}")
+                    cursor.fetchall()
+        finally:
+            cursor.close()
+        return {'optimized': rebuilt}
+    
+    def _schema_version(self, conn) -> int:
+        """Read the schema version table, which older databases do not have."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT version FROM schema_version')
+            row = cursor.fetchone()
+            return row[0] if row else 0
+        except mysql.connector.errors.ProgrammingError:
+            return 0
+        finally:
+            cursor.close()
+    
+    def _set_schema_version(self, conn, version: int):
+        """Record the schema version."""
+        cursor = conn.cursor()
+        cursor.execute('CREATE TABLE IF NOT EXISTS schema_version (version INT NOT NULL)')
+        conn.start_transaction()
+        cursor.execute('DELETE FROM schema_version')
+        cursor.execute('INSERT INTO schema_version (version) VALUES (%s)', (version,))
+        conn.commit()
+        cursor.close()
+    
+    def _add_column(self, cursor, table: str, column: str, definition: str):
+        """Add a column to a table created by an older version of the schema."""
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {definition}')
     
     def _init_database(self):
         """Initialize database schema."""
@@ -81,354 +316,109 @@ class MariaDBStorage(StorageInterface):
             )
         ''')
         
-        conn.commit()
-        cursor.close()
-        conn.close()
-    
-    # Course operations
-    def get_courses(self) -> List[Dict]:
-        """Get all courses."""
-        conn = self._get_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute('SELECT * FROM courses')
-        rows = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        # Columns added after the original schema
+        self._add_column(cursor, 'matches', 'course_id', 'VARCHAR(255)')
+        self._add_column(cursor, 'players', 'version', 'INTEGER NOT NULL DEFAULT 1')
+        self._add_column(cursor, 'matches', 'version', 'INTEGER NOT NULL DEFAULT 1')
         
-        return [self._row_to_course(row) for row in rows]
-    
-    def get_course(self, course_id: str) -> Optional[Dict]:
-        """Get a specific course by ID."""
-        conn = self._get_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute('SELECT * FROM courses WHERE id = %s', (course_id,))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        # Lookup index for match nights; InnoDB already indexes players.team_id for its foreign key
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_matches_date ON matches (date)')
+        # The team columns are indexed for their foreign keys; course_id has none
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_matches_course_id ON matches (course_id)')
         
-        return self._row_to_course(row) if row else None
-
-    def create_course(self, course_data: Dict) -> Dict:
-        """Create a new course."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        holes_json = json.dumps(course_data['holes'])
-        cursor.execute(
-            'INSERT INTO courses (id, name, holes) VALUES (%s, %s, %s)',
-            (course_data['id'], course_data['name'], holes_json)
-        )
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return course_data
-
-    def update_course(self, course_id: str, course_data: Dict) -> Dict:
-        """Update an existing course."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        holes_json = json.dumps(course_data['holes'])
-        cursor.execute(
-            'UPDATE courses SET name = %s, holes = %s WHERE id = %s',
-            (course_data['name'], holes_json, course_id)
-        )
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return {**course_data, 'id': course_id}
-
-    def delete_course(self, course_id: str) -> bool:
-        """Delete a course."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM courses WHERE id = %s', (course_id,))
-        deleted = cursor.rowcount > 0
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return deleted
-    
-    def _row_to_course(self, row) -> Dict:
-        """Convert database row to course dictionary."""
-        return {
-            'id': row['id'],
-            'name': row['name'],
-            'holes': json.loads(row['holes'])
-        }
-    
-    # Team operations
-    def get_teams(self) -> List[Dict]:
-        """Get all teams."""
-        conn = self._get_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute('SELECT * FROM teams')
-        rows = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        # Player statistics, maintained on every player write
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS player_stats (
+                player_id VARCHAR(255) PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                team_id VARCHAR(255) NOT NULL,
+                rounds INTEGER NOT NULL,
+                total_score INTEGER NOT NULL,
+                average_score DOUBLE,
+                recent_average DOUBLE,
+                best_score INTEGER,
+                best_date VARCHAR(255),
+                worst_score INTEGER,
+                last_score INTEGER,
+                last_date VARCHAR(255),
+                handicap INTEGER NOT NULL,
+                handicap_trend INTEGER NOT NULL
+            )
+        ''')
         
-        return [dict(row) for row in rows]
-    
-    def get_team(self, team_id: str) -> Optional[Dict]:
-        """Get a specific team by ID."""
-        conn = self._get_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute('SELECT * FROM teams WHERE id = %s', (team_id,))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        # One index per leaderboard metric so top-N queries never sort the whole table
+        for column in ('average_score', 'recent_average', 'best_score', 'rounds', 'handicap',
+                       'handicap_trend'):
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS idx_player_stats_{column} ON player_stats ({column})'
+            )
         
-        return dict(row) if row else None
-    
-    def create_team(self, team_data: Dict) -> Dict:
-        """Create a new team."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            'INSERT INTO teams (id, name, day) VALUES (%s, %s, %s)',
-            (team_data['id'], team_data['name'], team_data['day'])
-        )
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return team_data
-    
-    def update_team(self, team_id: str, team_data: Dict) -> Dict:
-        """Update an existing team."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        # Team records, running totals maintained on every match write
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS team_h2h (
+                team_id VARCHAR(255) NOT NULL,
+                opponent_id VARCHAR(255) NOT NULL,
+                played INTEGER NOT NULL,
+                wins INTEGER NOT NULL,
+                losses INTEGER NOT NULL,
+                ties INTEGER NOT NULL,
+                points_for DOUBLE NOT NULL,
+                points_against DOUBLE NOT NULL,
+                PRIMARY KEY (team_id, opponent_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS team_seasons (
+                team_id VARCHAR(255) NOT NULL,
+                season VARCHAR(16) NOT NULL,
+                day VARCHAR(255) NOT NULL,
+                played INTEGER NOT NULL,
+                wins INTEGER NOT NULL,
+                losses INTEGER NOT NULL,
+                ties INTEGER NOT NULL,
+                points_for DOUBLE NOT NULL,
+                points_against DOUBLE NOT NULL,
+                PRIMARY KEY (team_id, season, day)
+            )
+        ''')
         cursor.execute(
-            'UPDATE teams SET name = %s, day = %s WHERE id = %s',
-            (team_data['name'], team_data['day'], team_id)
+            'CREATE INDEX IF NOT EXISTS idx_team_seasons_season ON team_seasons (season, day)'
         )
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return {**team_data, 'id': team_id}
-    
-    def delete_team(self, team_id: str) -> bool:
-        """Delete a team."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM teams WHERE id = %s', (team_id,))
-        deleted = cursor.rowcount > 0
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return deleted
-    
-    # Player operations
-    def get_players(self) -> List[Dict]:
-        """Get all players."""
-        conn = self._get_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute('SELECT * FROM players')
-        rows = cursor.fetchall()
-        cursor.close()
-        conn.close()
         
-        return [self._row_to_player(row) for row in rows]
-    
-    def get_player(self, player_id: str) -> Optional[Dict]:
-        """Get a specific player by ID."""
-        conn = self._get_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute('SELECT * FROM players WHERE id = %s', (player_id,))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
-        return self._row_to_player(row) if row else None
-    
-    def create_player(self, player_data: Dict) -> Dict:
-        """Create a new player."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        history_json = json.dumps(player_data.get('history', []))
-        cursor.execute(
-            'INSERT INTO players (id, name, team_id, handicap, history) VALUES (%s, %s, %s, %s, %s)',
-            (player_data['id'], player_data['name'], player_data['teamId'], 
-             player_data['handicap'], history_json)
-        )
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return player_data
-    
-    def update_player(self, player_id: str, player_data: Dict) -> Dict:
-        """Update an existing player."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        history_json = json.dumps(player_data.get('history', []))
-        cursor.execute(
-            'UPDATE players SET name = %s, team_id = %s, handicap = %s, history = %s WHERE id = %s',
-            (player_data['name'], player_data['teamId'], player_data['handicap'], 
-             history_json, player_id)
-        )
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return {**player_data, 'id': player_id}
-    
-    def delete_player(self, player_id: str) -> bool:
-        """Delete a player."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM players WHERE id = %s', (player_id,))
-        deleted = cursor.rowcount > 0
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return deleted
-    
-    def _row_to_player(self, row) -> Dict:
-        """Convert database row to player dictionary."""
-        return {
-            'id': row['id'],
-            'name': row['name'],
-            'teamId': row['team_id'],
-            'handicap': row['handicap'],
-            'history': json.loads(row['history']) if row['history'] else []
-        }
-    
-    # Match operations
-    def get_matches(self) -> List[Dict]:
-        """Get all matches."""
-        conn = self._get_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute('SELECT * FROM matches')
-        rows = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        # Name search: one entry per player, team and course with a FULLTEXT index. words
+        # holds the name's tokens for terms shorter than the FULLTEXT minimum word length,
+        # which scan the entries in name order
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS search_entries (
+                entity VARCHAR(16) NOT NULL,
+                entity_id VARCHAR(255) NOT NULL,
+                name VARCHAR(255) NOT NULL,
+                team_id VARCHAR(255),
+                words VARCHAR(1024) NOT NULL DEFAULT '',
+                PRIMARY KEY (entity, entity_id),
+                INDEX idx_search_name (name),
+                FULLTEXT INDEX ft_search_name (name)
+            )
+        ''')
+        self._add_column(cursor, 'search_entries', 'words', "VARCHAR(1024) NOT NULL DEFAULT ''")
         
-        return [self._row_to_match(row) for row in rows]
-    
-    def get_match(self, match_id: str) -> Optional[Dict]:
-        """Get a specific match by ID."""
-        conn = self._get_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute('SELECT * FROM matches WHERE id = %s', (match_id,))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        # Append-only journal of record mutations; rows are compressed by storage.journal
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS journal (
+                seq BIGINT AUTO_INCREMENT PRIMARY KEY,
+                at DOUBLE NOT NULL,
+                actor VARCHAR(100),
+                entity VARCHAR(16) NOT NULL,
+                entity_id VARCHAR(255) NOT NULL,
+                op VARCHAR(8) NOT NULL,
+                data MEDIUMBLOB,
+                INDEX idx_journal_entity (entity, entity_id, at),
+                INDEX idx_journal_at (at)
+            )
+        ''')
         
-        return self._row_to_match(row) if row else None
-    
-    def create_match(self, match_data: Dict) -> Dict:
-        """Create a new match."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        scores_json = json.dumps(match_data.get('scores', []))
-        cursor.execute(
-            '''INSERT INTO matches (id, date, day, team1_id, team2_id, completed, winner_id, score, scores)
-               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)''',
-            (match_data['id'], match_data['date'], match_data['day'],
-             match_data['team1Id'], match_data['team2Id'],
-             1 if match_data.get('completed') else 0,
-             match_data.get('winnerId'), match_data.get('score'), scores_json)
-        )
-        conn.commit()
         cursor.close()
-        conn.close()
-        return match_data
-    
-    def update_match(self, match_id: str, match_data: Dict) -> Dict:
-        """Update an existing match."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        scores_json = json.dumps(match_data.get('scores', []))
-        cursor.execute(
-            '''UPDATE matches SET date = %s, day = %s, team1_id = %s, team2_id = %s,
-               completed = %s, winner_id = %s, score = %s, scores = %s WHERE id = %s''',
-            (match_data['date'], match_data['day'], match_data['team1Id'], match_data['team2Id'],
-             1 if match_data.get('completed') else 0,
-             match_data.get('winnerId'), match_data.get('score'), scores_json, match_id)
-        )
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return {**match_data, 'id': match_id}
-    
-    def delete_match(self, match_id: str) -> bool:
-        """Delete a match."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM matches WHERE id = %s', (match_id,))
-        deleted = cursor.rowcount > 0
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return deleted
-    
-    def _row_to_match(self, row) -> Dict:
-        """Convert database row to match dictionary."""
-        match_dict = {
-            'id': row['id'],
-            'date': row['date'],
-            'day': row['day'],
-            'team1Id': row['team1_id'],
-            'team2Id': row['team2_id'],
-            'completed': bool(row['completed']),
-            'scores': json.loads(row['scores']) if row['scores'] else []
-        }
-        if row['winner_id']:
-            match_dict['winnerId'] = row['winner_id']
-        if row['score']:
-            match_dict['score'] = row['score']
-        return match_dict
-    
-    # Initialization
-    def initialize_data(self, data: Dict) -> bool:
-        """Initialize the database with seed data."""
-        try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            # Insert courses
-            for course in data.get('courses', []):
-                holes_json = json.dumps(course['holes'])
-                cursor.execute(
-                    'REPLACE INTO courses (id, name, holes) VALUES (%s, %s, %s)',
-                    (course['id'], course['name'], holes_json)
-                )
-            
-            # Insert teams
-            for team in data.get('teams', []):
-                cursor.execute(
-                    'REPLACE INTO teams (id, name, day) VALUES (%s, %s, %s)',
-                    (team['id'], team['name'], team['day'])
-                )
-            
-            # Insert players
-            for player in data.get('players', []):
-                history_json = json.dumps(player.get('history', []))
-                cursor.execute(
-                    'REPLACE INTO players (id, name, team_id, handicap, history) VALUES (%s, %s, %s, %s, %s)',
-                    (player['id'], player['name'], player['teamId'], player['handicap'], history_json)
-                )
-            
-            # Insert matches
-            for match in data.get('matches', []):
-                scores_json = json.dumps(match.get('scores', []))
-                cursor.execute(
-                    '''REPLACE INTO matches (id, date, day, team1_id, team2_id, completed, winner_id, score, scores)
-                       VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)''',
-                    (match['id'], match['date'], match['day'], match['team1Id'], match['team2Id'],
-                     1 if match.get('completed') else 0, match.get('winnerId'), match.get('score'), scores_json)
-                )
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            return True
-        except Exception as e:
-            print(f"Error initializing data: {e}")
-            return False
-    
-    def is_initialized(self) -> bool:
-        """Check if the database has been initialized with data."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM players')
-        count = cursor.fetchone()[0]
-        cursor.close()
-        conn.close()
-        return count > 0
+        self._backfill_player_stats()
+        self._backfill_search_index()
+        self._backfill_team_records()
+        self._backfill_journal()
@@ -0,0 +1,882 @@
+"""
+In-memory implementation of the storage interface.
+Keeps the whole league in indexed dictionaries, optionally persisted through periodic
+atomic snapshots plus an append-only write log used for crash recovery.
+"""
+import bisect
+import copy
+import heapq
+import json
+import os
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Dict, Optional
+from backend.services.scoring import merge_hole_scores
+from backend.services.search import CANDIDATE_FACTOR, matches, rank_results, tokenize
+from backend.services.stats import LEADERBOARD_METRICS, compute_player_stats
+from backend.services.team_records import record_deltas, standings_order, to_record
+from backend.storage import journal
+from backend.storage.base import (
+    RESTRICT, IntegrityViolationError, StorageInterface, VersionConflictError,
+    check_integrity_mode
+)
+
+
+TABLES = ('courses', 'teams', 'players', 'matches')
+# Tables whose names are searchable, and the entity name they are returned as
+SEARCH_ENTITIES = {'courses': 'course', 'teams': 'team', 'players': 'player'}
+# Tables whose records carry a version, incremented by every update
+VERSIONED_TABLES = ('players', 'matches')
+
+
+class MemoryStorage(StorageInterface):
+    """In-memory implementation of the storage interface."""
+
+    def __init__(self, snapshot_path: Optional[str] = None, snapshot_interval: int = 1000,
+                 sync_writes: bool = False, integrity_mode: str = RESTRICT):
+        """
+        Initialize in-memory storage.
+
+        When snapshot_path is given, state is restored from the snapshot and its write log
+        (snapshot_path + '.log') and every mutation is appended to the log. A fresh snapshot
+        is written every snapshot_interval mutations, after which the log is truncated.
+        sync_writes fsyncs each log record, trading write latency for power-loss durability.
+        """
+        self.snapshot_path = snapshot_path
+        self.log_path = f'{snapshot_path}.log' if snapshot_path else None
+        self.snapshot_interval = snapshot_interval
+        self.sync_writes = sync_writes
+        self.integrity_mode = check_integrity_mode(integrity_mode)
+        self._lock = threading.RLock()
+        self._tables: Dict[str, Dict[str, Dict]] = {table: {} for table in TABLES}
+        # Secondary indexes: key -> set of ids
+        self._players_by_team: Dict[str, set] = defaultdict(set)
+        self._teams_by_day: Dict[str, set] = defaultdict(set)
+        self._matches_by_team: Dict[str, set] = defaultdict(set)
+        self._matches_by_day: Dict[str, set] = defaultdict(set)
+        self._matches_by_date: Dict[str, set] = defaultdict(set)
+        self._matches_by_course: Dict[str, set] = defaultdict(set)
+        self._matches_by_winner: Dict[str, set] = defaultdict(set)
+        # Player statistics, derived on every player write and never persisted
+        self._player_stats: Dict[str, Dict] = {}
+        # Team records, adjusted on every match write and never persisted:
+        # team id -> opponent id or (season, day) -> totals in RECORD_FIELDS order
+        self._team_h2h: Dict[str, Dict[str, List]] = {}
+        self._team_seasons: Dict[str, Dict[tuple, List]] = {}
+        # Name search: sorted (token, entity, id) for prefix range scans, and the names
+        self._search_tokens: List[tuple] = []
+        self._search_names: Dict[tuple, tuple] = {}
+        # Bulk loads skip per-record index inserts and rebuild the index once at the end
+        self._search_deferred = False
+        # Journal: (table, id) -> [(at, seq, actor, op, record or None)] in time order. Entries
+        # share the stored record dicts, which writes replace rather than change
+        self._journal: Dict[tuple, List[tuple]] = {}
+        self._journal_seq = 0
+        self._writes_since_snapshot = 0
+        self._log = None
+        if self.log_path:
+            Path(self.log_path).parent.mkdir(parents=True, exist_ok=True)
+            self._recover()
+            self._log = open(self.log_path, 'a', encoding='utf-8')  # noqa: SIM115 - kept open
+
+    # Persistence
+    def _recover(self):
+        """Load the last snapshot and replay the write log on top of it."""
+        self._search_deferred = True
+        try:
+            self._replay()
+        finally:
+            self._search_deferred = False
+            self.rebuild_search_index()
+
+    def _replay(self):
+        """Apply the snapshot and the write log, with their journal entries."""
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            for table in TABLES:
+                for record in snapshot.get(table, []):
+                    self._put(table, record)
+            if 'journal' in snapshot:
+                for seq, at, actor, table, record_id, op, record in snapshot['journal']:
+                    self._append_journal(table, record_id, op, record, (seq, at, actor))
+            else:
+                # Snapshots from before the journal start it with the records they hold
+                for table in TABLES:
+                    for record in self._tables[table].values():
+                        self._append_journal(table, record['id'], journal.PUT, record)
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final record from a crash mid-append; all before it is intact
+                        break
+                    if entry['op'] == 'compact':
+                        self._compact_journal(entry['before'], entry['limit'])
+                        continue
+                    if entry['op'] == 'put':
+                        record = entry['data']
+                        self._put(entry['table'], record)
+                    else:
+                        record = None
+                        self._delete(entry['table'], entry['id'])
+                    # Entries already in the snapshot's journal are only applied again
+                    if entry.get('seq', self._journal_seq + 1) > self._journal_seq:
+                        stamp = (entry['seq'], entry['at'], entry['actor']) \
+                            if 'seq' in entry else None
+                        self._append_journal(entry['table'], entry.get('id') or record['id'],
+                                             entry['op'], record, stamp)
+
+    def _append_log(self, entry: Dict):
+        """Append a mutation to the write log and snapshot when the interval is reached."""
+        if self._log is None:
+            return
+        self._log.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        self._log.flush()
+        if self.sync_writes:
+            os.fsync(self._log.fileno())
+        self._writes_since_snapshot += 1
+        if self._writes_since_snapshot >= self.snapshot_interval:
+            self.snapshot()
+
+    def snapshot(self):
+        """Atomically write a full snapshot and truncate the write log."""
+        if not self.snapshot_path:
+            return
+        with self._lock:
+            tmp_path = f'{self.snapshot_path}.tmp'
+            state = {table: list(self._tables[table].values()) for table in TABLES}
+            state['journal'] = [[seq, at, actor, table, record_id, op, record]
+                                for (table, record_id), entries in self._journal.items()
+                                for at, seq, actor, op, record in entries]
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            # Replaying log entries over the new snapshot is idempotent, so a crash before
+            # this truncation is harmless.
+            self._log.close()
+            self._log = open(self.log_path, 'w', encoding='utf-8')  # noqa: SIM115 - kept open
+            self._writes_since_snapshot = 0
+
+    def close(self):
+        """Write a final snapshot and close the write log."""
+        with self._lock:
+            if self._log is not None:
+                self.snapshot()
+                self._log.close()
+                self._log = None
+
+    # Index maintenance
+    def _index(self, table: str, record: Dict, add: bool):
+        """Add or remove a record from the secondary indexes."""
+        record_id = record['id']
+        entries = []
+        if table == 'players':
+            entries.append((self._players_by_team, record['teamId']))
+        elif table == 'teams':
+            entries.append((self._teams_by_day, record['day']))
+        elif table == 'matches':
+            entries.append((self._matches_by_team, record['team1Id']))
+            entries.append((self._matches_by_team, record['team2Id']))
+            entries.append((self._matches_by_day, record['day']))
+            entries.append((self._matches_by_date, record['date']))
+            if record.get('courseId'):
+                entries.append((self._matches_by_course, record['courseId']))
+            if record.get('winnerId'):
+                entries.append((self._matches_by_winner, record['winnerId']))
+        for index, key in entries:
+            if add:
+                index[key].add(record_id)
+            else:
+                ids = index.get(key)
+                if ids is not None:
+                    ids.discard(record_id)
+                    if not ids:
+                        del index[key]
+
+    def _put(self, table: str, record: Dict):
+        """Insert or replace a normalized record and update indexes."""
+        rows = self._tables[table]
+        if table in VERSIONED_TABLES:
+            # New records, and records from snapshots taken before versions existed
+            record.setdefault('version', 1)
+        old = rows.get(record['id'])
+        if old is not None:
+            self._index(table, old, add=False)
+        rows[record['id']] = record
+        self._index(table, record, add=True)
+        if table == 'players':
+            self._player_stats[record['id']] = compute_player_stats(record)
+        elif table == 'matches':
+            self._store_team_records([old], [record])
+        if table in SEARCH_ENTITIES and not self._search_deferred:
+            self._index_search(SEARCH_ENTITIES[table], record)
+
+    def _delete(self, table: str, record_id: str) -> bool:
+        """Remove a record and its index entries."""
+        old = self._tables[table].pop(record_id, None)
+        if old is None:
+            return False
+        self._index(table, old, add=False)
+        if table == 'players':
+            self._player_stats.pop(record_id, None)
+        elif table == 'matches':
+            self._store_team_records([old], [])
+        if table in SEARCH_ENTITIES and not self._search_deferred:
+            self._unindex_search(SEARCH_ENTITIES[table], record_id)
+        return True
+
+    def _write(self, table: str, record: Dict):
+        """Store a record, journal it and log the mutation."""
+        with self._lock:
+            self._put(table, record)
+            seq, at, actor = self._append_journal(table, record['id'], journal.PUT, record)
+            self._append_log({'op': 'put', 'table': table, 'data': record, 'seq': seq,
+                              'at': at, 'actor': actor})
+
+    def _write_loaded(self, table: str, record: Dict):
+        """Store a seeded or imported record; an existing one gets its next version."""
+        if table in VERSIONED_TABLES:
+            old = self._tables[table].get(record['id'])
+            record['version'] = old['version'] + 1 if old is not None else 1
+        self._write(table, record)
+
+    def _remove(self, table: str, record_id: str) -> bool:
+        """Delete a record, journal it and log the mutation."""
+        with self._lock:
+            deleted = self._delete(table, record_id)
+            if deleted:
+                seq, at, actor = self._append_journal(table, record_id, journal.DELETE, None)
+                self._append_log({'op': 'delete', 'table': table, 'id': record_id, 'seq': seq,
+                                  'at': at, 'actor': actor})
+            return deleted
+
+    def _append_journal(self, table: str, record_id: str, op: str, record: Optional[Dict],
+                        stamp: Optional[tuple] = None) -> tuple:
+        """
+        Journal a mutation and return its (seq, at, actor).
+
+        stamp restores an entry read back from a snapshot or the write log; new entries get
+        the next seq, the current time and the current actor.
+        """
+        if stamp is None:
+            stamp = (self._journal_seq + 1, journal.now(), journal.current_actor())
+        seq, at, actor = stamp
+        self._journal_seq = max(self._journal_seq, seq)
+        bisect.insort(self._journal.setdefault((table, record_id), []),
+                      (at, seq, actor, op, record))
+        return stamp
+
+    # Search index maintenance
+    def _index_search(self, entity: str, record: Dict):
+        """Add or replace a record's name in the prefix index."""
+        key = (entity, record['id'])
+        if key in self._search_names:
+            self._unindex_search(*key)
+        self._search_names[key] = (record['name'], record.get('teamId'))
+        for token in set(tokenize(record['name'])):
+            bisect.insort(self._search_tokens, (token, entity, record['id']))
+
+    def _unindex_search(self, entity: str, record_id: str):
+        """Remove a record's name from the prefix index."""
+        entry = self._search_names.pop((entity, record_id), None)
+        if entry is None:
+            return
+        for token in set(tokenize(entry[0])):
+            index = bisect.bisect_left(self._search_tokens, (token, entity, record_id))
+            if index < len(self._search_tokens) and \
+                    self._search_tokens[index] == (token, entity, record_id):
+                del self._search_tokens[index]
+
+    def _update_versioned(self, table: str, record: Dict,
+                          expected_version: Optional[int]) -> Optional[int]:
+        """
+        Replace a versioned record and return its new version.
+
+        Returns None if the record does not exist; raises VersionConflictError if
+        expected_version is given and the stored record has another version.
+        """
+        with self._lock:
+            old = self._tables[table].get(record['id'])
+            current = old['version'] if old is not None else None
+            if expected_version is not None and current != expected_version:
+                raise VersionConflictError(current)
+            if old is None:
+                return None
+            record['version'] = old['version'] + 1
+            self._write(table, record)
+            return record['version']
+
+    # Referential integrity
+    def _check_references(self, team_ids=(), course_ids=()):
+        """Raise IntegrityViolationError unless every given team and course exists."""
+        for table, kind, ids in (('teams', 'Team', team_ids), ('courses', 'Course', course_ids)):
+            for record_id in set(ids):
+                if record_id and not self._exists(table, record_id):
+                    raise IntegrityViolationError(f"{kind} '{record_id}' does not exist")
+
+    def _check_new(self, table: str, kind: str, ids: List[str]):
+        """Raise IntegrityViolationError if an id is already stored or given twice."""
+        seen = set()
+        for record_id in ids:
+            if record_id in seen or self._exists(table, record_id):
+                raise IntegrityViolationError(f"{kind} '{record_id}' already exists")
+            seen.add(record_id)
+
+    def _check_match_references(self, matches: List[Dict]):
+        """Check the teams, winners and courses of matches."""
+        self._check_references(
+            [match.get(key) for match in matches for key in ('team1Id', 'team2Id', 'winnerId')],
+            [match.get('courseId') for match in matches])
+
+    def _restrict(self, message: str, references: Dict[str, int]):
+        """Refuse a delete of a referenced record unless cascading."""
+        if self.integrity_mode == RESTRICT:
+            raise IntegrityViolationError(message, references)
+
+    @staticmethod
+    def _copy(table: str, record: Dict) -> Dict:
+        """Copy a record so callers cannot mutate stored state; cheaper than deepcopy."""
+        if table == 'courses':
+            return {**record, 'holes': [dict(hole) for hole in record['holes']]}
+        if table == 'players':
+            return {**record, 'history': [dict(entry) for entry in record['history']]}
+        if table == 'matches':
+            return {**record, 'scores': copy.deepcopy(record['scores'])} if record['scores'] \
+                else {**record, 'scores': []}
+        return dict(record)
+
+    def _get(self, table: str, record_id: str) -> Optional[Dict]:
+        """Get a copy of a single record."""
+        with self._lock:
+            record = self._tables[table].get(record_id)
+            return self._copy(table, record) if record is not None else None
+
+    def _all(self, table: str, ids=None) -> List[Dict]:
+        """Get copies of all records, or only those with the given ids."""
+        with self._lock:
+            rows = self._tables[table]
+            records = rows.values() if ids is None else (rows[record_id] for record_id in ids)
+            return [self._copy(table, record) for record in records]
+
+    def _exists(self, table: str, record_id: str) -> bool:
+        """Check whether a record exists."""
+        return record_id in self._tables[table]
+
+    # Record normalization mirrors the column sets of the SQL backends
+    @staticmethod
+    def _course_record(course_data: Dict) -> Dict:
+        return {
+            'id': course_data['id'],
+            'name': course_data['name'],
+            'holes': copy.deepcopy(course_data['holes'])
+        }
+
+    @staticmethod
+    def _team_record(team_data: Dict) -> Dict:
+        return {'id': team_data['id'], 'name': team_data['name'], 'day': team_data['day']}
+
+    @staticmethod
+    def _player_record(player_data: Dict) -> Dict:
+        return {
+            'id': player_data['id'],
+            'name': player_data['name'],
+            'teamId': player_data['teamId'],
+            'handicap': player_data['handicap'],
+            'history': copy.deepcopy(player_data.get('history', []))
+        }
+
+    @staticmethod
+    def _match_record(match_data: Dict) -> Dict:
+        record = {
+            'id': match_data['id'],
+            'date': match_data['date'],
+            'day': match_data['day'],
+            'team1Id': match_data['team1Id'],
+            'team2Id': match_data['team2Id'],
+            'completed': bool(match_data.get('completed')),
+            'scores': copy.deepcopy(match_data.get('scores', []))
+        }
+        if match_data.get('winnerId'):
+            record['winnerId'] = match_data['winnerId']
+        if match_data.get('score'):
+            record['score'] = match_data['score']
+        if match_data.get('courseId'):
+            record['courseId'] = match_data['courseId']
+        return record
+
+    # Course operations
+    def get_courses(self) -> List[Dict]:
+        """Get all courses."""
+        return self._all('courses')
+
+    def get_course(self, course_id: str) -> Optional[Dict]:
+        """Get a specific course by ID."""
+        return self._get('courses', course_id)
+
+    def create_course(self, course_data: Dict) -> Dict:
+        """Create a new course."""
+        with self._lock:
+            self._check_new('courses', 'Course', [course_data['id']])
+            self._write('courses', self._course_record(course_data))
+        return course_data
+
+    def update_course(self, course_id: str, course_data: Dict) -> Dict:
+        """Update an existing course."""
+        with self._lock:
+            if self._exists('courses', course_id):
+                self._write('courses', self._course_record({**course_data, 'id': course_id}))
+        return {**course_data, 'id': course_id}
+
+    def delete_course(self, course_id: str) -> bool:
+        """Delete a course, refusing or clearing it from its matches per integrity_mode."""
+        with self._lock:
+            matches = list(self._matches_by_course.get(course_id, ()))
+            if matches:
+                self._restrict(f"Course '{course_id}' is used by matches",
+                               {'matches': len(matches)})
+                for match_id in matches:
+                    self._clear_match_field(match_id, 'courseId')
+            return self._remove('courses', course_id)
+
+    # Team operations
+    def get_teams(self) -> List[Dict]:
+        """Get all teams."""
+        return self._all('teams')
+
+    def get_team(self, team_id: str) -> Optional[Dict]:
+        """Get a specific team by ID."""
+        return self._get('teams', team_id)
+
+    def get_teams_by_day(self, day: str) -> List[Dict]:
+        """Get the teams that play on the given day."""
+        with self._lock:
+            return self._all('teams', self._teams_by_day.get(day, ()))
+
+    def create_team(self, team_data: Dict) -> Dict:
+        """Create a new team."""
+        with self._lock:
+            self._check_new('teams', 'Team', [team_data['id']])
+            self._write('teams', self._team_record(team_data))
+        return team_data
+
+    def update_team(self, team_id: str, team_data: Dict) -> Dict:
+        """Update an existing team."""
+        with self._lock:
+            if self._exists('teams', team_id):
+                self._write('teams', self._team_record({**team_data, 'id': team_id}))
+        return {**team_data, 'id': team_id}
+
+    def delete_team(self, team_id: str) -> bool:
+        """Delete a team, refusing or deleting its players and matches per integrity_mode."""
+        with self._lock:
+            players = list(self._players_by_team.get(team_id, ()))
+            # As in the SQL backends, a match the team won references it even if it did not play
+            matches = list(self._matches_by_team.get(team_id, set()) |
+                           self._matches_by_winner.get(team_id, set()))
+            if players or matches:
+                self._restrict(f"Team '{team_id}' still has players or matches",
+                               {'players': len(players), 'matches': len(matches)})
+                for match_id in matches:
+                    self._remove('matches', match_id)
+                for player_id in players:
+                    self._remove('players', player_id)
+            return self._remove('teams', team_id)
+
+    # Player operations
+    def get_players(self) -> List[Dict]:
+        """Get all players."""
+        return self._all('players')
+
+    def get_player(self, player_id: str) -> Optional[Dict]:
+        """Get a specific player by ID."""
+        return self._get('players', player_id)
+
+    def get_players_by_team(self, team_id: str) -> List[Dict]:
+        """Get the players on the given team."""
+        with self._lock:
+            return self._all('players', self._players_by_team.get(team_id, ()))
+
+    def create_player(self, player_data: Dict) -> Dict:
+        """Create a new player."""
+        with self._lock:
+            self._check_new('players', 'Player', [player_data['id']])
+            self._check_references([player_data['teamId']])
+            self._write('players', self._player_record(player_data))
+        return {**player_data, 'version': 1}
+
+    def update_player(self, player_id: str, player_data: Dict,
+                      expected_version: Optional[int] = None) -> Dict:
+        """Update an existing player, optionally only if it still has expected_version."""
+        player = {**player_data, 'id': player_id}
+        with self._lock:
+            self._check_references([player['teamId']])
+            version = self._update_versioned('players', self._player_record(player),
+                                             expected_version)
+        return {**player, 'version': version}
+
+    def delete_player(self, player_id: str) -> bool:
+        """Delete a player."""
+        return self._remove('players', player_id)
+
+    # Match operations
+    def get_matches(self) -> List[Dict]:
+        """Get all matches."""
+        return self._all('matches')
+
+    def get_match(self, match_id: str) -> Optional[Dict]:
+        """Get a specific match by ID."""
+        return self._get('matches', match_id)
+
+    def get_matches_by_team(self, team_id: str) -> List[Dict]:
+        """Get the matches the given team plays in."""
+        with self._lock:
+            return self._all('matches', self._matches_by_team.get(team_id, ()))
+
+    def get_matches_by_day(self, day: str) -> List[Dict]:
+        """Get the matches played on the given day of the week."""
+        with self._lock:
+            return self._all('matches', self._matches_by_day.get(day, ()))
+
+    def get_matches_by_date(self, date: str) -> List[Dict]:
+        """Get the matches played on the given date."""
+        with self._lock:
+            return self._all('matches', self._matches_by_date.get(date, ()))
+
+    def create_match(self, match_data: Dict) -> Dict:
+        """Create a new match."""
+        with self._lock:
+            self._check_new('matches', 'Match', [match_data['id']])
+            self._check_match_references([match_data])
+            self._write('matches', self._match_record(match_data))
+        return {**match_data, 'version': 1}
+
+    def create_matches(self, matches: List[Dict]) -> List[Dict]:
+        """Create many matches under a single lock acquisition."""
+        with self._lock:
+            self._check_new('matches', 'Match', [match['id'] for match in matches])
+            self._check_match_references(matches)
+            for match in matches:
+                self._write('matches', self._match_record(match))
+        return matches
+
+    def update_match(self, match_id: str, match_data: Dict,
+                     expected_version: Optional[int] = None) -> Dict:
+        """Update an existing match, optionally only if it still has expected_version."""
+        match = {**match_data, 'id': match_id}
+        with self._lock:
+            self._check_match_references([match])
+            version = self._update_versioned('matches', self._match_record(match),
+                                             expected_version)
+        return {**match, 'version': version}
+
+    def delete_match(self, match_id: str) -> bool:
+        """Delete a match."""
+        return self._remove('matches', match_id)
+
+    def delete_matches(self, match_ids: List[str]) -> int:
+        """Delete many matches under a single lock acquisition."""
+        with self._lock:
+            return sum(1 for match_id in match_ids if self._remove('matches', match_id))
+
+    def apply_hole_scores(self, updates: Dict[str, Dict[str, Dict[str, Optional[int]]]],
+                          expected_versions: Optional[Dict[str, int]] = None) -> int:
+        """Merge hole scores into many matches under a single lock acquisition."""
+        updated = 0
+        with self._lock:
+            matches_table = self._tables['matches']
+            # Check every version first so a conflict leaves all matches untouched
+            for match_id, expected in (expected_versions or {}).items():
+                match = matches_table.get(match_id)
+                current = match['version'] if match is not None else None
+                if match_id in updates and current != expected:
+                    raise VersionConflictError(current)
+            for match_id, match_updates in updates.items():
+                match = matches_table.get(match_id)
+                if match is None:
+                    continue
+                scores = merge_hole_scores(match['scores'], match_updates)
+                self._write('matches', {**match, 'scores': scores,
+                                        'version': match['version'] + 1})
+                updated += 1
+        return updated
+
+    # Statistics operations
+    def get_player_stats(self, player_id: str) -> Optional[Dict]:
+        """Get the precomputed statistics for a player."""
+        with self._lock:
+            stats = self._player_stats.get(player_id)
+            return dict(stats) if stats is not None else None
+
+    def get_leaderboard(self, metric: str, limit: int) -> List[Dict]:
+        """Get the top players for a metric without sorting every player."""
+        key, _, direction = LEADERBOARD_METRICS[metric]
+        sign = 1 if direction == 'ASC' else -1
+        with self._lock:
+            candidates = [stats for stats in self._player_stats.values() if stats[key] is not None]
+            top = heapq.nsmallest(limit, candidates,
+                                  key=lambda stats: (sign * stats[key], stats['playerId']))
+            return [dict(stats) for stats in top]
+
+    def rebuild_player_stats(self) -> int:
+        """Recompute statistics for every player and return the number of players."""
+        with self._lock:
+            self._player_stats = {player_id: compute_player_stats(player)
+                                  for player_id, player in self._tables['players'].items()}
+            return len(self._player_stats)
+
+    # Team record operations
+    def _store_team_records(self, old_matches: Iterable[Optional[Dict]],
+                            new_matches: Iterable[Dict]):
+        """Swap the record totals of old_matches for those of new_matches."""
+        h2h, seasons = record_deltas(old_matches, new_matches)
+        for records, deltas in ((self._team_h2h, h2h), (self._team_seasons, seasons)):
+            for (team_id, *parts), delta in deltas.items():
+                key = parts[0] if len(parts) == 1 else tuple(parts)
+                # Head-to-head records are keyed by opponent id, season records by (season, day)
+                team: Dict[Any, List] = records.setdefault(team_id, {})
+                totals = team.setdefault(key, [0] * len(delta))
+                for index, value in enumerate(delta):
+                    totals[index] += value
+                if totals[0] <= 0:
+                    del team[key]
+                    if not team:
+                        del records[team_id]
+
+    def get_team_h2h(self, team_id: str, opponent_id: Optional[str] = None) -> List[Dict]:
+        """Get a team's records against each opponent."""
+        with self._lock:
+            opponents = self._team_h2h.get(team_id, {})
+            keys = sorted(opponents) if opponent_id is None else \
+                [opponent_id] if opponent_id in opponents else []
+            return [to_record(opponents[key], teamId=team_id, opponentId=key) for key in keys]
+
+    def get_team_seasons(self, team_id: str) -> List[Dict]:
+        """Get a team's records per season and day."""
+        with self._lock:
+            seasons = self._team_seasons.get(team_id, {})
+            return [to_record(seasons[key], teamId=team_id, season=key[0], day=key[1])
+                    for key in sorted(seasons)]
+
+    def get_standings(self, season: str, day: Optional[str] = None) -> List[Dict]:
+        """Get the season records of every team, best first."""
+        with self._lock:
+            records = [to_record(totals, teamId=team_id, season=key[0], day=key[1])
+                       for team_id, seasons in self._team_seasons.items()
+                       for key, totals in seasons.items()
+                       if key[0] == season and (day is None or key[1] == day)]
+        return standings_order(records)
+
+    def rebuild_team_records(self) -> int:
+        """Recompute the team records from every match and return the completed matches."""
+        with self._lock:
+            self._team_h2h, self._team_seasons = {}, {}
+            matches = self._tables['matches'].values()
+            self._store_team_records([], matches)
+            return sum(1 for match in matches if match.get('completed'))
+
+    # Search operations
+    def search(self, query: str, limit: int) -> List[Dict]:
+        """
+        Find players, teams and courses by name prefix through the sorted token index.
+
+        Scans the token range of the longest term, whose shortest tokens sort first, and stops
+        once enough candidates match every term, so short prefixes stay cheap.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        anchor = max(terms, key=len)
+        wanted = limit * CANDIDATE_FACTOR
+        candidates: List[tuple] = []
+        seen = set()
+        with self._lock:
+            tokens = self._search_tokens
+            index = bisect.bisect_left(tokens, (anchor,))
+            while index < len(tokens) and len(candidates) < wanted:
+                token, entity, record_id = tokens[index]
+                index += 1
+                if not token.startswith(anchor):
+                    break
+                if (entity, record_id) in seen:
+                    continue
+                seen.add((entity, record_id))
+                name, team_id = self._search_names[(entity, record_id)]
+                if len(terms) == 1 or matches(terms, tokenize(name)):
+                    candidates.append((entity, record_id, name, team_id))
+        return rank_results(terms, candidates, limit)
+
+    def rebuild_search_index(self) -> int:
+        """Rebuild the name search index from the stored records."""
+        with self._lock:
+            self._search_names = {}
+            tokens: List[tuple] = []
+            for table, entity in SEARCH_ENTITIES.items():
+                for record in self._tables[table].values():
+                    self._search_names[(entity, record['id'])] = (record['name'],
+                                                                  record.get('teamId'))
+                    tokens.extend((token, entity, record['id'])
+                                  for token in set(tokenize(record['name'])))
+            tokens.sort()
+            self._search_tokens = tokens
+            return len(self._search_names)
+
+    # Bulk transfer
+    def export_records(self, table: str, batch_size: int) -> Iterator[List[Dict]]:
+        """Yield copies of a table's records in id order, taking the lock once per batch."""
+        with self._lock:
+            ids = sorted(self._tables[table])
+        for start in range(0, len(ids), batch_size):
+            with self._lock:
+                rows = self._tables[table]
+                batch = [self._copy(table, rows[record_id])
+                         for record_id in ids[start:start + batch_size] if record_id in rows]
+            if batch:
+                yield batch
+
+    def import_records(self, table: str, records: List[Dict]) -> int:
+        """Store a batch of records and merge their names into the search index in one sort."""
+        normalize = {'courses': self._course_record, 'teams': self._team_record,
+                     'players': self._player_record, 'matches': self._match_record}[table]
+        with self._lock:
+            self._search_deferred = True
+            try:
+                stored = [normalize(record) for record in records]
+                for record in stored:
+                    self._write_loaded(table, record)
+            finally:
+                self._search_deferred = False
+            entity = SEARCH_ENTITIES.get(table)
+            if entity:
+                tokens: List[tuple] = []
+                for record in stored:
+                    key = (entity, record['id'])
+                    if key in self._search_names:
+                        self._unindex_search(*key)
+                    self._search_names[key] = (record['name'], record.get('teamId'))
+                    tokens.extend((token, entity, record['id'])
+                                  for token in set(tokenize(record['name'])))
+                # Sorting the existing run plus the new tokens is a single merge pass
+                self._search_tokens.extend(tokens)
+                self._search_tokens.sort()
+        return len(records)
+
+    # Journal
+    def get_history(self, table: str, record_id: str) -> List[Dict]:
+        """Get copies of a record's journal entries."""
+        with self._lock:
+            return [journal.to_entry(seq, at, actor, op,
+                                     self._copy(table, record) if record is not None else None)
+                    for at, seq, actor, op, record in self._journal.get((table, record_id), ())]
+
+    def get_as_of(self, table: str, record_id: str, at: float) -> Optional[Dict]:
+        """Get a copy of a record as of a time, bisecting its journal entries."""
+        with self._lock:
+            entries = self._journal.get((table, record_id), [])
+            index = bisect.bisect_right(entries, (at, float('inf')))
+            record = entries[index - 1][4] if index else None
+            return self._copy(table, record) if record is not None else None
+
+    def compact_journal(self, before: float, limit: int) -> int:
+        """Drop journal entries hidden by later ones before the cutoff, and log the compaction."""
+        with self._lock:
+            removed = self._compact_journal(before, limit)
+            if removed:
+                self._append_log({'op': 'compact', 'before': before, 'limit': limit})
+            return removed
+
+    def _compact_journal(self, before: float, limit: int) -> int:
+        """Drop up to limit hidden journal entries, each record's earliest first."""
+        removed = 0
+        with self._lock:
+            for key in list(self._journal):
+                if removed >= limit:
+                    break
+                entries = self._journal[key]
+                cut = bisect.bisect_left(entries, (before,))
+                if not cut:
+                    continue
+                # Keep the last entry before the cutoff unless it is a deletion
+                hidden = cut - 1 if entries[cut - 1][3] == journal.PUT else cut
+                dropped = min(hidden, limit - removed)
+                del entries[:dropped]
+                removed += dropped
+                if not entries:
+                    del self._journal[key]
+        return removed
+
+    # Maintenance
+    def _clear_match_field(self, match_id: str, field: str):
+        """Remove an optional reference from a match as a new version."""
+        match = self._tables['matches'][match_id]
+        record = {key: value for key, value in match.items() if key != field}
+        record['version'] = match['version'] + 1
+        self._write('matches', record)
+
+    def purge_orphans(self, limit: int) -> Dict[str, int]:
+        """Repair one batch of orphaned players and matches under a single lock acquisition."""
+        with self._lock:
+            teams, courses = self._tables['teams'], self._tables['courses']
+            matches = self._tables['matches'].values()
+            players = [player['id'] for player in self._tables['players'].values()
+                       if player['teamId'] not in teams][:limit]
+            orphans = [match['id'] for match in matches
+                       if match['team1Id'] not in teams or match['team2Id'] not in teams][:limit]
+            for player_id in players:
+                self._remove('players', player_id)
+            for match_id in orphans:
+                self._remove('matches', match_id)
+            # Matches about to be deleted in a later batch are not worth repairing first
+            if len(orphans) == limit:
+                return {'players': len(players), 'matches': len(orphans), 'winners': 0,
+                        'courses': 0}
+            winners = [match['id'] for match in matches
+                       if match.get('winnerId') and match['winnerId'] not in teams][:limit]
+            for match_id in winners:
+                self._clear_match_field(match_id, 'winnerId')
+            missing = [match_id for course_id, ids in self._matches_by_course.items()
+                       if course_id not in courses for match_id in ids][:limit]
+            for match_id in missing:
+                self._clear_match_field(match_id, 'courseId')
+            return {'players': len(players), 'matches': len(orphans), 'winners': len(winners),
+                    'courses': len(missing)}
+
+    def optimize(self, force: bool = False) -> Dict:
+        """Write a fresh snapshot so the write log is truncated, if there is one to truncate."""
+        with self._lock:
+            compacted = self._log is not None and (force or self._writes_since_snapshot > 0)
+            if compacted:
+                self.snapshot()
+            return {'snapshotWritten': compacted}
+
+    # Initialization
+    def initialize_data(self, data: Dict) -> bool:
+        """Initialize the storage with seed data."""
+        try:
+            with self._lock:
+                self._search_deferred = True
+                try:
+                    for course in data.get('courses', []):
+                        self._write_loaded('courses', self._course_record(course))
+                    for team in data.get('teams', []):
+                        self._write_loaded('teams', self._team_record(team))
+                    for player in data.get('players', []):
+                        self._write_loaded('players', self._player_record(player))
+                    for match in data.get('matches', []):
+                        self._write_loaded('matches', self._match_record(match))
+                finally:
+                    self._search_deferred = False
+                    self.rebuild_search_index()
+            return True
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            print(f"Error initializing data: {e}")
+            return False
+
+    def is_initialized(self) -> bool:
+        """Check if the storage has been initialized with data."""
+        return len(self._tables['players']) > 0
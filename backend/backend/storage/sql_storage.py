@@ -0,0 +1,834 @@
+"""
+Shared data-access layer for the SQL storage backends.
+Implements the storage interface on top of per-thread persistent connections, precomputed
+statements and positional row decoders. Backends supply connection handling and schema DDL.
+"""
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Dict, Optional, Type
+from backend.services.scoring import merge_hole_scores
+from backend.services.search import CANDIDATE_FACTOR, rank_results, tokenize
+from backend.services.stats import LEADERBOARD_METRICS, compute_player_stats
+from backend.services.team_records import record_deltas, standings_order
+from backend.storage import deadline, journal
+from backend.storage.base import (
+    RESTRICT, IntegrityViolationError, StorageInterface, StorageTimeoutError,
+    VersionConflictError, check_integrity_mode
+)
+from backend.storage.statements import (
+    Statements, course_params, team_params, player_params, match_params, player_stats_params,
+    record_params, update_params, row_to_course, row_to_team, row_to_player, row_to_match,
+    row_to_player_stats, row_to_match_result, row_to_team_h2h, row_to_team_season
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever _init_database changes so existing databases run it once more
+SCHEMA_VERSION = 8
+# Tables whose rows end with a version column
+VERSIONED_TABLES = ('players', 'matches')
+
+
+class SQLStorage(StorageInterface):
+    """Base class for storage backends that speak SQL through a DB-API driver."""
+
+    sql: Statements
+    # Base class of the driver's exceptions
+    driver_error: Type[Exception]
+
+    def __init__(self, integrity_mode: str = RESTRICT):
+        """Initialize per-thread connection tracking; the schema is checked on first use."""
+        self.integrity_mode = check_integrity_mode(integrity_mode)
+        self._local = threading.local()
+        self._connections: List = []
+        # Per-thread state (the connection and whatever backends keep with it) handed back by
+        # threads that no longer need it
+        self._idle: List[Dict] = []
+        self._connections_lock = threading.Lock()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    # Backend hooks
+    def _connect(self):
+        """Open a new database connection."""
+        raise NotImplementedError
+
+    def _execute(self, conn, sql: str, params=()):
+        """Execute a statement on the connection and return a cursor holding its result."""
+        raise NotImplementedError
+
+    def _executemany(self, conn, sql: str, rows: List[tuple]):
+        """Execute a statement once per parameter tuple."""
+        raise NotImplementedError
+
+    def _begin(self, conn):
+        """Start an explicit transaction if the driver needs one."""
+        pass
+
+    def _timed_out(self, error: Exception) -> bool:
+        """Whether a driver error means a statement was stopped by its deadline or a lock wait."""
+        return False
+
+    def _init_database(self):
+        """Create or migrate the schema; must be idempotent."""
+        raise NotImplementedError
+
+    def _schema_version(self, conn) -> int:
+        """Get the schema version recorded in the database, 0 if none."""
+        raise NotImplementedError
+
+    def _set_schema_version(self, conn, version: int):
+        """Record the schema version in the database."""
+        raise NotImplementedError
+
+    # Connection management
+    def _get_connection(self):
+        """Get this thread's connection, reusing a released one or opening one on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            with self._connections_lock:
+                state = self._idle.pop() if self._idle else None
+            if state is not None:
+                vars(self._local).update(state)
+                return state['conn']
+            conn = self._connect()
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+            if not self._schema_ready:
+                try:
+                    self._ensure_schema()
+                except Exception:
+                    # Retry with a fresh connection on the next call
+                    self._discard_connection()
+                    raise
+        return conn
+
+    def _ensure_schema(self):
+        """
+        Run the schema DDL once per database rather than on every start.
+
+        Called with this thread's new connection in place. A database already at
+        SCHEMA_VERSION costs a single version lookup.
+        """
+        # Migrations can take longer than any request, and must not be cut off halfway
+        with self._schema_lock, deadline.no_deadline():
+            if self._schema_ready:
+                return
+            conn = self._get_connection()
+            if self._schema_version(conn) != SCHEMA_VERSION:
+                self._init_database()
+                self._set_schema_version(conn, SCHEMA_VERSION)
+            self._schema_ready = True
+
+    def _discard_connection(self):
+        """Forget this thread's connection, e.g. after the server dropped it."""
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            with self._connections_lock:
+                if conn in self._connections:
+                    self._connections.remove(conn)
+            self._close_connection(conn)
+
+    def release_connection(self):
+        """
+        Hand this thread's connection to the next thread that needs one.
+
+        Servers that run each request on a new thread call this as the request ends, so that
+        connections are reused instead of staying open for threads that are gone.
+        """
+        state = vars(self._local)
+        conn = state.get('conn')
+        if conn is None:
+            return
+        released = dict(state)
+        state.clear()
+        with self._connections_lock:
+            # Not if close() has run since the connection was opened
+            if conn in self._connections:
+                self._idle.append(released)
+
+    def close(self):
+        """Close every connection opened by this storage instance."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._idle = []
+        for conn in connections:
+            self._close_connection(conn)
+        self._local = threading.local()
+
+    def _close_connection(self, conn):
+        """Close a connection; one the server has already dropped may fail to close."""
+        try:
+            conn.close()
+        except self.driver_error as e:
+            logger.warning('Error closing a database connection: %s', e)
+
+    def _fetchall(self, sql: str, params=()) -> List[tuple]:
+        """Run a query and return all rows as tuples."""
+        deadline.check()
+        try:
+            return self._execute(self._get_connection(), sql, params).fetchall()
+        except Exception as e:
+            if self._timed_out(e):
+                raise StorageTimeoutError(f'Query stopped: {e}') from e
+            raise
+
+    def _fetchone(self, sql: str, params=()) -> Optional[tuple]:
+        """Run a query and return its first row, or None."""
+        rows = self._fetchall(sql, params)
+        return rows[0] if rows else None
+
+    @contextmanager
+    def _transaction(self):
+        """Yield this thread's connection inside a transaction that commits on success."""
+        deadline.check()
+        conn = self._get_connection()
+        self._begin(conn)
+        try:
+            yield conn
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            if self._timed_out(e):
+                raise StorageTimeoutError(f'Write stopped: {e}') from e
+            raise
+
+    def _atomic(self, write):
+        """
+        Run write(conn) in its own transaction and return its result.
+
+        All writes go through here, so a backend can route them elsewhere, e.g. to a
+        dedicated writer thread.
+        """
+        with self._transaction() as conn:
+            return write(conn)
+
+    def _write(self, sql: str, params=()) -> int:
+        """Execute a single write statement in its own transaction and return the row count."""
+        return self._atomic(lambda conn: self._execute(conn, sql, params).rowcount)
+
+    def _update_versioned(self, conn, statements, params: tuple,
+                          expected_version: Optional[int]) -> Optional[int]:
+        """
+        Update a versioned row inside the caller's transaction and return its new version.
+
+        params are update parameters (id last). Returns None if an unconditional update finds
+        no row; a conditional one raises VersionConflictError unless the row still has
+        expected_version.
+        """
+        if expected_version is None:
+            if self._execute(conn, statements.update, params).rowcount == 0:
+                return None
+            return self._execute(conn, statements.select_version, params[-1:]).fetchall()[0][0]
+        if self._execute(conn, statements.update_if_version,
+                         params + (expected_version,)).rowcount == 0:
+            rows = self._execute(conn, statements.select_version, params[-1:]).fetchall()
+            raise VersionConflictError(rows[0][0] if rows else None)
+        return expected_version + 1
+
+    # Writes of named records, which keep the search index in the same transaction
+    def _create_named(self, table: str, entity: str, statements, params: tuple, name: str,
+                      team_id=None):
+        """Insert a row whose first parameter is its id, index its name and journal it."""
+        def write(conn):
+            self._execute(conn, statements.insert, params)
+            self._index_search(conn, entity, params[0], name, team_id)
+            self._journal(conn, table, [params])
+        self._atomic(write)
+
+    def _update_named(self, table: str, entity: str, statements, params: tuple, name: str,
+                      team_id=None):
+        """Update a row whose first parameter is its id, reindexing and journalling it."""
+        def write(conn):
+            if self._execute(conn, statements.update, update_params(params)).rowcount > 0:
+                self._index_search(conn, entity, params[0], name, team_id)
+                self._journal(conn, table, [params])
+        self._atomic(write)
+
+    # Journal, written in the caller's transaction
+    def _journal(self, conn, table: str, rows: List[tuple]):
+        """Journal the new rows of records, in column order with the version if versioned."""
+        if rows:
+            at, actor = journal.now(), journal.current_actor()
+            self._executemany(conn, self.sql.journal.insert,
+                              [(at, actor, table, row[0], journal.PUT, journal.encode_row(row))
+                               for row in rows])
+
+    def _journal_stored(self, conn, table: str, record_ids: List[str]):
+        """Journal records changed in place by reading back their rows."""
+        select = self._bulk_table(table)[0].select_one
+        self._journal(conn, table, [row for record_id in record_ids
+                                    for row in self._execute(conn, select,
+                                                             (record_id,)).fetchall()])
+
+    def _journal_deletes(self, conn, table: str, record_ids: List[str]):
+        """Journal the deletion of records."""
+        if record_ids:
+            at, actor = journal.now(), journal.current_actor()
+            self._executemany(conn, self.sql.journal.insert,
+                              [(at, actor, table, record_id, journal.DELETE, None)
+                               for record_id in record_ids])
+
+    # Referential integrity
+    def _ids(self, conn, sql: str, params: tuple) -> List[str]:
+        """Run a query selecting ids inside the caller's transaction."""
+        return [row[0] for row in self._execute(conn, sql, params).fetchall()]
+
+    def _check_references(self, conn, team_ids=(), course_ids=()):
+        """Raise IntegrityViolationError unless every given team and course exists."""
+        for statement, kind, ids in ((self.sql.team_exists, 'Team', team_ids),
+                                     (self.sql.course_exists, 'Course', course_ids)):
+            for record_id in set(ids):
+                if record_id and not self._execute(conn, statement, (record_id,)).fetchall():
+                    raise IntegrityViolationError(f"{kind} '{record_id}' does not exist")
+
+    def _check_match_references(self, conn, matches: List[Dict]):
+        """Check the teams, winners and courses of matches, each distinct id once."""
+        self._check_references(
+            conn, [match.get(key) for match in matches for key in ('team1Id', 'team2Id',
+                                                                    'winnerId')],
+            [match.get('courseId') for match in matches])
+
+    def _restrict(self, message: str, references: Dict[str, int]):
+        """Refuse a delete of a referenced record unless cascading."""
+        if self.integrity_mode == RESTRICT:
+            raise IntegrityViolationError(message, references)
+
+    def _delete_player_rows(self, conn, player_ids: List[str]) -> int:
+        """Delete players with their statistics and search entries in the caller's transaction."""
+        deleted = []
+        for player_id in player_ids:
+            self._execute(conn, self.sql.player_stats.delete, (player_id,))
+            self._unindex_search(conn, 'player', player_id)
+            if self._execute(conn, self.sql.players.delete, (player_id,)).rowcount:
+                deleted.append(player_id)
+        self._journal_deletes(conn, 'players', deleted)
+        return len(deleted)
+
+    def _delete_match_rows(self, conn, match_ids: List[str]) -> int:
+        """Delete matches and their team record totals in the caller's transaction."""
+        old = self._match_results(conn, match_ids)
+        deleted = [match_id for match_id in match_ids
+                   if self._execute(conn, self.sql.matches.delete, (match_id,)).rowcount]
+        self._store_team_records(conn, old, [])
+        self._journal_deletes(conn, 'matches', deleted)
+        return len(deleted)
+
+    # Course operations
+    def get_courses(self) -> List[Dict]:
+        """Get all courses."""
+        return [row_to_course(row) for row in self._fetchall(self.sql.courses.select_all)]
+
+    def get_course(self, course_id: str) -> Optional[Dict]:
+        """Get a specific course by ID."""
+        row = self._fetchone(self.sql.courses.select_one, (course_id,))
+        return row_to_course(row) if row else None
+
+    def create_course(self, course_data: Dict) -> Dict:
+        """Create a new course."""
+        self._create_named('courses', 'course', self.sql.courses, course_params(course_data),
+                           course_data['name'])
+        return course_data
+
+    def update_course(self, course_id: str, course_data: Dict) -> Dict:
+        """Update an existing course."""
+        params = course_params({**course_data, 'id': course_id})
+        self._update_named('courses', 'course', self.sql.courses, params, course_data['name'])
+        return {**course_data, 'id': course_id}
+
+    def delete_course(self, course_id: str) -> bool:
+        """Delete a course, refusing or clearing it from its matches per integrity_mode."""
+        def write(conn):
+            matches = self._ids(conn, self.sql.select_course_match_ids, (course_id,))
+            if matches:
+                self._restrict(f"Course '{course_id}' is used by matches",
+                               {'matches': len(matches)})
+                self._executemany(conn, self.sql.clear_match_course,
+                                  [(match_id,) for match_id in matches])
+                self._journal_stored(conn, 'matches', matches)
+            self._unindex_search(conn, 'course', course_id)
+            deleted = self._execute(conn, self.sql.courses.delete, (course_id,)).rowcount > 0
+            if deleted:
+                self._journal_deletes(conn, 'courses', [course_id])
+            return deleted
+        return self._atomic(write)
+
+    # Team operations
+    def get_teams(self) -> List[Dict]:
+        """Get all teams."""
+        return [row_to_team(row) for row in self._fetchall(self.sql.teams.select_all)]
+
+    def get_team(self, team_id: str) -> Optional[Dict]:
+        """Get a specific team by ID."""
+        row = self._fetchone(self.sql.teams.select_one, (team_id,))
+        return row_to_team(row) if row else None
+
+    def create_team(self, team_data: Dict) -> Dict:
+        """Create a new team."""
+        self._create_named('teams', 'team', self.sql.teams, team_params(team_data),
+                           team_data['name'])
+        return team_data
+
+    def update_team(self, team_id: str, team_data: Dict) -> Dict:
+        """Update an existing team."""
+        params = team_params({**team_data, 'id': team_id})
+        self._update_named('teams', 'team', self.sql.teams, params, team_data['name'])
+        return {**team_data, 'id': team_id}
+
+    def delete_team(self, team_id: str) -> bool:
+        """Delete a team, refusing or deleting its players and matches per integrity_mode."""
+        def write(conn):
+            players = self._ids(conn, self.sql.select_team_player_ids, (team_id,))
+            matches = self._ids(conn, self.sql.select_team_match_ids, (team_id,) * 3)
+            if players or matches:
+                self._restrict(f"Team '{team_id}' still has players or matches",
+                               {'players': len(players), 'matches': len(matches)})
+                self._delete_match_rows(conn, matches)
+                self._delete_player_rows(conn, players)
+            self._unindex_search(conn, 'team', team_id)
+            deleted = self._execute(conn, self.sql.teams.delete, (team_id,)).rowcount > 0
+            if deleted:
+                self._journal_deletes(conn, 'teams', [team_id])
+            return deleted
+        return self._atomic(write)
+
+    # Player operations
+    def get_players(self) -> List[Dict]:
+        """Get all players."""
+        return [row_to_player(row) for row in self._fetchall(self.sql.players.select_all)]
+
+    def get_player(self, player_id: str) -> Optional[Dict]:
+        """Get a specific player by ID."""
+        row = self._fetchone(self.sql.players.select_one, (player_id,))
+        return row_to_player(row) if row else None
+
+    def get_players_by_team(self, team_id: str) -> List[Dict]:
+        """Get the players on a team through the team_id index."""
+        rows = self._fetchall(self.sql.select_players_by_team, (team_id,))
+        return [row_to_player(row) for row in rows]
+
+    def create_player(self, player_data: Dict) -> Dict:
+        """Create a new player and its statistics."""
+        row = player_params(player_data)
+
+        def write(conn):
+            self._check_references(conn, [player_data['teamId']])
+            self._execute(conn, self.sql.players.insert, row)
+            self._store_player_stats(conn, player_data)
+            self._index_search(conn, 'player', player_data['id'], player_data['name'],
+                               player_data['teamId'])
+            self._journal(conn, 'players', [row + (1,)])
+        self._atomic(write)
+        return {**player_data, 'version': 1}
+
+    def update_player(self, player_id: str, player_data: Dict,
+                      expected_version: Optional[int] = None) -> Dict:
+        """Update an existing player, optionally only at a version, and refresh its statistics."""
+        player = {**player_data, 'id': player_id}
+        row = player_params(player)
+
+        def write(conn):
+            self._check_references(conn, [player['teamId']])
+            version = self._update_versioned(conn, self.sql.players, update_params(row),
+                                             expected_version)
+            if version is not None:
+                self._store_player_stats(conn, player)
+                self._index_search(conn, 'player', player_id, player['name'], player['teamId'])
+                self._journal(conn, 'players', [row + (version,)])
+            return version
+        version = self._atomic(write)
+        return {**player, 'version': version}
+
+    def delete_player(self, player_id: str) -> bool:
+        """Delete a player and its statistics."""
+        return self._atomic(lambda conn: self._delete_player_rows(conn, [player_id])) > 0
+
+    # Match operations
+    def get_matches(self) -> List[Dict]:
+        """Get all matches."""
+        return [row_to_match(row) for row in self._fetchall(self.sql.matches.select_all)]
+
+    def get_match(self, match_id: str) -> Optional[Dict]:
+        """Get a specific match by ID."""
+        row = self._fetchone(self.sql.matches.select_one, (match_id,))
+        return row_to_match(row) if row else None
+
+    def get_matches_by_date(self, date: str) -> List[Dict]:
+        """Get the matches played on a date through the date index."""
+        rows = self._fetchall(self.sql.select_matches_by_date, (date,))
+        return [row_to_match(row) for row in rows]
+
+    def create_match(self, match_data: Dict) -> Dict:
+        """Create a new match and add it to the team records."""
+        row = match_params(match_data)
+
+        def write(conn):
+            self._check_match_references(conn, [match_data])
+            self._execute(conn, self.sql.matches.insert, row)
+            self._store_team_records(conn, [], [match_data])
+            self._journal(conn, 'matches', [row + (1,)])
+        self._atomic(write)
+        return {**match_data, 'version': 1}
+
+    def create_matches(self, matches: List[Dict]) -> List[Dict]:
+        """Create many matches in a single bulk insert."""
+        if matches:
+            rows = [match_params(match) for match in matches]
+
+            def write(conn):
+                self._check_match_references(conn, matches)
+                self._executemany(conn, self.sql.matches.insert, rows)
+                self._store_team_records(conn, [], matches)
+                self._journal(conn, 'matches', [row + (1,) for row in rows])
+            self._atomic(write)
+        return matches
+
+    def update_match(self, match_id: str, match_data: Dict,
+                     expected_version: Optional[int] = None) -> Dict:
+        """Update an existing match, optionally only if it still has expected_version."""
+        match = {**match_data, 'id': match_id}
+        row = match_params(match)
+
+        def write(conn):
+            self._check_match_references(conn, [match])
+            old = self._match_results(conn, [match_id])
+            version = self._update_versioned(conn, self.sql.matches, update_params(row),
+                                             expected_version)
+            if version is not None:
+                self._store_team_records(conn, old, [match])
+                self._journal(conn, 'matches', [row + (version,)])
+            return version
+        version = self._atomic(write)
+        return {**match, 'version': version}
+
+    def delete_match(self, match_id: str) -> bool:
+        """Delete a match."""
+        return self.delete_matches([match_id]) > 0
+
+    def delete_matches(self, match_ids: List[str]) -> int:
+        """Delete many matches in one transaction and return how many were deleted."""
+        return self._atomic(lambda conn: self._delete_match_rows(conn, match_ids))
+
+    def apply_hole_scores(self, updates: Dict[str, Dict[str, Dict[str, Optional[int]]]],
+                          expected_versions: Optional[Dict[str, int]] = None) -> int:
+        """Merge hole scores into many matches in one transaction, rewriting each card once."""
+        expected_versions = expected_versions or {}
+
+        def write(conn):
+            updated = []
+            for match_id, match_updates in updates.items():
+                rows = self._execute(conn, self.sql.select_match_scores, (match_id,)).fetchall()
+                expected = expected_versions.get(match_id)
+                if expected is not None and (not rows or rows[0][1] != expected):
+                    raise VersionConflictError(rows[0][1] if rows else None)
+                if not rows:
+                    continue
+                cards = merge_hole_scores(json.loads(rows[0][0]) if rows[0][0] else [],
+                                          match_updates)
+                self._execute(conn, self.sql.update_match_scores, (json.dumps(cards), match_id))
+                updated.append(match_id)
+            self._journal_stored(conn, 'matches', updated)
+            return len(updated)
+        return self._atomic(write)
+
+    # Statistics operations
+    def _store_player_stats(self, conn, player: Dict):
+        """Recompute and store one player's statistics inside the caller's transaction."""
+        self._execute(conn, self.sql.player_stats.upsert,
+                      player_stats_params(compute_player_stats(player)))
+
+    def get_player_stats(self, player_id: str) -> Optional[Dict]:
+        """Get the precomputed statistics for a player."""
+        row = self._fetchone(self.sql.player_stats.select_one, (player_id,))
+        return row_to_player_stats(row) if row else None
+
+    def get_leaderboard(self, metric: str, limit: int) -> List[Dict]:
+        """Get the top players for a metric using the index on its column."""
+        _, column, direction = LEADERBOARD_METRICS[metric]
+        rows = self._fetchall(self.sql.leaderboard(column, direction), (limit,))
+        return [row_to_player_stats(row) for row in rows]
+
+    def rebuild_player_stats(self) -> int:
+        """Recompute statistics for every player and return the number of players."""
+        rows = [player_stats_params(compute_player_stats(row_to_player(row)))
+                for row in self._fetchall(self.sql.players.select_all)]
+        def write(conn):
+            self._execute(conn, self.sql.clear_player_stats)
+            if rows:
+                self._executemany(conn, self.sql.player_stats.upsert, rows)
+        self._atomic(write)
+        return len(rows)
+
+    def _backfill_player_stats(self):
+        """Recompute statistics on a schema upgrade, in case the rules deriving them changed."""
+        if self._fetchone(self.sql.count_players)[0]:
+            self.rebuild_player_stats()
+
+    # Team record operations
+    def _match_results(self, conn, match_ids: List[str]) -> List[Dict]:
+        """Read the result fields of the existing matches among match_ids, locking their rows."""
+        results = []
+        for match_id in match_ids:
+            rows = self._execute(conn, self.sql.select_match_result, (match_id,)).fetchall()
+            if rows:
+                results.append(row_to_match_result(rows[0]))
+        return results
+
+    def _store_team_records(self, conn, old_matches: List[Dict], new_matches: List[Dict]):
+        """Swap the record totals of old_matches for new_matches in the caller's transaction."""
+        h2h, seasons = record_deltas(old_matches, new_matches)
+        for statements, deltas in ((self.sql.team_h2h, h2h), (self.sql.team_seasons, seasons)):
+            if not deltas:
+                continue
+            self._executemany(conn, statements.add,
+                              [record_params(key, delta) for key, delta in deltas.items()])
+            emptied = [key for key, delta in deltas.items() if delta[0] < 0]
+            if emptied:
+                self._executemany(conn, statements.delete_empty, emptied)
+
+    def get_team_h2h(self, team_id: str, opponent_id: Optional[str] = None) -> List[Dict]:
+        """Get a team's records against each opponent through the primary key."""
+        if opponent_id is None:
+            rows = self._fetchall(self.sql.team_h2h.select_by_team, (team_id,))
+        else:
+            rows = self._fetchall(self.sql.team_h2h.select_one, (team_id, opponent_id))
+        return [row_to_team_h2h(row) for row in rows]
+
+    def get_team_seasons(self, team_id: str) -> List[Dict]:
+        """Get a team's records per season and day through the primary key."""
+        rows = self._fetchall(self.sql.team_seasons.select_by_team, (team_id,))
+        return [row_to_team_season(row) for row in rows]
+
+    def get_standings(self, season: str, day: Optional[str] = None) -> List[Dict]:
+        """Get the season records of every team through the season index, best first."""
+        if day is None:
+            rows = self._fetchall(self.sql.select_standings, (season,))
+        else:
+            rows = self._fetchall(self.sql.select_standings_by_day, (season, day))
+        return standings_order([row_to_team_season(row) for row in rows])
+
+    def rebuild_team_records(self) -> int:
+        """Recompute the team records from every match and return the completed matches."""
+        matches = [row_to_match_result(row)
+                   for row in self._fetchall(self.sql.select_match_results)]
+
+        def write(conn):
+            self._execute(conn, self.sql.team_h2h.clear)
+            self._execute(conn, self.sql.team_seasons.clear)
+            self._store_team_records(conn, [], matches)
+        self._atomic(write)
+        return len(matches)
+
+    def _backfill_team_records(self):
+        """Build team records for databases created before the record tables existed."""
+        if not self._fetchone(self.sql.team_h2h.count)[0] and \
+                self._fetchall(self.sql.select_match_results + ' LIMIT 1'):
+            self.rebuild_team_records()
+
+    # Search operations
+    def _index_search(self, conn, entity: str, entity_id: str, name: str,
+                      team_id: Optional[str] = None):
+        """Add or replace a name in the search index inside the caller's transaction."""
+        raise NotImplementedError
+
+    def _unindex_search(self, conn, entity: str, entity_id: str):
+        """Remove a name from the search index inside the caller's transaction."""
+        raise NotImplementedError
+
+    def _clear_search(self, conn):
+        """Empty the search index inside the caller's transaction."""
+        raise NotImplementedError
+
+    def _search_candidates(self, terms: List[str], limit: int) -> List[tuple]:
+        """Find up to limit (entity, id, name, team id) rows matching every term as a prefix."""
+        raise NotImplementedError
+
+    @staticmethod
+    def _named_records(data: Dict):
+        """Yield (entity, record, team id) for every searchable record in seed-shaped data."""
+        for course in data.get('courses', []):
+            yield 'course', course, None
+        for team in data.get('teams', []):
+            yield 'team', team, None
+        for player in data.get('players', []):
+            yield 'player', player, player['teamId']
+
+    def search(self, query: str, limit: int) -> List[Dict]:
+        """Find players, teams and courses by name prefix through the text index."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        return rank_results(terms, self._search_candidates(terms, limit * CANDIDATE_FACTOR),
+                            limit)
+
+    def rebuild_search_index(self) -> int:
+        """Rebuild the search index from the courses, teams and players tables."""
+        records = list(self._named_records({'courses': self.get_courses(),
+                                            'teams': self.get_teams(),
+                                            'players': self.get_players()}))
+
+        def write(conn):
+            self._clear_search(conn)
+            for entity, item, team_id in records:
+                self._index_search(conn, entity, item['id'], item['name'], team_id)
+        self._atomic(write)
+        return len(records)
+
+    def _backfill_search_index(self):
+        """Index names for databases created before the search index existed."""
+        if self._fetchone(self.sql.count_search_entries)[0] == 0:
+            self.rebuild_search_index()
+
+    # Bulk transfer
+    def _bulk_table(self, table: str):
+        """Get the statements, row decoder and parameter builder of a table."""
+        return {'courses': (self.sql.courses, row_to_course, course_params),
+                'teams': (self.sql.teams, row_to_team, team_params),
+                'players': (self.sql.players, row_to_player, player_params),
+                'matches': (self.sql.matches, row_to_match, match_params)}[table]
+
+    def export_records(self, table: str, batch_size: int) -> Iterator[List[Dict]]:
+        """Yield a table's records in id order, one keyset-paginated query per batch."""
+        statements, decode, _ = self._bulk_table(table)
+        last_id = ''
+        while True:
+            rows = self._fetchall(statements.select_page, (last_id, batch_size))
+            if rows:
+                yield [decode(row) for row in rows]
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+
+    def import_records(self, table: str, records: List[Dict]) -> int:
+        """Upsert a batch of records with executemany, with their derived rows and names."""
+        statements, _, params = self._bulk_table(table)
+        rows = [params(record) for record in records]
+        stats = [player_stats_params(compute_player_stats(player))
+                 for player in records] if table == 'players' else []
+
+        def write(conn):
+            if table == 'matches':
+                old = self._match_results(conn, [record['id'] for record in records])
+                self._store_team_records(conn, old, records)
+            if rows:
+                self._executemany(conn, statements.upsert, rows)
+            if stats:
+                self._executemany(conn, self.sql.player_stats.upsert, stats)
+            for entity, item, team_id in self._named_records({table: records}):
+                self._index_search(conn, entity, item['id'], item['name'], team_id)
+            # Existing records were updated to their next version
+            if table in VERSIONED_TABLES:
+                self._journal_stored(conn, table, [row[0] for row in rows])
+            else:
+                self._journal(conn, table, rows)
+        self._atomic(write)
+        return len(records)
+
+    # Journal
+    def get_history(self, table: str, record_id: str) -> List[Dict]:
+        """Get a record's journal entries through the (entity, entity_id, at) index."""
+        decode = self._bulk_table(table)[1]
+        rows = self._fetchall(self.sql.journal.select_history, (table, record_id))
+        return [journal.to_entry(seq, at, actor, op,
+                                 decode(journal.decode_row(data)) if data is not None else None)
+                for seq, at, actor, op, data in rows]
+
+    def get_as_of(self, table: str, record_id: str, at: float) -> Optional[Dict]:
+        """Get a record as of a time from its last journal entry by then, one index lookup."""
+        decode = self._bulk_table(table)[1]
+        row = self._fetchone(self.sql.journal.select_as_of, (table, record_id, at))
+        if row is None or row[0] == journal.DELETE:
+            return None
+        return decode(journal.decode_row(row[1]))
+
+    def compact_journal(self, before: float, limit: int) -> int:
+        """Delete one batch of journal entries hidden by later ones before the cutoff."""
+        def write(conn):
+            seqs = self._ids(conn, self.sql.journal.select_compactable, (before, before, limit))
+            if seqs:
+                self._executemany(conn, self.sql.journal.delete, [(seq,) for seq in seqs])
+            return len(seqs)
+        return self._atomic(write)
+
+    def _backfill_journal(self):
+        """Journal the current records of databases created before the journal existed."""
+        if self._fetchone(self.sql.journal.count)[0]:
+            return
+        rows = {table: self._fetchall(self._bulk_table(table)[0].select_all)
+                for table in journal.JOURNAL_TABLES}
+        if not any(rows.values()):
+            return
+
+        def write(conn):
+            for table, table_rows in rows.items():
+                self._journal(conn, table, table_rows)
+        self._atomic(write)
+
+    # Maintenance
+    def purge_orphans(self, limit: int) -> Dict[str, int]:
+        """Repair one batch of orphaned players and matches in a single transaction."""
+        def write(conn):
+            players = self._ids(conn, self.sql.select_orphan_players, (limit,))
+            matches = self._ids(conn, self.sql.select_orphan_matches, (limit,))
+            self._delete_player_rows(conn, players)
+            self._delete_match_rows(conn, matches)
+            # Matches about to be deleted in a later batch are not worth repairing first
+            if len(matches) == limit:
+                return {'players': len(players), 'matches': len(matches), 'winners': 0,
+                        'courses': 0}
+            winners = self._ids(conn, self.sql.select_orphan_winners, (limit,))
+            if winners:
+                old = self._match_results(conn, winners)
+                self._executemany(conn, self.sql.clear_match_winner,
+                                  [(match_id,) for match_id in winners])
+                self._store_team_records(conn, old, [{**match, 'winnerId': None}
+                                                     for match in old])
+            courses = self._ids(conn, self.sql.select_orphan_courses, (limit,))
+            if courses:
+                self._executemany(conn, self.sql.clear_match_course,
+                                  [(match_id,) for match_id in courses])
+            self._journal_stored(conn, 'matches', list(dict.fromkeys(winners + courses)))
+            return {'players': len(players), 'matches': len(matches), 'winners': len(winners),
+                    'courses': len(courses)}
+        return self._atomic(write)
+
+    # Initialization
+    def initialize_data(self, data: Dict) -> bool:
+        """Initialize the database with seed data."""
+        def write(conn):
+            matches = data.get('matches', [])
+            self._store_team_records(
+                conn, self._match_results(conn, [match['id'] for match in matches]), matches)
+            for key, statements, params in (('courses', self.sql.courses, course_params),
+                                            ('teams', self.sql.teams, team_params),
+                                            ('players', self.sql.players, player_params),
+                                            ('matches', self.sql.matches, match_params)):
+                rows = [params(item) for item in data.get(key, [])]
+                if rows:
+                    self._executemany(conn, statements.upsert, rows)
+                    if key in VERSIONED_TABLES:
+                        self._journal_stored(conn, key, [row[0] for row in rows])
+                    else:
+                        self._journal(conn, key, rows)
+            stats = [player_stats_params(compute_player_stats(player))
+                     for player in data.get('players', [])]
+            if stats:
+                self._executemany(conn, self.sql.player_stats.upsert, stats)
+            for entity, item, team_id in self._named_records(data):
+                self._index_search(conn, entity, item['id'], item['name'], team_id)
+        try:
+            self._atomic(write)
+            return True
+        except (self.driver_error, IntegrityViolationError, StorageTimeoutError,
+                KeyError, TypeError, ValueError) as e:
+            print(f"Error initializing data: {e}")
+            return False
+
+    def is_initialized(self) -> bool:
+        """Check if the database has been initialized with data."""
+        row = self._fetchone(self.sql.count_players)
+        return row is not None and row[0] > 0
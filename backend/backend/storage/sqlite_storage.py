@@ -1,28 +1,265 @@
 """
 SQLite implementation of the storage interface.
 Provides persistent storage for the golf league application using SQLite database.
+Writes are serialized through one writer thread that group-commits queued operations, while
+reads run on per-thread connections in WAL mode and never wait for the writer.
 """
+import contextvars
+import queue
 import sqlite3
-import json
-from typing import List, Dict, Optional
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, List
 from pathlib import Path
-from backend.storage.base import StorageInterface
+from backend.storage import deadline
+from backend.storage.base import RESTRICT, StorageTimeoutError
+from backend.storage.sql_storage import SQLStorage
+from backend.storage.statements import SQLITE
 
+# Reads check their deadline every this many SQLite virtual machine instructions
+PROGRESS_INSTRUCTIONS = 1000
 
-class SQLiteStorage(StorageInterface):
+# VACUUM rewrites the whole file, so it only runs once this fraction of its pages is free
+VACUUM_FREE_FRACTION = 0.2
+
+SEARCH_FIND_ENTRY = 'SELECT entry_id FROM search_entries WHERE entity = ? AND entity_id = ?'
+SEARCH_INSERT_ENTRY = ('INSERT INTO search_entries (entity, entity_id, name, team_id) '
+                       'VALUES (?, ?, ?, ?)')
+SEARCH_UPDATE_ENTRY = 'UPDATE search_entries SET name = ?, team_id = ? WHERE entry_id = ?'
+SEARCH_DELETE_ENTRY = 'DELETE FROM search_entries WHERE entry_id = ?'
+SEARCH_INDEX_NAME = 'INSERT INTO search_index (rowid, name) VALUES (?, ?)'
+SEARCH_UNINDEX_NAME = 'DELETE FROM search_index WHERE rowid = ?'
+SEARCH_QUERY = (
+    'SELECT e.entity, e.entity_id, e.name, e.team_id FROM search_index '
+    'JOIN search_entries e ON e.entry_id = search_index.rowid '
+    'WHERE search_index MATCH ? ORDER BY rank LIMIT ?'
+)
+
+
+class SQLiteStorage(SQLStorage):
     """SQLite implementation of the storage interface."""
     
-    def __init__(self, db_path: str):
-        """Initialize SQLite storage with the given database path."""
+    sql = SQLITE
+    driver_error = sqlite3.Error
+    
+    def __init__(self, db_path: str, max_batch: int = 64, busy_timeout: float = 5.0,
+                 integrity_mode: str = RESTRICT):
+        """
+        Initialize SQLite storage with the given database path.
+        
+        Up to max_batch queued write operations share one commit. busy_timeout is how long a
+        connection waits for a lock held by another process before failing; a batch whose
+        writes all have deadlines waits no longer than the last of them.
+        """
+        super().__init__(integrity_mode)
         self.db_path = db_path
+        self.max_batch = max_batch
+        self.busy_timeout = busy_timeout
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
-        self._init_database()
+        self._wal_enabled = False
+        self._writes: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
     
-    def _get_connection(self):
-        """Get a database connection."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+    def _connect(self):
+        """Open a database connection with a statement cache sized for all our statements."""
+        # Each connection is only used by the thread that opened it, but close() may run on
+        # another thread when a league is evicted
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, cached_statements=256,
+                               check_same_thread=False)
+        if not self._wal_enabled:
+            # WAL is a property of the database file, so setting it once is enough
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._wal_enabled = True
+        # Foreign keys are enforced per connection; they back up the storage layer's checks
+        conn.execute('PRAGMA foreign_keys=ON')
+        # Stop a read once the calling thread's deadline has passed
+        conn.set_progress_handler(deadline.expired, PROGRESS_INSTRUCTIONS)
         return conn
+
+    def _timed_out(self, error: Exception) -> bool:
+        """Reads stopped by the progress handler, or a lock that outlasted the busy timeout."""
+        return isinstance(error, sqlite3.OperationalError) and \
+            str(error) in ('interrupted', 'database is locked')
+    
+    # Single writer
+    def _atomic(self, write):
+        """
+        Queue write(conn) for the writer thread and wait until its batch has committed.
+
+        A write still waiting in the queue at the deadline is withdrawn and raises
+        StorageTimeoutError. One the writer has started is waited for: stopping it would roll
+        back the other writes in its transaction. The writer runs write in the caller's context,
+        so it sees the caller's journal actor.
+        """
+        # Make sure the schema exists before the writer touches the database
+        self._get_connection()
+        if threading.current_thread() is self._writer:
+            raise RuntimeError('Write operations cannot be nested')
+        future: Future = Future()
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run_writer, name='sqlite-writer',
+                                                daemon=True)
+                self._writer.start()
+            self._writes.put((contextvars.copy_context(), write, future, deadline.current()))
+        try:
+            return future.result(timeout=deadline.remaining())
+        except FutureTimeoutError:
+            if future.cancel():
+                raise StorageTimeoutError('Timed out waiting for the database writer') from None
+            return future.result()
+    
+    def _run_writer(self):
+        """Apply queued writes in batches, one transaction and commit per batch."""
+        conn = self._connect()
+        # Writes are never interrupted; see _atomic
+        conn.set_progress_handler(None, 0)
+        with self._connections_lock:
+            self._connections.append(conn)
+        while True:
+            item = self._writes.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._writes.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Finish this batch, then stop
+                    self._writes.put(None)
+                    break
+                batch.append(item)
+            self._commit_batch(conn, batch)
+    
+    def _commit_batch(self, conn, batch):
+        """Run a batch of writes in one transaction; a failing write only undoes itself."""
+        results = []
+        deadlines = [at for _, _, _, at in batch]
+        busy_timeout = self.busy_timeout
+        if None not in deadlines:
+            busy_timeout = min(busy_timeout, deadline.remaining(max(deadlines)))
+        conn.execute(f'PRAGMA busy_timeout = {int(busy_timeout * 1000)}')
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for context, write, future, at in batch:
+                # Skip writes withdrawn by their callers and those past their deadline
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if deadline.expired(at):
+                    results.append((future, None, StorageTimeoutError('Storage deadline exceeded')))
+                    continue
+                conn.execute('SAVEPOINT write_op')
+                try:
+                    results.append((future, context.run(write, conn), None))
+                    conn.execute('RELEASE write_op')
+                except Exception as e:  # noqa: BLE001 - re-raised by the caller's future
+                    conn.execute('ROLLBACK TO write_op')
+                    conn.execute('RELEASE write_op')
+                    results.append((future, None, e))
+            conn.commit()
+        except sqlite3.Error as e:
+            # The transaction itself failed (e.g. locked by another process): fail the batch
+            if conn.in_transaction:
+                conn.rollback()
+            if self._timed_out(e):
+                e = StorageTimeoutError(f'Write stopped: {e}')
+            results = [(future, None, e) for _, _, future, _ in batch if not future.cancelled() and
+                       (future.running() or future.set_running_or_notify_cancel())]
+        # Acknowledge only after the commit, so a returned write is durable
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+    
+    def close(self):
+        """Stop the writer after it drains its queue, then close all connections."""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+            if writer is not None:
+                self._writes.put(None)
+        if writer is not None:
+            writer.join()
+        super().close()
+    
+    def _execute(self, conn, sql: str, params=()):
+        """Execute a statement; sqlite3 reuses the prepared statement from its cache."""
+        return conn.execute(sql, params)
+    
+    def _executemany(self, conn, sql: str, rows: List[tuple]):
+        """Execute a statement once per parameter tuple."""
+        conn.executemany(sql, rows)
+    
+    # Search index
+    def _index_search(self, conn, entity: str, entity_id: str, name: str, team_id=None):
+        """Add or replace an entry and its FTS row."""
+        row = conn.execute(SEARCH_FIND_ENTRY, (entity, entity_id)).fetchone()
+        if row:
+            entry_id = row[0]
+            conn.execute(SEARCH_UPDATE_ENTRY, (name, team_id, entry_id))
+            conn.execute(SEARCH_UNINDEX_NAME, (entry_id,))
+        else:
+            entry_id = conn.execute(SEARCH_INSERT_ENTRY,
+                                    (entity, entity_id, name, team_id)).lastrowid
+        conn.execute(SEARCH_INDEX_NAME, (entry_id, name))
+    
+    def _unindex_search(self, conn, entity: str, entity_id: str):
+        """Remove an entry and its FTS row."""
+        row = conn.execute(SEARCH_FIND_ENTRY, (entity, entity_id)).fetchone()
+        if row:
+            conn.execute(SEARCH_UNINDEX_NAME, (row[0],))
+            conn.execute(SEARCH_DELETE_ENTRY, (row[0],))
+    
+    def _clear_search(self, conn):
+        """Empty the entries and the FTS index."""
+        conn.execute('DELETE FROM search_index')
+        conn.execute('DELETE FROM search_entries')
+    
+    def _search_candidates(self, terms: List[str], limit: int) -> List[tuple]:
+        """Match every term as a prefix, best bm25 rank first."""
+        expression = ' '.join(f'"{term}"*' for term in terms)
+        return self._fetchall(SEARCH_QUERY, (expression, limit))
+    
+    # Maintenance
+    def optimize(self, force: bool = False) -> Dict:
+        """
+        VACUUM once VACUUM_FREE_FRACTION of the file is free pages, then run PRAGMA optimize.
+        
+        Runs on its own connection, since VACUUM cannot run inside the writer's transactions;
+        writes wait for it through the busy timeout.
+        """
+        self._get_connection()
+        conn = self._connect()
+        try:
+            pages = conn.execute('PRAGMA page_count').fetchone()[0]
+            free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            fraction = free / pages if pages else 0.0
+            vacuumed = force or fraction >= VACUUM_FREE_FRACTION
+            if vacuumed:
+                conn.execute('VACUUM')
+                # VACUUM goes through the WAL; fold it back into the file and shrink the log
+                conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            conn.execute('PRAGMA optimize')
+        finally:
+            conn.close()
+        return {'pages': pages, 'freePages': free, 'vacuumed': vacuumed}
+    
+    def _schema_version(self, conn) -> int:
+        """Read the schema version from the database header."""
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+    
+    def _set_schema_version(self, conn, version: int):
+        """Store the schema version in the database header."""
+        conn.execute(f'PRAGMA user_version = {int(version)}')
+    
+    def _add_column(self, cursor, table: str, column: str, definition: str):
+        """Add a column to a table created by an older version of the schema."""
+        columns = {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+        if column not in columns:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
     
     def _init_database(self):
         """Initialize database schema."""
@@ -77,331 +314,117 @@ class SQLiteStorage(StorageInterface):
             )
         ''')
         
-        conn.commit()
-        conn.close()
-    
-    # Course operations
-    def get_courses(self) -> List[Dict]:
-        """Get all courses."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM courses')
-        rows = cursor.fetchall()
-        conn.close()
+        # Columns added after the original schema
+        self._add_column(cursor, 'matches', 'course_id', 'TEXT')
+        self._add_column(cursor, 'players', 'version', 'INTEGER NOT NULL DEFAULT 1')
+        self._add_column(cursor, 'matches', 'version', 'INTEGER NOT NULL DEFAULT 1')
         
-        return [self._row_to_course(row) for row in rows]
-    
-    def get_course(self, course_id: str) -> Optional[Dict]:
-        """Get a specific course by ID."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM courses WHERE id = ?', (course_id,))
-        row = cursor.fetchone()
-        conn.close()
+        # Lookup indexes for rosters and match nights
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_players_team_id ON players (team_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_matches_date ON matches (date)')
         
-        return self._row_to_course(row) if row else None
-
-    def create_course(self, course_data: Dict) -> Dict:
-        """Create a new course."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        holes_json = json.dumps(course_data['holes'])
-        cursor.execute(
-            'INSERT INTO courses (id, name, holes) VALUES (?, ?, ?)',
-            (course_data['id'], course_data['name'], holes_json)
-        )
-        conn.commit()
-        conn.close()
-        return course_data
-
-    def update_course(self, course_id: str, course_data: Dict) -> Dict:
-        """Update an existing course."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        holes_json = json.dumps(course_data['holes'])
-        cursor.execute(
-            'UPDATE courses SET name = ?, holes = ? WHERE id = ?',
-            (course_data['name'], holes_json, course_id)
-        )
-        conn.commit()
-        conn.close()
-        return {**course_data, 'id': course_id}
-
-    def delete_course(self, course_id: str) -> bool:
-        """Delete a course."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM courses WHERE id = ?', (course_id,))
-        deleted = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
-        return deleted
-    
-    def _row_to_course(self, row) -> Dict:
-        """Convert database row to course dictionary."""
-        return {
-            'id': row['id'],
-            'name': row['name'],
-            'holes': json.loads(row['holes'])
-        }
-    
-    # Team operations
-    def get_teams(self) -> List[Dict]:
-        """Get all teams."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM teams')
-        rows = cursor.fetchall()
-        conn.close()
+        # Referencing-row lookups for integrity checks on team and course deletes
+        for column in ('team1_id', 'team2_id', 'winner_id', 'course_id'):
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_matches_{column} ON matches ({column})')
         
-        return [dict(row) for row in rows]
-    
-    def get_team(self, team_id: str) -> Optional[Dict]:
-        """Get a specific team by ID."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM teams WHERE id = ?', (team_id,))
-        row = cursor.fetchone()
-        conn.close()
-        
-        return dict(row) if row else None
-    
-    def create_team(self, team_data: Dict) -> Dict:
-        """Create a new team."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            'INSERT INTO teams (id, name, day) VALUES (?, ?, ?)',
-            (team_data['id'], team_data['name'], team_data['day'])
-        )
-        conn.commit()
-        conn.close()
-        return team_data
-    
-    def update_team(self, team_id: str, team_data: Dict) -> Dict:
-        """Update an existing team."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            'UPDATE teams SET name = ?, day = ? WHERE id = ?',
-            (team_data['name'], team_data['day'], team_id)
-        )
-        conn.commit()
-        conn.close()
-        return {**team_data, 'id': team_id}
-    
-    def delete_team(self, team_id: str) -> bool:
-        """Delete a team."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM teams WHERE id = ?', (team_id,))
-        deleted = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
-        return deleted
-    
-    # Player operations
-    def get_players(self) -> List[Dict]:
-        """Get all players."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM players')
-        rows = cursor.fetchall()
-        conn.close()
+        # Player statistics, maintained on every player write
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS player_stats (
+                player_id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                team_id TEXT NOT NULL,
+                rounds INTEGER NOT NULL,
+                total_score INTEGER NOT NULL,
+                average_score REAL,
+                recent_average REAL,
+                best_score INTEGER,
+                best_date TEXT,
+                worst_score INTEGER,
+                last_score INTEGER,
+                last_date TEXT,
+                handicap INTEGER NOT NULL,
+                handicap_trend INTEGER NOT NULL
+            )
+        ''')
         
-        return [self._row_to_player(row) for row in rows]
-    
-    def get_player(self, player_id: str) -> Optional[Dict]:
-        """Get a specific player by ID."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM players WHERE id = ?', (player_id,))
-        row = cursor.fetchone()
-        conn.close()
+        # One index per leaderboard metric so top-N queries never sort the whole table
+        for column in ('average_score', 'recent_average', 'best_score', 'rounds', 'handicap',
+                       'handicap_trend'):
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS idx_player_stats_{column} ON player_stats ({column})'
+            )
         
-        return self._row_to_player(row) if row else None
-    
-    def create_player(self, player_data: Dict) -> Dict:
-        """Create a new player."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        history_json = json.dumps(player_data.get('history', []))
-        cursor.execute(
-            'INSERT INTO players (id, name, team_id, handicap, history) VALUES (?, ?, ?, ?, ?)',
-            (player_data['id'], player_data['name'], player_data['teamId'], 
-             player_data['handicap'], history_json)
-        )
-        conn.commit()
-        conn.close()
-        return player_data
-    
-    def update_player(self, player_id: str, player_data: Dict) -> Dict:
-        """Update an existing player."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        history_json = json.dumps(player_data.get('history', []))
+        # Team records, running totals maintained on every match write
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS team_h2h (
+                team_id TEXT NOT NULL,
+                opponent_id TEXT NOT NULL,
+                played INTEGER NOT NULL,
+                wins INTEGER NOT NULL,
+                losses INTEGER NOT NULL,
+                ties INTEGER NOT NULL,
+                points_for REAL NOT NULL,
+                points_against REAL NOT NULL,
+                PRIMARY KEY (team_id, opponent_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS team_seasons (
+                team_id TEXT NOT NULL,
+                season TEXT NOT NULL,
+                day TEXT NOT NULL,
+                played INTEGER NOT NULL,
+                wins INTEGER NOT NULL,
+                losses INTEGER NOT NULL,
+                ties INTEGER NOT NULL,
+                points_for REAL NOT NULL,
+                points_against REAL NOT NULL,
+                PRIMARY KEY (team_id, season, day)
+            )
+        ''')
         cursor.execute(
-            'UPDATE players SET name = ?, team_id = ?, handicap = ?, history = ? WHERE id = ?',
-            (player_data['name'], player_data['teamId'], player_data['handicap'], 
-             history_json, player_id)
+            'CREATE INDEX IF NOT EXISTS idx_team_seasons_season ON team_seasons (season, day)'
         )
-        conn.commit()
-        conn.close()
-        return {**player_data, 'id': player_id}
-    
-    def delete_player(self, player_id: str) -> bool:
-        """Delete a player."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM players WHERE id = ?', (player_id,))
-        deleted = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
-        return deleted
-    
-    def _row_to_player(self, row) -> Dict:
-        """Convert database row to player dictionary."""
-        return {
-            'id': row['id'],
-            'name': row['name'],
-            'teamId': row['team_id'],
-            'handicap': row['handicap'],
-            'history': json.loads(row['history']) if row['history'] else []
-        }
-    
-    # Match operations
-    def get_matches(self) -> List[Dict]:
-        """Get all matches."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM matches')
-        rows = cursor.fetchall()
-        conn.close()
         
-        return [self._row_to_match(row) for row in rows]
-    
-    def get_match(self, match_id: str) -> Optional[Dict]:
-        """Get a specific match by ID."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM matches WHERE id = ?', (match_id,))
-        row = cursor.fetchone()
-        conn.close()
+        # Name search: one entry per player, team and course, and an FTS5 index sharing the
+        # entry rowids. Prefix indexes make "smi*" style queries index lookups.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS search_entries (
+                entry_id INTEGER PRIMARY KEY,
+                entity TEXT NOT NULL,
+                entity_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                team_id TEXT,
+                UNIQUE (entity, entity_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+                name, tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3'
+            )
+        ''')
         
-        return self._row_to_match(row) if row else None
-    
-    def create_match(self, match_data: Dict) -> Dict:
-        """Create a new match."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        scores_json = json.dumps(match_data.get('scores', []))
-        cursor.execute(
-            '''INSERT INTO matches (id, date, day, team1_id, team2_id, completed, winner_id, score, scores)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-            (match_data['id'], match_data['date'], match_data['day'],
-             match_data['team1Id'], match_data['team2Id'],
-             1 if match_data.get('completed') else 0,
-             match_data.get('winnerId'), match_data.get('score'), scores_json)
-        )
-        conn.commit()
-        conn.close()
-        return match_data
-    
-    def update_match(self, match_id: str, match_data: Dict) -> Dict:
-        """Update an existing match."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        scores_json = json.dumps(match_data.get('scores', []))
+        # Append-only journal of record mutations; rows are compressed by storage.journal
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS journal (
+                seq INTEGER PRIMARY KEY,
+                at REAL NOT NULL,
+                actor TEXT,
+                entity TEXT NOT NULL,
+                entity_id TEXT NOT NULL,
+                op TEXT NOT NULL,
+                data BLOB
+            )
+        ''')
+        # Point-in-time reads of one record, and compaction by age
         cursor.execute(
-            '''UPDATE matches SET date = ?, day = ?, team1_id = ?, team2_id = ?,
-               completed = ?, winner_id = ?, score = ?, scores = ? WHERE id = ?''',
-            (match_data['date'], match_data['day'], match_data['team1Id'], match_data['team2Id'],
-             1 if match_data.get('completed') else 0,
-             match_data.get('winnerId'), match_data.get('score'), scores_json, match_id)
+            'CREATE INDEX IF NOT EXISTS idx_journal_entity ON journal (entity, entity_id, at)'
         )
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_journal_at ON journal (at)')
+        
         conn.commit()
-        conn.close()
-        return {**match_data, 'id': match_id}
-    
-    def delete_match(self, match_id: str) -> bool:
-        """Delete a match."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM matches WHERE id = ?', (match_id,))
-        deleted = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
-        return deleted
-    
-    def _row_to_match(self, row) -> Dict:
-        """Convert database row to match dictionary."""
-        match_dict = {
-            'id': row['id'],
-            'date': row['date'],
-            'day': row['day'],
-            'team1Id': row['team1_id'],
-            'team2Id': row['team2_id'],
-            'completed': bool(row['completed']),
-            'scores': json.loads(row['scores']) if row['scores'] else []
-        }
-        if row['winner_id']:
-            match_dict['winnerId'] = row['winner_id']
-        if row['score']:
-            match_dict['score'] = row['score']
-        return match_dict
-    
-    # Initialization
-    def initialize_data(self, data: Dict) -> bool:
-        """Initialize the database with seed data."""
-        try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            # Insert courses
-            for course in data.get('courses', []):
-                holes_json = json.dumps(course['holes'])
-                cursor.execute(
-                    'INSERT OR REPLACE INTO courses (id, name, holes) VALUES (?, ?, ?)',
-                    (course['id'], course['name'], holes_json)
-                )
-            
-            # Insert teams
-            for team in data.get('teams', []):
-                cursor.execute(
-                    'INSERT OR REPLACE INTO teams (id, name, day) VALUES (?, ?, ?)',
-                    (team['id'], team['name'], team['day'])
-                )
-            
-            # Insert players
-            for player in data.get('players', []):
-                history_json = json.dumps(player.get('history', []))
-                cursor.execute(
-                    'INSERT OR REPLACE INTO players (id, name, team_id, handicap, history) VALUES (?, ?, ?, ?, ?)',
-                    (player['id'], player['name'], player['teamId'], player['handicap'], history_json)
-                )
-            
-            # Insert matches
-            for match in data.get('matches', []):
-                scores_json = json.dumps(match.get('scores', []))
-                cursor.execute(
-                    '''INSERT OR REPLACE INTO matches (id, date, day, team1_id, team2_id, completed, winner_id, score, scores)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                    (match['id'], match['date'], match['day'], match['team1Id'], match['team2Id'],
-                     1 if match.get('completed') else 0, match.get('winnerId'), match.get('score'), scores_json)
-                )
-            
-            conn.commit()
-            conn.close()
-            return True
-        except Exception as e:
-            print(f"Error initializing data: {e}")
-            return False
-    
-    def is_initialized(self) -> bool:
-        """Check if the database has been initialized with data."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) as count FROM players')
-        count = cursor.fetchone()['count']
-        conn.close()
-        return count > 0
+        cursor.close()
+        self._backfill_player_stats()
+        self._backfill_search_index()
+        self._backfill_team_records()
+        self._backfill_journal()
@@ -0,0 +1,318 @@
+"""
+SQL statements and row decoders shared by the SQL storage backends.
+Statements are built once per placeholder style and select explicit column lists, so rows
+can be fetched as plain tuples and decoded by column position.
+"""
+import json
+from typing import Dict
+from backend.services.team_records import to_record
+
+COURSE_COLUMNS = ('id', 'name', 'holes')
+TEAM_COLUMNS = ('id', 'name', 'day')
+PLAYER_COLUMNS = ('id', 'name', 'team_id', 'handicap', 'history')
+MATCH_COLUMNS = ('id', 'date', 'day', 'team1_id', 'team2_id', 'completed', 'winner_id', 'score',
+                 'scores', 'course_id')
+PLAYER_STATS_COLUMNS = ('player_id', 'name', 'team_id', 'rounds', 'total_score', 'average_score',
+                        'recent_average', 'best_score', 'best_date', 'worst_score', 'last_score',
+                        'last_date', 'handicap', 'handicap_trend')
+# Team record tables: key columns, then totals in team_records.RECORD_FIELDS order
+RECORD_TOTAL_COLUMNS = ('played', 'wins', 'losses', 'ties', 'points_for', 'points_against')
+TEAM_H2H_KEYS = ('team_id', 'opponent_id')
+TEAM_SEASON_KEYS = ('team_id', 'season', 'day')
+MATCH_RESULT_COLUMNS = ('date', 'day', 'team1_id', 'team2_id', 'completed', 'winner_id', 'score')
+JOURNAL_COLUMNS = ('at', 'actor', 'entity', 'entity_id', 'op', 'data')
+
+_loads = json.loads
+
+
+class TableStatements:
+    """
+    CRUD statements for one table keyed by its first column.
+
+    A versioned table also has a version column that starts at its default of 1, is selected
+    after the other columns and is incremented by every update. upsert inserts a row or updates
+    the stored one in place, so rows referencing it are kept and a versioned row moves on to
+    its next version; accumulate and added are as for Statements.
+    """
+
+    def __init__(self, table: str, columns: tuple, placeholder: str, accumulate: str,
+                 added: str, versioned: bool = False):
+        key = columns[0]
+        column_list = ', '.join(columns)
+        selected = f'{column_list}, version' if versioned else column_list
+        values = ', '.join([placeholder] * len(columns))
+        assignments = ', '.join(f'{column} = {placeholder}' for column in columns[1:])
+        replacements = ', '.join(f'{column} = {added.format(column=column)}'
+                                 for column in columns[1:])
+        if versioned:
+            assignments += ', version = version + 1'
+            replacements += ', version = version + 1'
+        self.select_all = f'SELECT {selected} FROM {table}'
+        self.select_one = f'SELECT {selected} FROM {table} WHERE {key} = {placeholder}'
+        self.insert = f'INSERT INTO {table} ({column_list}) VALUES ({values})'
+        self.upsert = f'{self.insert} {accumulate.format(keys=key)} {replacements}'
+        self.update = f'UPDATE {table} SET {assignments} WHERE {key} = {placeholder}'
+        self.delete = f'DELETE FROM {table} WHERE {key} = {placeholder}'
+        # Keyset pagination: pass the last id of the previous page ('' for the first)
+        self.select_page = (f'{self.select_all} WHERE {key} > {placeholder} '
+                            f'ORDER BY {key} LIMIT {placeholder}')
+        if versioned:
+            # Takes the update parameters followed by the expected version
+            self.update_if_version = f'{self.update} AND version = {placeholder}'
+            self.select_version = f'SELECT version FROM {table} WHERE {key} = {placeholder}'
+
+
+class RecordStatements:
+    """
+    Statements for a table of running totals keyed by several columns, team_id first.
+
+    add inserts a key with the given totals or adds them to the stored ones; rows whose
+    played count drops to zero are removed with delete_empty.
+    """
+
+    def __init__(self, table: str, keys: tuple, placeholder: str, accumulate: str,
+                 added: str):
+        columns = keys + RECORD_TOTAL_COLUMNS
+        column_list = ', '.join(columns)
+        values = ', '.join([placeholder] * len(columns))
+        increments = ', '.join(f'{column} = {column} + {added.format(column=column)}'
+                               for column in RECORD_TOTAL_COLUMNS)
+        key_match = ' AND '.join(f'{key} = {placeholder}' for key in keys)
+        self.select_all = f'SELECT {column_list} FROM {table}'
+        self.add = (f'INSERT INTO {table} ({column_list}) VALUES ({values}) '
+                    f'{accumulate.format(keys=", ".join(keys))} {increments}')
+        self.delete_empty = f'DELETE FROM {table} WHERE {key_match} AND played <= 0'
+        self.select_by_team = (f'{self.select_all} WHERE team_id = {placeholder} '
+                               f'ORDER BY {", ".join(keys[1:])}')
+        self.select_one = f'{self.select_all} WHERE {key_match}'
+        self.clear = f'DELETE FROM {table}'
+        self.count = f'SELECT COUNT(*) FROM {table}'
+
+
+class JournalStatements:
+    """
+    Statements for the append-only journal, keyed by seq and read per record by time.
+
+    select_compactable takes the cutoff twice and a limit, and selects the entries that no
+    longer decide a read as of the cutoff: all but each record's last entry before it, and
+    that one too if it is a deletion. Earlier entries come first, so a record's last entry is
+    never dropped before those it hides.
+    """
+
+    def __init__(self, placeholder: str):
+        values = ', '.join([placeholder] * len(JOURNAL_COLUMNS))
+        record = f'entity = {placeholder} AND entity_id = {placeholder}'
+        self.insert = f'INSERT INTO journal ({", ".join(JOURNAL_COLUMNS)}) VALUES ({values})'
+        self.select_history = (f'SELECT seq, at, actor, op, data FROM journal WHERE {record} '
+                               f'ORDER BY at, seq')
+        self.select_as_of = (f'SELECT op, data FROM journal WHERE {record} '
+                             f'AND at <= {placeholder} ORDER BY at DESC, seq DESC LIMIT 1')
+        self.select_compactable = (
+            f"SELECT seq FROM journal j WHERE j.at < {placeholder} AND (j.op = 'delete' OR "
+            f'EXISTS (SELECT 1 FROM journal k WHERE k.entity = j.entity '
+            f'AND k.entity_id = j.entity_id AND k.at < {placeholder} '
+            f'AND (k.at > j.at OR (k.at = j.at AND k.seq > j.seq)))) '
+            f'ORDER BY j.at, j.seq LIMIT {placeholder}')
+        self.delete = f'DELETE FROM journal WHERE seq = {placeholder}'
+        self.count = 'SELECT COUNT(*) FROM journal'
+
+
+class Statements:
+    """SQL text for one placeholder style, built once and reused by every call."""
+
+    def __init__(self, placeholder: str, accumulate: str, added: str, lock_rows: str = ''):
+        """
+        Build all statements for the given placeholder ('?' or '%s').
+
+        accumulate is the clause that turns an insert of an existing key into an update, with
+        {keys} for the key columns, and added refers to an inserted {column} value in it.
+        lock_rows is appended to reads that precede a write of the same row in a transaction.
+        """
+        self.placeholder = placeholder
+        self.courses = TableStatements('courses', COURSE_COLUMNS, placeholder, accumulate, added)
+        self.teams = TableStatements('teams', TEAM_COLUMNS, placeholder, accumulate, added)
+        self.players = TableStatements('players', PLAYER_COLUMNS, placeholder, accumulate, added,
+                                       versioned=True)
+        self.matches = TableStatements('matches', MATCH_COLUMNS, placeholder, accumulate, added,
+                                       versioned=True)
+        self.player_stats = TableStatements('player_stats', PLAYER_STATS_COLUMNS, placeholder,
+                                            accumulate, added)
+        self.team_h2h = RecordStatements('team_h2h', TEAM_H2H_KEYS, placeholder, accumulate,
+                                         added)
+        self.team_seasons = RecordStatements('team_seasons', TEAM_SEASON_KEYS, placeholder,
+                                             accumulate, added)
+        self.journal = JournalStatements(placeholder)
+        self.select_standings = f'{self.team_seasons.select_all} WHERE season = {placeholder}'
+        self.select_standings_by_day = f'{self.select_standings} AND day = {placeholder}'
+        self.select_players_by_team = f'{self.players.select_all} WHERE team_id = {placeholder}'
+        self.select_matches_by_date = f'{self.matches.select_all} WHERE date = {placeholder}'
+        self.select_match_scores = (f'SELECT scores, version FROM matches '
+                                    f'WHERE id = {placeholder}{lock_rows}')
+        self.update_match_scores = (f'UPDATE matches SET scores = {placeholder}, '
+                                    f'version = version + 1 WHERE id = {placeholder}')
+        results = ', '.join(MATCH_RESULT_COLUMNS)
+        self.select_match_result = (f'SELECT {results} FROM matches '
+                                    f'WHERE id = {placeholder}{lock_rows}')
+        self.select_match_results = f'SELECT {results} FROM matches WHERE completed = 1'
+        # Referential integrity: existence checks, referencing rows and orphans
+        self.team_exists = f'SELECT 1 FROM teams WHERE id = {placeholder}'
+        self.course_exists = f'SELECT 1 FROM courses WHERE id = {placeholder}'
+        self.select_team_player_ids = f'SELECT id FROM players WHERE team_id = {placeholder}'
+        self.select_team_match_ids = (f'SELECT id FROM matches WHERE team1_id = {placeholder} '
+                                      f'OR team2_id = {placeholder} OR winner_id = {placeholder}')
+        self.select_course_match_ids = f'SELECT id FROM matches WHERE course_id = {placeholder}'
+        self.clear_match_winner = (f'UPDATE matches SET winner_id = NULL, '
+                                   f'version = version + 1 WHERE id = {placeholder}')
+        self.clear_match_course = (f'UPDATE matches SET course_id = NULL, '
+                                   f'version = version + 1 WHERE id = {placeholder}')
+        missing_team = 'NOT EXISTS (SELECT 1 FROM teams WHERE teams.id = {column})'
+        self.select_orphan_players = (
+            f'SELECT id FROM players WHERE {missing_team.format(column="players.team_id")} '
+            f'LIMIT {placeholder}')
+        self.select_orphan_matches = (
+            f'SELECT id FROM matches WHERE {missing_team.format(column="matches.team1_id")} '
+            f'OR {missing_team.format(column="matches.team2_id")} LIMIT {placeholder}')
+        self.select_orphan_winners = (
+            f'SELECT id FROM matches WHERE winner_id IS NOT NULL '
+            f'AND {missing_team.format(column="matches.winner_id")} LIMIT {placeholder}')
+        self.select_orphan_courses = (
+            f'SELECT id FROM matches WHERE course_id IS NOT NULL AND NOT EXISTS '
+            f'(SELECT 1 FROM courses WHERE courses.id = matches.course_id) LIMIT {placeholder}')
+        self.count_players = 'SELECT COUNT(*) FROM players'
+        self.count_search_entries = 'SELECT COUNT(*) FROM search_entries'
+        self.clear_player_stats = 'DELETE FROM player_stats'
+
+    def leaderboard(self, column: str, direction: str) -> str:
+        """Build the top-N query for a player_stats column (from LEADERBOARD_METRICS only)."""
+        return (f'{self.player_stats.select_all} WHERE {column} IS NOT NULL '
+                f'ORDER BY {column} {direction}, player_id LIMIT {self.placeholder}')
+
+
+SQLITE = Statements('?', 'ON CONFLICT ({keys}) DO UPDATE SET', 'excluded.{column}')
+MARIADB = Statements('%s', 'ON DUPLICATE KEY UPDATE', 'VALUES({column})', ' FOR UPDATE')
+
+
+# Parameter builders, in column order. Update parameters put the id last.
+def course_params(course_data: Dict) -> tuple:
+    """Build course row parameters from a course dictionary."""
+    return (course_data['id'], course_data['name'], json.dumps(course_data['holes']))
+
+
+def team_params(team_data: Dict) -> tuple:
+    """Build team row parameters from a team dictionary."""
+    return (team_data['id'], team_data['name'], team_data['day'])
+
+
+def player_params(player_data: Dict) -> tuple:
+    """Build player row parameters from a player dictionary."""
+    return (player_data['id'], player_data['name'], player_data['teamId'],
+            player_data['handicap'], json.dumps(player_data.get('history', [])))
+
+
+def match_params(match_data: Dict) -> tuple:
+    """Build match row parameters from a match dictionary."""
+    return (match_data['id'], match_data['date'], match_data['day'],
+            match_data['team1Id'], match_data['team2Id'],
+            1 if match_data.get('completed') else 0,
+            match_data.get('winnerId') or None, match_data.get('score'),
+            json.dumps(match_data.get('scores', [])), match_data.get('courseId') or None)
+
+
+def player_stats_params(stats: Dict) -> tuple:
+    """Build player_stats row parameters from a stats dictionary."""
+    return (stats['playerId'], stats['name'], stats['teamId'], stats['rounds'],
+            stats['totalScore'], stats['averageScore'], stats['recentAverage'],
+            stats['bestScore'], stats['bestDate'], stats['worstScore'], stats['lastScore'],
+            stats['lastDate'], stats['handicap'], stats['handicapTrend'])
+
+
+def record_params(key: tuple, totals) -> tuple:
+    """Build team record row parameters from a key and totals in RECORD_TOTAL_COLUMNS order."""
+    return key + tuple(totals)
+
+
+def update_params(params: tuple) -> tuple:
+    """Reorder insert parameters for an UPDATE ... WHERE id = ? statement."""
+    return params[1:] + params[:1]
+
+
+# Row decoders. Rows are tuples in *_COLUMNS order, followed by the version if versioned.
+def row_to_course(row) -> Dict:
+    """Convert a course row to a course dictionary."""
+    return {'id': row[0], 'name': row[1], 'holes': _loads(row[2])}
+
+
+def row_to_team(row) -> Dict:
+    """Convert a team row to a team dictionary."""
+    return {'id': row[0], 'name': row[1], 'day': row[2]}
+
+
+def row_to_player(row) -> Dict:
+    """Convert a player row to a player dictionary."""
+    history = row[4]
+    return {
+        'id': row[0],
+        'name': row[1],
+        'teamId': row[2],
+        'handicap': row[3],
+        'history': _loads(history) if history else [],
+        'version': row[5]
+    }
+
+
+def row_to_match(row) -> Dict:
+    """Convert a match row to a match dictionary."""
+    scores = row[8]
+    match_dict = {
+        'id': row[0],
+        'date': row[1],
+        'day': row[2],
+        'team1Id': row[3],
+        'team2Id': row[4],
+        'completed': bool(row[5]),
+        'scores': _loads(scores) if scores else [],
+        'version': row[10]
+    }
+    if row[6]:
+        match_dict['winnerId'] = row[6]
+    if row[7]:
+        match_dict['score'] = row[7]
+    if row[9]:
+        match_dict['courseId'] = row[9]
+    return match_dict
+
+
+def row_to_player_stats(row) -> Dict:
+    """Convert a player_stats row to a stats dictionary."""
+    return {
+        'playerId': row[0],
+        'name': row[1],
+        'teamId': row[2],
+        'rounds': row[3],
+        'totalScore': row[4],
+        'averageScore': row[5],
+        'recentAverage': row[6],
+        'bestScore': row[7],
+        'bestDate': row[8],
+        'worstScore': row[9],
+        'lastScore': row[10],
+        'lastDate': row[11],
+        'handicap': row[12],
+        'handicapTrend': row[13]
+    }
+
+
+def row_to_match_result(row) -> Dict:
+    """Convert a MATCH_RESULT_COLUMNS row to the match fields team records are built from."""
+    return {'date': row[0], 'day': row[1], 'team1Id': row[2], 'team2Id': row[3],
+            'completed': bool(row[4]), 'winnerId': row[5], 'score': row[6]}
+
+
+def row_to_team_h2h(row) -> Dict:
+    """Convert a team_h2h row to a head-to-head record."""
+    return to_record(row[2:], teamId=row[0], opponentId=row[1])
+
+
+def row_to_team_season(row) -> Dict:
+    """Convert a team_seasons row to a season record."""
+    return to_record(row[3:], teamId=row[0], season=row[1], day=row[2])
@@ -0,0 +1,167 @@
+"""
+Per-league storage routing.
+Keeps one storage instance (and therefore one set of connections) per league, evicting the
+least recently used and idle leagues so a single process can serve hundreds of leagues.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, List, Union
+from backend.storage.base import StorageInterface
+
+if TYPE_CHECKING:
+    from backend.storage.cache import CachedStorage
+    from backend.storage.write_buffer import BufferedStorage
+
+# An opened storage: a backend, or a caching or score buffering wrapper delegating to one
+Storage = Union[StorageInterface, 'CachedStorage', 'BufferedStorage']
+
+LEAGUE_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def validate_league(league: str) -> str:
+    """Check that a league identifier is safe to use in file and schema names."""
+    if not LEAGUE_PATTERN.match(league or ''):
+        raise ValueError('League identifiers are 1-64 letters, digits, dashes or underscores')
+    return league
+
+
+class _Tenant:
+    """A league's open storage and its usage bookkeeping."""
+
+    __slots__ = ('storage', 'last_used', 'users', 'evicted')
+
+    def __init__(self, storage: Storage):
+        self.storage = storage
+        self.last_used = time.monotonic()
+        self.users = 0
+        self.evicted = False
+
+
+class TenantRegistry:
+    """LRU registry of per-league storage instances."""
+
+    def __init__(self, factory: Callable[[str], Storage], max_open: int = 64,
+                 idle_seconds: float = 600):
+        """
+        Initialize the registry.
+
+        factory opens the storage for a league. At most max_open leagues stay open; leagues
+        unused for idle_seconds are closed on the next acquire. A storage that is evicted
+        while requests are using it is closed when the last of them releases it.
+        """
+        self.factory = factory
+        self.max_open = max_open
+        self.idle_seconds = idle_seconds
+        self._tenants: 'OrderedDict[str, _Tenant]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._opening: Dict[str, threading.Lock] = {}
+        # Evicted leagues still in use; a league is never open twice, so they are revived
+        # rather than reopened when requested again
+        self._evicted: Dict[str, _Tenant] = {}
+
+    def acquire(self, league: str) -> Storage:
+        """Get the storage for a league and mark it in use until release() is called."""
+        validate_league(league)
+        with self._lock:
+            tenant = self._checkout(league)
+            to_close = self._evict()
+            if tenant is None:
+                opening = self._opening.setdefault(league, threading.Lock())
+        self._close(to_close)
+        if tenant is not None:
+            return tenant.storage
+        # Open outside the registry lock so a slow schema check only blocks this league
+        with opening:
+            with self._lock:
+                tenant = self._checkout(league)
+            if tenant is not None:
+                return tenant.storage
+            try:
+                storage = self.factory(league)
+            except BaseException:
+                # Waiters on this lock retry the open; later callers get a new lock
+                with self._lock:
+                    self._opening.pop(league, None)
+                raise
+            with self._lock:
+                self._opening.pop(league, None)
+                # After a failed open a retry under a new lock may have won the race
+                tenant = self._checkout(league)
+                if tenant is None:
+                    tenant = self._tenants[league] = _Tenant(storage)
+                    tenant.users += 1
+                    to_close = self._evict()
+                else:
+                    to_close = [storage]
+            self._close(to_close)
+            return tenant.storage
+
+    def release(self, league: str, storage: Storage):
+        """Mark a storage returned by acquire() as no longer in use."""
+        with self._lock:
+            tenant = self._tenants.get(league) or self._evicted.get(league)
+            if tenant is None or tenant.storage is not storage:
+                return
+            tenant.users -= 1
+            tenant.last_used = time.monotonic()
+            close = tenant.evicted and tenant.users == 0
+            if close:
+                del self._evicted[league]
+        if close:
+            storage.close()
+
+    def close_all(self):
+        """Close every open league."""
+        with self._lock:
+            tenants = [*self._tenants.values(), *self._evicted.values()]
+            self._tenants.clear()
+            self._evicted.clear()
+        for tenant in tenants:
+            tenant.storage.close()
+
+    def open_leagues(self):
+        """Get the identifiers of the currently open leagues, most recently used last."""
+        with self._lock:
+            return list(self._tenants)
+
+    def _checkout(self, league: str):
+        """Mark an open league as used; caller holds the lock."""
+        tenant = self._tenants.get(league)
+        if tenant is None and league in self._evicted:
+            tenant = self._tenants[league] = self._evicted.pop(league)
+            tenant.evicted = False
+        if tenant is not None:
+            self._tenants.move_to_end(league)
+            tenant.users += 1
+            tenant.last_used = time.monotonic()
+        return tenant
+
+    def _evict(self) -> List[Storage]:
+        """
+        Remove leagues over the size limit or past the idle timeout; caller holds the lock.
+
+        Returns the storages that can be closed now. Those still in use are closed by
+        release() once their last user is done.
+        """
+        now = time.monotonic()
+        to_close = []
+        for league, tenant in list(self._tenants.items()):
+            over_limit = len(self._tenants) > self.max_open
+            idle = tenant.users == 0 and now - tenant.last_used > self.idle_seconds
+            if not (over_limit or idle):
+                break
+            del self._tenants[league]
+            tenant.evicted = True
+            if tenant.users:
+                self._evicted[league] = tenant
+            else:
+                to_close.append(tenant.storage)
+        return to_close
+
+    @staticmethod
+    def _close(storages: List[Storage]):
+        """Close evicted storages outside the registry lock."""
+        for storage in storages:
+            storage.close()
@@ -0,0 +1,335 @@
+"""
+Write-behind buffering for hole-by-hole score entry.
+Hole scores are appended to a local log before they are acknowledged, coalesced per match in
+memory, and written to storage in batched transactions on a timer or once enough are pending.
+Reads through BufferedStorage see buffered scores immediately.
+"""
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+from backend.services.scoring import merge_hole_scores
+from backend.storage import journal
+from backend.storage.tenancy import Storage
+
+logger = logging.getLogger(__name__)
+
+# (match id, player id, hole number, gross score or None to clear the hole)
+HoleScore = Tuple[str, str, int, Optional[int]]
+# Flushes coalesce scores from many requests, so the journal attributes them to the buffer
+FLUSH_ACTOR = 'score-buffer'
+
+Read = TypeVar('Read', Optional[Dict], List[Dict])
+
+
+class ScoreWriteBuffer:
+    """Durable, coalescing write-behind buffer for hole scores."""
+
+    def __init__(self, storage: Storage, log_path: str, flush_interval: float = 0.5,
+                 max_pending: int = 200, sync_writes: bool = True, lock_timeout: float = 2.0):
+        """
+        Initialize the buffer and replay scores left in the log by a previous process.
+
+        The log belongs to one buffer at a time: its lock file (log_path.lock) is held until
+        close(). If another buffer holds it, this waits up to lock_timeout seconds, long enough
+        for one that is closing in this process, and then raises RuntimeError.
+
+        The log is split into numbered segments (log_path.1, log_path.2, ...). Each flush seals
+        the current segment and deletes it once storage has committed its scores, so a crash at
+        any point loses no acknowledged score. Buffered scores are flushed every flush_interval
+        seconds, or as soon as max_pending holes are waiting. sync_writes fsyncs the log before
+        a score is acknowledged.
+        """
+        self.storage = storage
+        self.log_path = log_path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.sync_writes = sync_writes
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # match id -> player id -> hole -> gross; _flushing holds the batch being written
+        self._pending: Dict[str, Dict[str, Dict[str, Optional[int]]]] = {}
+        self._flushing: Dict[str, Dict[str, Dict[str, Optional[int]]]] = {}
+        # Counts the flushes that have finished, so reads can tell one finished under them
+        self._flushes = 0
+        self._pending_holes = 0
+        self._sealed: List[str] = []
+        Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock_file = self._lock_log(lock_timeout)
+        self._segment = self._recover()
+        # The open segment and lock file are held until close()
+        self._log = open(self._segment_path(self._segment), 'a', encoding='utf-8')  # noqa: SIM115
+        self._closed = False
+        self._wake = threading.Event()
+        if self._pending:
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Error flushing recovered scores')
+        self._thread = threading.Thread(target=self._run, name='score-write-buffer', daemon=True)
+        self._thread.start()
+
+    # Log segments
+    def _lock_log(self, timeout: float):
+        """Take the log's lock file, waiting up to timeout seconds for its holder to close."""
+        lock_file = open(f'{self.log_path}.lock', 'a')  # noqa: SIM115 - released in close()
+        give_up_at = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return lock_file
+            except BlockingIOError:
+                if time.monotonic() >= give_up_at:
+                    lock_file.close()
+                    raise RuntimeError(
+                        f'Score log {self.log_path} is in use by another process; run one API '
+                        'process per SCORE_BUFFER_DIR or set SCORE_BUFFER_ENABLED=false'
+                    ) from None
+                time.sleep(0.05)
+
+    def _segment_path(self, number: int) -> str:
+        return f'{self.log_path}.{number}'
+
+    def _recover(self) -> int:
+        """Replay every existing log segment into the pending set and return the next number."""
+        directory = os.path.dirname(self.log_path) or '.'
+        prefix = os.path.basename(self.log_path) + '.'
+        numbers = sorted(int(name[len(prefix):]) for name in os.listdir(directory)
+                         if name.startswith(prefix) and name[len(prefix):].isdigit())
+        for number in numbers:
+            path = self._segment_path(number)
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final record: it was never acknowledged
+                        break
+                    self._merge(entry['matchId'], entry['playerId'], entry['hole'],
+                                entry['score'])
+            self._sealed.append(path)
+        return numbers[-1] + 1 if numbers else 1
+
+    def _merge(self, match_id: str, player_id: str, hole, score: Optional[int]):
+        """Coalesce a hole score into the pending set; caller holds the lock."""
+        holes = self._pending.setdefault(match_id, {}).setdefault(player_id, {})
+        if str(hole) not in holes:
+            self._pending_holes += 1
+        holes[str(hole)] = score
+
+    # Recording and reading
+    def record(self, scores: List[HoleScore]):
+        """Durably log hole scores and buffer them; returns once they survive a crash."""
+        if self._closed:
+            raise RuntimeError('Score buffer is closed')
+        lines = ''.join(json.dumps({'matchId': match_id, 'playerId': player_id, 'hole': hole,
+                                    'score': score}, separators=(',', ':')) + '\n'
+                        for match_id, player_id, hole, score in scores)
+        with self._lock:
+            self._log.write(lines)
+            self._log.flush()
+            if self.sync_writes:
+                os.fsync(self._log.fileno())
+            for match_id, player_id, hole, score in scores:
+                self._merge(match_id, player_id, hole, score)
+            full = self._pending_holes >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def pending_matches(self) -> int:
+        """Get the number of matches with scores not yet written to storage."""
+        with self._lock:
+            return len(self._pending.keys() | self._flushing.keys())
+
+    def has_scores(self, match_id: str) -> bool:
+        """Whether a match has scores not yet written to storage."""
+        with self._lock:
+            return match_id in self._pending or match_id in self._flushing
+
+    def read(self, fetch: Callable[[], Read]) -> Read:
+        """
+        Read a match (or None) or a list of matches from storage and apply buffered scores.
+
+        A flush that commits after fetch has read storage but finishes before the scores are
+        applied would leave its scores in neither, so fetch is repeated until no flush has
+        finished in between.
+        """
+        while True:
+            flushes = self._flushes
+            result = fetch()
+            if flushes == self._flushes and not (self._pending or self._flushing):
+                return result
+            with self._lock:
+                if flushes != self._flushes:
+                    continue
+                if isinstance(result, list):
+                    return [self._overlay(match) for match in result]
+                return None if result is None else self._overlay(result)
+
+    def _overlay(self, match: Dict) -> Dict:
+        """Apply buffered scores to a match; caller holds the lock."""
+        for batch in (self._flushing, self._pending):
+            if match['id'] in batch:
+                match = {**match, 'scores': merge_hole_scores(match.get('scores') or [],
+                                                              batch[match['id']])}
+        return match
+
+    # Flushing
+    def flush(self) -> int:
+        """Write all buffered scores to storage in one transaction; returns matches updated."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending, self._pending_holes = self._pending, {}, 0
+                self._flushing = batch
+                # Seal the current segment; scores recorded from now on go to a new one
+                self._log.close()
+                sealed = self._sealed + [self._segment_path(self._segment)]
+                self._sealed = []
+                self._segment += 1
+                self._log = open(  # noqa: SIM115 - closed when sealed or in close()
+                    self._segment_path(self._segment), 'a', encoding='utf-8')
+            try:
+                with journal.acting_as(FLUSH_ACTOR):
+                    updated = self.storage.apply_hole_scores(batch)
+            except Exception:
+                with self._lock:
+                    # Put the batch back underneath anything recorded since
+                    newer, self._pending, self._pending_holes = self._pending, {}, 0
+                    for source in (batch, newer):
+                        for match_id, players in source.items():
+                            for player_id, holes in players.items():
+                                for hole, score in holes.items():
+                                    self._merge(match_id, player_id, hole, score)
+                    self._flushing = {}
+                    self._flushes += 1
+                    self._sealed = sealed + self._sealed
+                raise
+            with self._lock:
+                self._flushing = {}
+                self._flushes += 1
+            for path in sealed:
+                os.remove(path)
+            return updated
+
+    def _run(self):
+        """Flush on the timer, or early when record() reports a full buffer."""
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._closed:
+                return
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Error flushing buffered scores')
+
+    def close(self):
+        """Stop the flush thread and write out everything still buffered."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._log.close()
+                if not self._pending and not self._sealed:
+                    # Nothing left to recover; drop the empty segment
+                    os.remove(self._segment_path(self._segment))
+            # Closing the file releases the lock for the next owner
+            self._lock_file.close()
+
+
+class BufferedStorage:
+    """
+    Storage wrapper that takes hole scores through a ScoreWriteBuffer.
+
+    Match reads include buffered scores, and whole-match writes flush the buffer first so an
+    older buffered hole can never overwrite a newer full update. Everything else is delegated
+    to the wrapped storage.
+    """
+
+    def __init__(self, storage: Storage, buffer: ScoreWriteBuffer):
+        self.storage = storage
+        self.score_buffer = buffer
+
+    def __getattr__(self, name):
+        return getattr(self.storage, name)
+
+    def record_hole_scores(self, scores: List[HoleScore]):
+        """Buffer hole scores for a write-behind flush."""
+        self.score_buffer.record(scores)
+
+    def get_match(self, match_id: str) -> Optional[Dict]:
+        """Get a match including buffered scores."""
+        return self.score_buffer.read(lambda: self.storage.get_match(match_id))
+
+    def get_matches(self) -> List[Dict]:
+        """Get all matches including buffered scores."""
+        return self.score_buffer.read(self.storage.get_matches)
+
+    def get_matches_by_date(self, date: str) -> List[Dict]:
+        """Get the matches on a date including buffered scores."""
+        return self.score_buffer.read(lambda: self.storage.get_matches_by_date(date))
+
+    def flush_scores(self, match_id: str):
+        """Write buffered scores of a match, so its stored version is the one that holds them."""
+        if self.score_buffer.has_scores(match_id):
+            self.score_buffer.flush()
+
+    def update_match(self, match_id: str, match_data: Dict,
+                     expected_version: Optional[int] = None) -> Dict:
+        """Flush buffered scores, then update the match."""
+        self.score_buffer.flush()
+        return self.storage.update_match(match_id, match_data, expected_version)
+
+    def apply_hole_scores(self, updates: Dict[str, Dict[str, Dict[str, Optional[int]]]],
+                          expected_versions: Optional[Dict[str, int]] = None) -> int:
+        """Flush buffered scores, then write these scores directly."""
+        self.score_buffer.flush()
+        return self.storage.apply_hole_scores(updates, expected_versions)
+
+    def delete_match(self, match_id: str) -> bool:
+        """Flush buffered scores, then delete the match."""
+        self.score_buffer.flush()
+        return self.storage.delete_match(match_id)
+
+    def delete_matches(self, match_ids: List[str]) -> int:
+        """Flush buffered scores, then delete the matches."""
+        self.score_buffer.flush()
+        return self.storage.delete_matches(match_ids)
+
+    def delete_team(self, team_id: str) -> bool:
+        """Flush buffered scores, then delete the team and possibly its matches."""
+        self.score_buffer.flush()
+        return self.storage.delete_team(team_id)
+
+    def purge_orphans(self, limit: int) -> Dict[str, int]:
+        """Flush buffered scores, then repair orphaned records."""
+        self.score_buffer.flush()
+        return self.storage.purge_orphans(limit)
+
+    def import_records(self, table: str, records: List[Dict]) -> int:
+        """Flush buffered scores, then load the records."""
+        self.score_buffer.flush()
+        return self.storage.import_records(table, records)
+
+    def initialize_data(self, data: Dict) -> bool:
+        """Flush buffered scores, then load seed data."""
+        self.score_buffer.flush()
+        return self.storage.initialize_data(data)
+
+    def close(self):
+        """Flush and stop the buffer, then close the wrapped storage."""
+        try:
+            self.score_buffer.close()
+        finally:
+            self.storage.close()
@@ -0,0 +1,108 @@
+"""
+Measure write latency while readers overload the API, with and without admission control.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_admission [--readers 16] [--seconds 5] [--max-concurrent 4]
+
+Reader threads fetch /api/matches in a loop as fast as they can while one scorekeeper enters
+a hole score every 20 ms. Without admission control every request competes for the
+interpreter and the database at once; with it at most --max-concurrent requests run, queued
+score writes go ahead of queued reads, and readers beyond the queue limits are shed with 503.
+Rate limits are set high so only the concurrency gate is measured.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from benchmarks.league_data import make_league
+
+
+def percentile(values, fraction: float) -> float:
+    """Return a percentile of the values in milliseconds."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+
+def reader(app, index: int, deadline: float, statuses: Counter):
+    """Fetch all matches until the deadline, as one client."""
+    client = app.test_client()
+    environ = {'REMOTE_ADDR': f'10.0.0.{index}'}
+    while time.perf_counter() < deadline:
+        status = client.get('/api/matches', environ_base=environ).status_code
+        statuses[status] += 1
+        if status == 503:
+            time.sleep(0.01)
+
+
+def scorekeeper(app, match_id: str, deadline: float, latencies: list, statuses: Counter):
+    """Enter a hole score every 20 ms until the deadline."""
+    client = app.test_client()
+    hole = 0
+    while time.perf_counter() < deadline:
+        hole = hole % 18 + 1
+        start = time.perf_counter()
+        response = client.patch(f'/api/matches/{match_id}/scores',
+                                json={'playerId': 'p0', 'hole': hole, 'score': 4},
+                                environ_base={'REMOTE_ADDR': '10.0.1.1'})
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status_code] += 1
+        time.sleep(0.02)
+
+
+def run(app, match_id: str, readers: int, seconds: float):
+    """Run the readers and the scorekeeper and return write latencies and status counts."""
+    deadline = time.perf_counter() + seconds
+    read_statuses, write_statuses, latencies = Counter(), Counter(), []
+    threads = [threading.Thread(target=reader, args=(app, index, deadline, read_statuses))
+               for index in range(readers)]
+    threads.append(threading.Thread(target=scorekeeper, args=(
+        app, match_id, deadline, latencies, write_statuses)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, read_statuses, write_statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--readers', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--max-concurrent', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            'STORAGE_TYPE': 'sqlite', 'DATABASE_PATH': os.path.join(tmp, 'b.db'),
+            'RATE_LIMIT_READ': '10000/10000', 'RATE_LIMIT_SCORES': '10000/10000',
+            'ADMISSION_MAX_CONCURRENT': str(args.max_concurrent),
+            'ADMISSION_MAX_QUEUE': str(args.readers // 2),
+        })
+        from backend.app import create_app
+        league = make_league(teams=40, matches=500)
+        match_id = league['matches'][0]['id']
+
+        for index, enabled in enumerate(('false', 'true')):
+            os.environ['ADMISSION_ENABLED'] = enabled
+            os.environ['SCORE_BUFFER_DIR'] = os.path.join(tmp, f'score_buffer{index}')
+            app = create_app()
+            if index == 0:
+                app.test_client().post('/api/initialize', json=league)
+            latencies, reads, writes = run(app, match_id, args.readers, args.seconds)
+            label = 'admission on' if enabled == 'true' else 'admission off'
+            print(f'{label:<14} {len(latencies):>4} writes  '
+                  f'p50 {percentile(latencies, 0.5):7.1f} ms  '
+                  f'p99 {percentile(latencies, 0.99):7.1f} ms  '
+                  f'reads ok {reads[200] / args.seconds:6.0f}/s  shed {reads[503]:>5}  '
+                  f'write errors {sum(writes.values()) - writes[202]}')
+            if enabled == 'true':
+                print(f'  metrics {app.test_client().get("/api/admission/metrics").get_json()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Compare full-table reads from SQLite with the per-process and shared cache tiers.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_cache [--matches 20000] [--teams 200] [--repeat 20]
+
+Reads every player and match straight from storage, from the shared tier as a second worker
+process finds it after another has loaded it, and from the per-process LRU. Also reports what
+invalidating the cache adds to a player update.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from backend.storage import CachedStorage, LocalSharedTier, LRUCache, SQLiteStorage
+from benchmarks.league_data import make_league
+
+
+def mean_ms(fn, repeat: int) -> float:
+    """Mean milliseconds of fn() over repeat runs."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--matches', type=int, default=20000)
+    parser.add_argument('--teams', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    league = make_league(teams=args.teams, matches=args.matches)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'cache.db'))
+        storage.initialize_data(league)
+        shared = LocalSharedTier(os.path.join(tmp, 'cache'))
+        cached = CachedStorage(storage, shared)
+        print(f'{"":<10}{"storage":>12}{"shared":>12}{"local":>12}')
+        for read in ('get_players', 'get_matches'):
+            direct = mean_ms(getattr(storage, read), args.repeat)
+            getattr(cached, read)()
+
+            def second_worker(read=read):
+                # A fresh LRU per read, as in a worker process that has not read it yet
+                getattr(CachedStorage(storage, shared, LRUCache()), read)()
+
+            from_shared = mean_ms(second_worker, args.repeat)
+            from_local = mean_ms(getattr(cached, read), args.repeat)
+            print(f'{read[4:]:<10}{direct:>10.2f}ms{from_shared:>10.2f}ms{from_local:>10.4f}ms')
+
+        player = storage.get_players()[0]
+        updates = max(args.repeat, 100)
+        plain = mean_ms(lambda: storage.update_player(player['id'], player), updates)
+        invalidating = mean_ms(lambda: cached.update_player(player['id'], player), updates)
+        print(f'player update {plain:.3f} ms, with invalidation {invalidating:.3f} ms')
+        print(cached.cache_stats())
+        shared.close()
+        storage.close()
+
+
+if __name__ == '__main__':
+    main()
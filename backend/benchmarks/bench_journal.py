@@ -0,0 +1,94 @@
+"""
+Measure what the write journal costs and how fast point-in-time reads are.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_journal [--matches 20000] [--updates 2000] [--lookups 500]
+
+Updates random matches with and without journalling, reports the journal's size against the
+records as JSON, then reads random matches as of random times through the journal index and by
+replaying the whole journal, as a log without per-record indexes would need. Finally compacts
+the journal up to the middle of the updates.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from backend.storage import SQLiteStorage, journal
+from benchmarks.league_data import make_league
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--matches', type=int, default=20000)
+    parser.add_argument('--updates', type=int, default=2000)
+    parser.add_argument('--lookups', type=int, default=500)
+    args = parser.parse_args()
+    rng = random.Random(1)
+    league = make_league(teams=200, matches=args.matches, history=0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, 'journal.db'))
+        storage.initialize_data(league)
+        matches = storage.get_matches()
+
+        def update(count):
+            start = time.perf_counter()
+            for match in rng.sample(matches, count):
+                storage.update_match(match['id'], {**match, 'score': f'{rng.randint(0, 18)} - 9'})
+            return (time.perf_counter() - start) * 1000 / count
+
+        journalled = storage._journal
+        storage._journal = lambda conn, table, rows: None
+        try:
+            plain_ms = update(args.updates // 2)
+        finally:
+            storage._journal = journalled
+        started = journal.now()
+        journal_ms = update(args.updates)
+        middle = (started + journal.now()) / 2
+        print(f'match update {plain_ms:.3f} ms, journalled {journal_ms:.3f} ms')
+
+        entries, stored = storage._fetchone('SELECT COUNT(*), SUM(LENGTH(data)) FROM journal')
+        as_json = sum(len(json.dumps(match)) for match in matches) / len(matches)
+        print(f'{entries} entries, {stored / entries:.0f} bytes each '
+              f'(a match averages {as_json:.0f} bytes as JSON)')
+
+        ids = [match['id'] for match in rng.sample(matches, args.lookups)]
+        times = [rng.uniform(started, journal.now()) for _ in ids]
+        start = time.perf_counter()
+        found = [storage.get_as_of('matches', match_id, at) for match_id, at in zip(ids, times)]
+        indexed_ms = (time.perf_counter() - start) * 1000 / len(ids)
+
+        def replay(match_id, at):
+            state = None
+            for row in storage._fetchall('SELECT entity, entity_id, op, data FROM journal '
+                                         'WHERE at <= ? ORDER BY at, seq', (at,)):
+                if row[0] == 'matches' and row[1] == match_id:
+                    state = row[3] if row[2] == journal.PUT else None
+            return state
+
+        replays = min(len(ids), 5)
+        start = time.perf_counter()
+        for match_id, at in zip(ids[:replays], times[:replays]):
+            replay(match_id, at)
+        replay_ms = (time.perf_counter() - start) * 1000 / replays
+        assert all(record is not None for record in found)
+        print(f'as-of read {indexed_ms:.3f} ms through the index, {replay_ms:.1f} ms replaying')
+
+        start = time.perf_counter()
+        dropped = 0
+        while True:
+            count = storage.compact_journal(middle, 500)
+            dropped += count
+            if not count:
+                break
+        compact_ms = (time.perf_counter() - start) * 1000
+        print(f'compaction dropped {dropped} entries in {compact_ms:.0f} ms')
+        storage.close()
+
+
+if __name__ == '__main__':
+    main()
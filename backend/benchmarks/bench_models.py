@@ -0,0 +1,95 @@
+"""
+Compare the compact scorecard models with the API dictionary shapes.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_models [--matches 20000] [--repeat 5]
+
+Measures the memory held by a season of match scores as dictionaries and as MatchCard byte
+arrays, the cost of converting between them, and a typical computation (player totals and
+per-hole averages) run repeatedly on each representation.
+"""
+import argparse
+import time
+import tracemalloc
+
+from backend.models import CourseLayout, MatchCard
+from backend.services.scoring import HOLES
+from benchmarks.league_data import make_course, make_league
+
+
+def held_memory(build) -> float:
+    """Return the MB still allocated by the object build() returns."""
+    tracemalloc.start()
+    result = build()
+    held = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    del result
+    return held
+
+
+def dict_stats(matches):
+    """Player totals and hole sums by walking the nested score dictionaries."""
+    totals, sums, counts = {}, [0] * HOLES, [0] * HOLES
+    for match in matches:
+        for card in match['scores']:
+            total = 0
+            for hole, gross in card['scores'].items():
+                total += gross
+                sums[int(hole) - 1] += gross
+                counts[int(hole) - 1] += 1
+            totals[card['playerId']] = totals.get(card['playerId'], 0) + total
+    return totals, sums, counts
+
+
+def card_stats(cards):
+    """The same results from MatchCard arrays, slicing per player and per hole."""
+    totals, sums, counts = {}, [0] * HOLES, [0] * HOLES
+    for card in cards:
+        for index, player_id in enumerate(card.players):
+            totals[player_id] = totals.get(player_id, 0) + card.total(index)
+        for hole in range(HOLES):
+            scores = card.hole(hole + 1)
+            sums[hole] += sum(scores)
+            counts[hole] += len(scores) - scores.count(0)
+    return totals, sums, counts
+
+
+def timed(fn, repeat: int) -> float:
+    """Return the mean milliseconds of fn() over repeat runs."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--matches', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    matches = make_league(teams=40, matches=args.matches, history=0)['matches']
+    scores = [match['scores'] for match in matches]
+    cards = [MatchCard.from_match(match) for match in matches]
+    assert dict_stats(matches) == card_stats(cards)
+
+    players = sum(len(card.players) for card in cards)
+    print(f'{args.matches} matches, {players} player cards')
+    dict_mb = held_memory(lambda: [[{**card, 'scores': dict(card['scores'])} for card in s]
+                                   for s in scores])
+    card_mb = held_memory(lambda: [MatchCard.from_match(match) for match in matches])
+    print(f'memory      dicts {dict_mb:8.1f} MB   cards {card_mb:8.1f} MB')
+    to_cards = timed(lambda: [MatchCard.from_match(match) for match in matches], 1)
+    to_dicts = timed(lambda: [card.to_scores() for card in cards], 1)
+    print(f'convert     to cards {to_cards:8.1f} ms   to dicts {to_dicts:8.1f} ms')
+    print(f'compute     dicts {timed(lambda: dict_stats(matches), args.repeat):8.1f} ms   '
+          f'cards {timed(lambda: card_stats(cards), args.repeat):8.1f} ms')
+
+    course = make_course()
+    layout = CourseLayout.from_dict(course)
+    assert layout.to_dict() == course
+    print(f'course      dict {held_memory(lambda: make_course()) * 1e6:8.0f} B    '
+          f'layout {held_memory(lambda: CourseLayout.from_dict(course)) * 1e6:8.0f} B')
+
+
+if __name__ == '__main__':
+    main()
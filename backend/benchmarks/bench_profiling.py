@@ -0,0 +1,62 @@
+"""
+Measure the overhead of request profiling.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_profiling [--players 2000] [--requests 200]
+
+Times the same requests with profiling disabled, enabled but not triggered, and triggered on
+every request through the X-Profile header.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.league_data import make_league
+
+
+def measure(client, requests: int, headers=None) -> float:
+    """Return the mean latency in milliseconds of GET /api/players and /api/matches."""
+    start = time.perf_counter()
+    for index in range(requests):
+        path = '/api/players' if index % 2 else '/api/matches'
+        assert client.get(path, headers=headers or {}).status_code == 200
+    return (time.perf_counter() - start) * 1000 / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--players', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({'STORAGE_TYPE': 'sqlite', 'DATABASE_PATH': os.path.join(tmp, 'b.db'),
+                           'PROFILE_DIR': os.path.join(tmp, 'profiles')})
+        from backend.app import create_app
+        league = make_league(teams=args.players // 8, players_per_team=8, matches=2000)
+
+        modes = (('disabled', 'false', None), ('enabled, idle', 'true', None),
+                 ('every request', 'true', {'X-Profile': '1'}))
+        clients = []
+        for index, (_, enabled, _) in enumerate(modes):
+            os.environ['PROFILE_ENABLED'] = enabled
+            os.environ['SCORE_BUFFER_DIR'] = os.path.join(tmp, f'score_buffer{index}')
+            clients.append(create_app().test_client())
+        clients[0].post('/api/initialize', json=league)
+
+        # Interleave rounds so cache warmth and machine noise affect every mode alike
+        totals = [0.0] * len(modes)
+        rounds = 5
+        for _ in range(rounds):
+            for index, (_, _, headers) in enumerate(modes):
+                totals[index] += measure(clients[index], args.requests // rounds, headers)
+        base = totals[0]
+        for (label, _, _), total in zip(modes, totals):
+            overhead = (total / base - 1) * 100
+            print(f'{label:<15} {total / rounds:8.2f} ms/request  {overhead:+6.1f}%')
+        print(f'{len(os.listdir(os.environ["PROFILE_DIR"]))} profiles written')
+
+
+if __name__ == '__main__':
+    main()
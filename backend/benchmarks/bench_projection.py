@@ -0,0 +1,58 @@
+"""
+Time a standings projection in one process and split across a process pool.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_projection [--matches 2000] [--simulations 20000] [--workers 4]
+
+Projects the seasons of a generated league whose uncompleted matches are the rest of the
+season, once in-process and once with the simulations split across workers processes (the
+pool is started before timing, as it is in a running server). Exits with an error if the two
+disagree on any team's finishing chances by more than the tolerance, which is well above the
+sampling error at these simulation counts.
+"""
+import argparse
+import sys
+import time
+
+from backend.services.projection import project_standings, simulate
+from backend.storage import MemoryStorage
+from benchmarks.league_data import make_league
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--matches', type=int, default=2000)
+    parser.add_argument('--simulations', type=int, default=20000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--tolerance', type=float, default=0.03)
+    args = parser.parse_args()
+    storage = MemoryStorage()
+    storage.initialize_data(make_league(teams=40, matches=args.matches, history=0))
+    # Start the pool outside the timing
+    simulate([0, 0], [(0, 1, [0], [0], [1.0])] * 10, args.workers * 10_000,
+             workers=args.workers)
+
+    results = {}
+    for workers in (1, args.workers):
+        start = time.perf_counter()
+        results[workers] = project_standings(storage, '2024', 'Tuesday', args.simulations,
+                                             workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f'{workers:>3} worker(s) {elapsed * 1000:9.1f} ms')
+    single, parallel = results[1], results[args.workers]
+    print(f'{single["remainingMatches"]} remaining matches, {len(single["teams"])} teams, '
+          f'{args.simulations} simulations')
+    for team in single['teams'][:5]:
+        print(f'  {team["teamId"]:<5} points {team["standingPoints"]:>3} -> '
+              f'{team["projectedPoints"]:6.1f}  playoffs {team["playoffChance"]:.1%}')
+
+    other = {team['teamId']: team for team in parallel['teams']}
+    worst = max(abs(a - b) for team in single['teams']
+                for a, b in zip(team['positions'], other[team['teamId']]['positions']))
+    print(f'largest difference in a finishing chance {worst:.4f}')
+    if worst > args.tolerance:
+        sys.exit('The in-process and parallel projections disagree')
+
+
+if __name__ == '__main__':
+    main()
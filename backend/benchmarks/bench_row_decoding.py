@@ -0,0 +1,103 @@
+"""
+Microbenchmark for list reads: sqlite3.Row key lookups versus tuple rows with positional decoders.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_row_decoding [--players 12000] [--matches 20000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.league_data import make_league
+from backend.storage import SQLiteStorage
+from backend.storage.statements import SQLITE, row_to_player, row_to_match
+
+
+def keyed_player(row):
+    """The original sqlite3.Row based player decoder."""
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'teamId': row['team_id'],
+        'handicap': row['handicap'],
+        'history': json.loads(row['history']) if row['history'] else []
+    }
+
+
+def keyed_match(row):
+    """The original sqlite3.Row based match decoder."""
+    match_dict = {
+        'id': row['id'],
+        'date': row['date'],
+        'day': row['day'],
+        'team1Id': row['team1_id'],
+        'team2Id': row['team2_id'],
+        'completed': bool(row['completed']),
+        'scores': json.loads(row['scores']) if row['scores'] else []
+    }
+    if row['winner_id']:
+        match_dict['winnerId'] = row['winner_id']
+    if row['score']:
+        match_dict['score'] = row['score']
+    return match_dict
+
+
+def best_of(fn, repeat: int) -> float:
+    """Return the best wall time of fn in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def connect_per_call(db_path: str, sql: str, decode):
+    """Read the way the storage layer used to: new connection, sqlite3.Row, keyed decode."""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(sql).fetchall()
+    conn.close()
+    return [decode(row) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--players', type=int, default=12000)
+    parser.add_argument('--matches', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    league = make_league(teams=args.players // 4, players_per_team=4, matches=args.matches)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        storage = SQLiteStorage(db_path)
+        storage.initialize_data(league)
+        storage.get_players()  # warm the connection and statement cache
+
+        cases = [
+            ('players', 'SELECT * FROM players', keyed_player, storage.get_players),
+            ('matches', 'SELECT * FROM matches', keyed_match, storage.get_matches),
+        ]
+        for name, sql, keyed, fast in cases:
+            before = best_of(lambda sql=sql, keyed=keyed: connect_per_call(db_path, sql, keyed),
+                             args.repeat)
+            after = best_of(fast, args.repeat)
+            print(f'{name:<8} {len(fast()):>7} rows  row/keys {before:9.2f} ms  '
+                  f'tuple/positional {after:9.2f} ms  ({before / after:.2f}x)')
+
+        conn = sqlite3.connect(db_path)
+        for name, sql, decode in (('players', SQLITE.players.select_all, row_to_player),
+                                  ('matches', SQLITE.matches.select_all, row_to_match)):
+            rows = conn.execute(sql).fetchall()
+            ms = best_of(lambda decode=decode, rows=rows: [decode(row) for row in rows],
+                         args.repeat)
+            print(f'{name:<8} decode only {ms:9.2f} ms ({ms * 1e6 / len(rows) / 1000:.2f} us/row)')
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Benchmark round-robin schedule generation and its bulk insert.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_scheduler [--teams 50 200 500]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from backend.services.scheduler import generate_schedule
+from backend.storage import MemoryStorage, SQLiteStorage
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--teams', type=int, nargs='+', default=[50, 200, 500],
+                        help='teams per day group')
+    args = parser.parse_args()
+
+    for per_day in args.teams:
+        teams = [{'id': f't{i}', 'name': f'Team {i}', 'day': ('Tuesday', 'Thursday')[i % 2]}
+                 for i in range(per_day * 2)]
+        start = time.perf_counter()
+        schedule = generate_schedule(teams, '2025-05-01')
+        generate_ms = (time.perf_counter() - start) * 1000
+        matches = schedule['matches']
+
+        with tempfile.TemporaryDirectory() as tmp:
+            timings = []
+            for name, storage in (('sqlite', SQLiteStorage(os.path.join(tmp, 'bench.db'))),
+                                  ('memory', MemoryStorage())):
+                # Matches must reference stored teams
+                storage.initialize_data({'teams': teams})
+                start = time.perf_counter()
+                storage.create_matches(matches)
+                timings.append(f'{name} insert {(time.perf_counter() - start) * 1000:8.1f} ms')
+                storage.close()
+        print(f'{per_day:>4} teams/day  {len(matches):>7} matches  '
+              f'generate {generate_ms:8.1f} ms  ' + '  '.join(timings))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare per-hole match updates with the write-behind score buffer.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_score_buffer [--matches 20] [--players 8]
+
+Simulates live scorecard entry: every player in every match enters all 18 holes one at a
+time. The direct path rewrites the whole match for each hole, as a PUT /api/matches/<id>
+per keystroke does; the buffered path logs each hole and flushes in batches.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from backend.storage import BufferedStorage, MemoryStorage, SQLiteStorage, ScoreWriteBuffer
+from benchmarks.league_data import make_league
+
+
+def entries(matches, players: int):
+    """Yield (match id, player id, hole, score) in entry order: hole by hole, player by player."""
+    for hole in range(1, 19):
+        for match in matches:
+            for index in range(players):
+                yield match['id'], f'p{index}', hole, 3 + (hole + index) % 4
+
+
+def direct(storage, matches, players: int) -> int:
+    """Read-modify-write the full match for every hole."""
+    count = 0
+    for match_id, player_id, hole, score in entries(matches, players):
+        match = storage.get_match(match_id)
+        cards = {card['playerId']: card for card in match['scores']}
+        cards.setdefault(player_id, {'playerId': player_id, 'scores': {}})
+        cards[player_id]['scores'][str(hole)] = score
+        storage.update_match(match_id, {**match, 'scores': list(cards.values())})
+        count += 1
+    return count
+
+
+def buffered(storage, matches, players: int) -> int:
+    """Record each hole through the buffer, then flush what is left."""
+    count = 0
+    for entry in entries(matches, players):
+        storage.record_hole_scores([entry])
+        count += 1
+    storage.score_buffer.flush()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--matches', type=int, default=20)
+    parser.add_argument('--players', type=int, default=8, help='players entering scores per match')
+    args = parser.parse_args()
+    league = make_league(teams=args.matches * 2, matches=args.matches)
+    matches = [{**match, 'scores': [], 'completed': False} for match in league['matches']]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, make in (('sqlite', lambda: SQLiteStorage(os.path.join(tmp, 'bench.db'))),
+                           ('memory', MemoryStorage)):
+            runs = [('direct', None, lambda storage: direct(storage, matches, args.players))]
+            for sync in (True, False):
+                runs.append((f'buffered sync={sync}', sync,
+                             lambda storage: buffered(storage, matches, args.players)))
+            for label, sync, fn in runs:
+                storage = make()
+                storage.initialize_data({**league, 'matches': matches})
+                if sync is not None:
+                    log_path = os.path.join(tmp, f'{name}-{sync}.log')
+                    storage = BufferedStorage(storage, ScoreWriteBuffer(
+                        storage, log_path, flush_interval=0.05, sync_writes=sync))
+                start = time.perf_counter()
+                count = fn(storage)
+                elapsed = time.perf_counter() - start
+                storage.close()
+                print(f'{name:<7} {label:<22} {count:>6} holes  {elapsed * 1000:9.1f} ms  '
+                      f'{count / elapsed:>9.0f} holes/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Measure name search latency on a large league.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_search [--players 100000] [--queries 200]
+
+Players get generated first and last names so prefixes share many words, as real rosters do.
+Short one and two letter prefixes are the worst case: they match a large part of the index
+and each backend has to stop after enough candidates instead of scanning everything.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from backend.storage import MemoryStorage, SQLiteStorage
+from benchmarks.league_data import make_league
+
+FIRST = ('James', 'Maria', 'José', 'Chen', 'Olivia', 'Liam', 'Sofía', 'Noah', 'Amélie', 'Ethan',
+         'Zoë', 'Lucas', 'Hannah', 'Mateo', 'Ingrid', 'Kenji', 'Fatima', 'Owen', 'Priya', 'Sam')
+LAST = ('Smith', 'Johnson', 'García', 'Müller', 'Nguyen', 'O\'Brien', 'Kowalski', 'Rossi',
+        'Schmidt', 'Martínez', 'Brown', 'Tanaka', 'Dubois', 'Andersson', 'Silva', 'Patel')
+
+
+def named_league(players: int) -> dict:
+    """Build a league and give every player a generated name."""
+    league = make_league(teams=max(1, players // 4), matches=0, history=0)
+    rng = random.Random(7)
+    for player in league['players']:
+        player['name'] = f'{rng.choice(FIRST)} {rng.choice(LAST)}-{rng.randrange(10000)}'
+    return league
+
+
+def queries(count: int):
+    """Yield (kind, query) pairs for each query shape."""
+    rng = random.Random(11)
+    shapes = {
+        'prefix 1': lambda: rng.choice(LAST)[:1],
+        'prefix 3': lambda: rng.choice(LAST)[:3],
+        'full word': lambda: rng.choice(FIRST),
+        'two words': lambda: f'{rng.choice(FIRST)[:3]} {rng.choice(LAST)[:2]}',
+        'no match': lambda: 'zzqx',
+    }
+    for kind, make in shapes.items():
+        yield kind, [make() for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--players', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200, help='queries per shape')
+    args = parser.parse_args()
+    league = named_league(args.players)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, make in (('sqlite', lambda: SQLiteStorage(os.path.join(tmp, 'bench.db'))),
+                           ('memory', MemoryStorage)):
+            storage = make()
+            start = time.perf_counter()
+            storage.initialize_data(league)
+            print(f'{name}: loaded {len(league["players"])} players in '
+                  f'{time.perf_counter() - start:.1f} s')
+            for kind, batch in queries(args.queries):
+                timings = []
+                for query in batch:
+                    start = time.perf_counter()
+                    storage.search(query, 10)
+                    timings.append(time.perf_counter() - start)
+                timings.sort()
+                print(f'  {kind:<10} mean {statistics.mean(timings) * 1000:7.2f} ms  '
+                      f'p99 {timings[int(len(timings) * 0.99) - 1] * 1000:7.2f} ms')
+            storage.close()
+
+
+if __name__ == '__main__':
+    main()
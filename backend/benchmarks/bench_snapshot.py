@@ -0,0 +1,90 @@
+"""
+Compare binary snapshots with the JSON /initialize path for copying a league.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_snapshot [--matches 20000] [--teams 200]
+
+Copies one SQLite league into a new SQLite database both ways and reports the transfer size,
+the time and the peak Python memory of each side. The JSON path builds and parses the whole
+league as one document, as a POST /api/initialize body does. Memory is traced in a second run
+of each step, since tracing slows Python down.
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from backend.services import snapshot
+from backend.storage import SQLiteStorage
+from benchmarks.league_data import make_league
+
+
+def timed(fn):
+    """Run fn and return its result and the seconds it took."""
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def peak_memory(fn) -> float:
+    """Run fn and return its peak traced memory in MB."""
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--matches', type=int, default=20000)
+    parser.add_argument('--teams', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = SQLiteStorage(os.path.join(tmp, 'source.db'))
+        source.initialize_data(make_league(teams=args.teams, matches=args.matches))
+
+        def export_json():
+            return json.dumps({'courses': source.get_courses(), 'teams': source.get_teams(),
+                               'players': source.get_players(),
+                               'matches': source.get_matches()}).encode('utf-8')
+
+        def export_snapshot():
+            return b''.join(snapshot.write_snapshot(source))
+
+        def stream_snapshot():
+            # What a client streaming the export to disk holds: one chunk at a time
+            for _ in snapshot.write_snapshot(source):
+                pass
+
+        results = []
+        for label, export, stream, load in (
+                ('json', export_json, export_json,
+                 lambda storage, data: storage.initialize_data(json.loads(data))),
+                ('snapshot', export_snapshot, stream_snapshot,
+                 lambda storage, data: snapshot.import_snapshot(storage, io.BytesIO(data)))):
+            data, export_time = timed(export)
+            export_peak = peak_memory(stream)
+            targets = [SQLiteStorage(os.path.join(tmp, f'{label}{run}.db')) for run in (1, 2)]
+            _, import_time = timed(
+                lambda load=load, target=targets[0], data=data: load(target, data))
+            import_peak = peak_memory(
+                lambda load=load, target=targets[1], data=data: load(target, data))
+            for target in targets:
+                assert len(target.get_matches()) == args.matches
+                target.close()
+            results.append((label, len(data), export_time, export_peak, import_time, import_peak))
+        source.close()
+
+    print(f'{"":<10}{"size":>10}{"export":>10}{"peak":>10}{"import":>10}{"peak":>10}')
+    for label, size, export_time, export_peak, import_time, import_peak in results:
+        print(f'{label:<10}{size / 1e6:>8.1f}MB{export_time:>9.2f}s{export_peak:>8.1f}MB'
+              f'{import_time:>9.2f}s{import_peak:>8.1f}MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Measure cold start: import time, app creation and time to first request.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_startup [--runs 5] [--budget-ms 400]
+
+Each run starts a fresh interpreter, as a short-lived worker would. The first run creates the
+database schema; later runs reuse it and only check the recorded schema version. Exits with
+status 1 if the median time to first response exceeds the budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Runs in the child interpreter; prints one JSON line of timings in milliseconds
+CHILD = '''
+import json, sys, time
+start = time.perf_counter()
+from backend.app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+response = app.test_client().get('/api/status')
+first = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(json.dumps({
+    'import': (imported - start) * 1000,
+    'create_app': (created - imported) * 1000,
+    'first_request': (first - created) * 1000,
+    'total': (first - start) * 1000,
+    'mysql_loaded': 'mysql.connector' in sys.modules,
+}))
+'''
+
+
+def run_child(env) -> dict:
+    """Start a fresh interpreter and return its timings."""
+    output = subprocess.run([sys.executable, '-c', CHILD], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=400,
+                        help='allowed median time from interpreter start to first response')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, 'STORAGE_TYPE': 'sqlite',
+               'DATABASE_PATH': os.path.join(tmp, 'startup.db'),
+               'SCORE_BUFFER_DIR': os.path.join(tmp, 'score_buffer')}
+        results = [run_child(env) for _ in range(args.runs)]
+
+    first, warm = results[0], results[1:] or results
+    print(f'{"run":<14}{"import":>10}{"create_app":>12}{"first req":>12}{"total":>10}')
+    print(f'{"new database":<14}{first["import"]:>8.1f}ms{first["create_app"]:>10.1f}ms'
+          f'{first["first_request"]:>10.1f}ms{first["total"]:>8.1f}ms')
+    median = {key: statistics.median(run[key] for run in warm)
+              for key in ('import', 'create_app', 'first_request', 'total')}
+    print(f'{"existing (med)":<14}{median["import"]:>8.1f}ms{median["create_app"]:>10.1f}ms'
+          f'{median["first_request"]:>10.1f}ms{median["total"]:>8.1f}ms')
+    print(f'mysql.connector imported: {any(run["mysql_loaded"] for run in results)}')
+    if median['total'] > args.budget_ms:
+        print(f'Startup budget exceeded: {median["total"]:.1f} ms > {args.budget_ms:.0f} ms')
+        sys.exit(1)
+    print(f'Within startup budget of {args.budget_ms:.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
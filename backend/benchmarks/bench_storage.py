@@ -0,0 +1,71 @@
+"""
+Compare the storage backends on a synthetic league.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_storage [--teams 40] [--matches 2000] [--repeat 200]
+
+MariaDB is included when MARIADB_HOST is set; it uses the same MARIADB_* variables as
+get_storage() and a database that should be disposable.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.league_data import make_league
+from backend.storage import MemoryStorage, SQLiteStorage
+
+
+def timed(fn, repeat: int = 1) -> float:
+    """Return the mean wall time of fn in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def run(name: str, storage, league, repeat: int):
+    """Run the benchmark operations against one backend and print the results."""
+    match = league['matches'][0]
+    player = league['players'][0]
+    results = [
+        ('initialize_data', timed(lambda: storage.initialize_data(league))),
+        ('get_players', timed(storage.get_players, max(1, repeat // 20))),
+        ('get_matches', timed(storage.get_matches, max(1, repeat // 20))),
+        ('get_player', timed(lambda: storage.get_player(player['id']), repeat)),
+        ('get_match', timed(lambda: storage.get_match(match['id']), repeat)),
+        ('update_match', timed(lambda: storage.update_match(match['id'], match), repeat)),
+        ('update_player', timed(lambda: storage.update_player(player['id'], player), repeat)),
+    ]
+    for op, ms in results:
+        print(f'{name:<18}{op:<18}{ms:>10.3f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--teams', type=int, default=40)
+    parser.add_argument('--matches', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    league = make_league(teams=args.teams, matches=args.matches)
+    print(f"{len(league['players'])} players, {len(league['matches'])} matches\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run('sqlite', SQLiteStorage(os.path.join(tmp, 'bench.db')), league, args.repeat)
+        run('memory', MemoryStorage(), league, args.repeat)
+        run('memory+snapshot', MemoryStorage(os.path.join(tmp, 'snapshot.json')), league, args.repeat)
+
+    if os.getenv('MARIADB_HOST'):
+        from backend.storage import MariaDBStorage
+        run('mariadb', MariaDBStorage(
+            host=os.getenv('MARIADB_HOST'),
+            port=int(os.getenv('MARIADB_PORT', '3306')),
+            database=os.getenv('MARIADB_DATABASE', 'golf_league_bench'),
+            user=os.getenv('MARIADB_USER', 'admin'),
+            password=os.getenv('MARIADB_PASSWORD', 'admin')
+        ), league, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
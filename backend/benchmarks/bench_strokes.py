@@ -0,0 +1,85 @@
+"""
+Compare scoring matches with per-hole stroke allocation against course stroke tables.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_strokes [--matches 20000] [--repeat 3]
+
+Scores every pairing of every completed match (hole points from net scores) twice: working
+out the strokes on each hole from the two handicaps and the hole's ranking, as the scorecard
+does on every render, and looking them up in the course's stroke table. Also reports the time
+to build a table.
+"""
+import argparse
+import time
+
+from backend.models import CourseLayout, MatchCard
+from backend.services.scoring import HOLES
+from backend.services.strokes import StrokeTable, strokes_received
+from benchmarks.league_data import make_league
+
+
+def recompute_points(course, scores1, scores2, handicap1, handicap2):
+    """Hole points of a pairing, allocating strokes per hole from the course's hole rows."""
+    points1 = points2 = 0
+    for hole in course['holes']:
+        gross1 = scores1.get(str(hole['number']))
+        gross2 = scores2.get(str(hole['number']))
+        if not gross1 or not gross2:
+            continue
+        net1 = gross1 - strokes_received(round(handicap1 - handicap2), hole['handicap'])
+        net2 = gross2 - strokes_received(round(handicap2 - handicap1), hole['handicap'])
+        if net1 == net2:
+            points1 += 1
+            points2 += 1
+        elif net1 < net2:
+            points1 += 2
+        else:
+            points2 += 2
+    return points1, points2
+
+
+def timed(fn, repeat: int):
+    """Return fn()'s result and its mean milliseconds over repeat runs."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--matches', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    league = make_league(teams=40, matches=args.matches, history=0)
+    course = league['courses'][0]
+    handicaps = {player['id']: player['handicap'] for player in league['players']}
+    # The first two cards are team 1's players, paired with team 2's in order
+    matches = [match for match in league['matches'] if len(match['scores']) == 4]
+
+    def by_hole():
+        return [recompute_points(course, match['scores'][i]['scores'],
+                                 match['scores'][i + 2]['scores'],
+                                 handicaps[match['scores'][i]['playerId']],
+                                 handicaps[match['scores'][i + 2]['playerId']])
+                for match in matches for i in (0, 1)]
+
+    table, build_ms = timed(lambda: StrokeTable.from_layout(CourseLayout.from_dict(course)), 20)
+    cards = [MatchCard.from_match(match) for match in matches]
+
+    def by_table():
+        return [table.pairing_points(card.card(i), card.card(i + 2),
+                                     handicaps[card.players[i]], handicaps[card.players[i + 2]])
+                for card in cards for i in (0, 1)]
+
+    expected, hole_ms = timed(by_hole, args.repeat)
+    result, table_ms = timed(by_table, args.repeat)
+    assert result == expected
+    assert all(len(table.row(d)) == HOLES for d in (0, 54, 99))
+    print(f'{len(expected)} pairings in {len(matches)} matches')
+    print(f'per-hole allocation {hole_ms:8.1f} ms   stroke table {table_ms:8.1f} ms   '
+          f'table build {build_ms:.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Compare team record lookups with filtering every match, as clients had to before.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_team_records [--matches 20000] [--teams 200] [--lookups 200]
+
+For random teams, fetches the head-to-head record against one opponent, all head-to-head
+records and the season records, first by loading every match and aggregating it and then
+through the team record tables. Also reports the extra cost of keeping the totals on writes.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from backend.services.team_records import record_deltas
+from backend.storage import MemoryStorage, SQLiteStorage
+from benchmarks.league_data import make_league
+
+
+def scan(storage, team_id: str, opponent_id: str):
+    """Aggregate the team's records from every match."""
+    matches = [match for match in storage.get_matches()
+               if team_id in (match['team1Id'], match['team2Id'])]
+    h2h, seasons = record_deltas([], matches)
+    return h2h.get((team_id, opponent_id)), h2h, seasons
+
+
+def lookup(storage, team_id: str, opponent_id: str):
+    """Read the same records from the team record tables."""
+    return (storage.get_team_h2h(team_id, opponent_id), storage.get_team_h2h(team_id),
+            storage.get_team_seasons(team_id))
+
+
+def mean_ms(fn, pairs) -> float:
+    """Mean milliseconds of fn(team id, opponent id) over the pairs."""
+    start = time.perf_counter()
+    for team_id, opponent_id in pairs:
+        fn(team_id, opponent_id)
+    return (time.perf_counter() - start) * 1000 / len(pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--matches', type=int, default=20000)
+    parser.add_argument('--teams', type=int, default=200)
+    parser.add_argument('--lookups', type=int, default=200)
+    args = parser.parse_args()
+    league = make_league(teams=args.teams, matches=args.matches)
+    rng = random.Random(5)
+    pairs = [(match['team1Id'], match['team2Id'])
+             for match in rng.choices(league['matches'], k=args.lookups)]
+    # Scans load every match, so a few are enough for a stable mean
+    scan_pairs = pairs[:max(1, args.lookups // 20)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, storage in (('sqlite', SQLiteStorage(os.path.join(tmp, 'records.db'))),
+                               ('memory', MemoryStorage())):
+            storage.initialize_data(league)
+            scan_ms = mean_ms(lambda t, o, storage=storage: scan(storage, t, o), scan_pairs)
+            lookup_ms = mean_ms(lambda t, o, storage=storage: lookup(storage, t, o), pairs)
+            updates = rng.sample(league['matches'], min(200, len(league['matches'])))
+            start = time.perf_counter()
+            for match in updates:
+                storage.update_match(match['id'], {**match, 'completed': True,
+                                                   'winnerId': match['team1Id'],
+                                                   'score': '11 - 7'})
+            update_ms = (time.perf_counter() - start) * 1000 / len(updates)
+            print(f'{label:<8} scan {scan_ms:9.2f} ms   lookup {lookup_ms:7.3f} ms   '
+                  f'match update {update_ms:6.3f} ms')
+            storage.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Check that storage calls stop at their deadline against a deliberately slow SQLite database.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_timeouts [--deadline-ms 200] [--slack-ms 100]
+
+Runs a query that would take minutes, and writes while another connection holds the write
+lock as a second process would, first on the storage directly and then through the API. Prints
+how long each call took to fail and exits with an error if any overran its deadline by more
+than the slack.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from backend.storage.base import StorageTimeoutError
+
+# A recursive count that keeps SQLite busy far longer than any deadline
+SLOW_QUERY = ('WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n '
+              'WHERE i < 1000000000) SELECT count(*) FROM n')
+TEAM = {'id': 'slow', 'name': 'Slow Team', 'day': 'Monday'}
+
+
+def timed(fn):
+    """Run fn and return (seconds taken, status or exception name)."""
+    start = time.perf_counter()
+    try:
+        outcome = fn()
+    except (StorageTimeoutError, sqlite3.Error) as e:
+        outcome = type(e).__name__
+    return time.perf_counter() - start, outcome
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--deadline-ms', type=float, default=200)
+    parser.add_argument('--slack-ms', type=float, default=100)
+    args = parser.parse_args()
+    seconds = args.deadline_ms / 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'slow.db')
+        os.environ.update(DATABASE_PATH=db_path, STORAGE_TIMEOUT=str(seconds),
+                          SCORE_BUFFER_DIR=os.path.join(tmp, 'score_buffer'))
+        from backend.app import create_app
+        from backend.storage import SQLiteStorage, deadline
+
+        storage = SQLiteStorage(db_path, busy_timeout=30)
+        storage.initialize_data({'teams': [TEAM]})
+        # Another connection holding the write lock, as a second process would
+        blocker = sqlite3.connect(db_path, isolation_level=None)
+
+        def write_locked():
+            blocker.execute('BEGIN IMMEDIATE')
+            try:
+                return storage.create_team({**TEAM, 'id': 'new'})
+            finally:
+                blocker.execute('ROLLBACK')
+
+        client = create_app().test_client()
+
+        def api(method, path, **kwargs):
+            blocker.execute('BEGIN IMMEDIATE')
+            try:
+                response = client.open(path, method=method, **kwargs)
+                return f'{response.status_code} Retry-After={response.headers.get("Retry-After")}'
+            finally:
+                blocker.execute('ROLLBACK')
+
+        cases = [
+            ('slow query', lambda: storage._fetchall(SLOW_QUERY)),
+            ('locked write', write_locked),
+        ]
+        results = []
+        for label, call in cases:
+            with deadline.deadline(seconds):
+                results.append((label,) + timed(call))
+        results.append(('api locked write',)
+                       + timed(lambda: api('POST', '/api/teams', json={**TEAM, 'id': 'api'})))
+        results.append(('api read',) + timed(lambda: api('GET', '/api/teams')))
+        blocker.close()
+        storage.close()
+
+    overran = False
+    for label, elapsed, outcome in results:
+        late = elapsed * 1000 > args.deadline_ms + args.slack_ms
+        overran |= late
+        print(f'{label:<18}{elapsed * 1000:8.1f} ms  {outcome}{"  OVER DEADLINE" if late else ""}')
+    if overran:
+        sys.exit(f'A call overran the {args.deadline_ms:.0f} ms deadline')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Synthetic league generator shared by the benchmarks.
+Produces data in the same shape the frontend sends to POST /api/initialize.
+"""
+import random
+from typing import Dict
+
+DAYS = ('Tuesday', 'Thursday')
+
+
+def make_course(course_id: str = 'c1') -> Dict:
+    """Build an 18 hole course with a shuffled hole handicap ranking."""
+    rng = random.Random(course_id)
+    rankings = list(range(1, 19))
+    rng.shuffle(rankings)
+    return {
+        'id': course_id,
+        'name': f'Course {course_id}',
+        'holes': [{'number': n, 'par': rng.choice((3, 4, 4, 5)), 'handicap': rankings[n - 1]}
+                  for n in range(1, 19)]
+    }
+
+
+def make_league(teams: int = 40, players_per_team: int = 4, matches: int = 2000,
+                history: int = 10, seed: int = 1) -> Dict:
+    """Build a league with the given number of teams, players, matches and rounds per player."""
+    rng = random.Random(seed)
+    team_rows = [{'id': f't{i}', 'name': f'Team {i}', 'day': DAYS[i % len(DAYS)]}
+                 for i in range(teams)]
+    player_rows = []
+    for team in team_rows:
+        for _ in range(players_per_team):
+            handicap = rng.randint(0, 30)
+            player_rows.append({
+                'id': f'p{len(player_rows)}',
+                'name': f'Player {len(player_rows)}',
+                'teamId': team['id'],
+                'handicap': handicap,
+                'history': [{'date': f'2024-{4 + r // 4:02d}-{1 + (r % 4) * 7:02d}',
+                             'score': 72 + handicap + rng.randint(-4, 6),
+                             'handicapAfter': handicap}
+                            for r in range(history)]
+            })
+    by_day = {day: [t for t in team_rows if t['day'] == day] for day in DAYS}
+    roster = {}
+    for player in player_rows:
+        roster.setdefault(player['teamId'], []).append(player)
+    match_rows = []
+    for i in range(matches):
+        day = DAYS[i % len(DAYS)]
+        team1, team2 = rng.sample(by_day[day], 2)
+        completed = rng.random() < 0.7
+        match = {
+            'id': f'm{i}',
+            'date': f'2024-{5 + (i // 200) % 5:02d}-{1 + i % 28:02d}',
+            'day': day,
+            'team1Id': team1['id'],
+            'team2Id': team2['id'],
+            'completed': completed,
+            'scores': [],
+        }
+        if completed:
+            match['courseId'] = 'c1'
+            match['scores'] = [
+                {'playerId': player['id'],
+                 'scores': {str(hole): rng.randint(3, 6) + (player['handicap'] > 18)
+                            for hole in range(1, 19)}}
+                for team in (team1, team2) for player in roster[team['id']][:2]
+            ]
+            points = rng.randint(0, 36) / 2
+            match['score'] = f'{points:g} - {18 - points:g}'
+            if points != 9:
+                match['winnerId'] = team1['id'] if points > 9 else team2['id']
+        match_rows.append(match)
+    return {'courses': [make_course()], 'teams': team_rows, 'players': player_rows,
+            'matches': match_rows}
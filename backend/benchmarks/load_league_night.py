@@ -0,0 +1,462 @@
+"""
+Replay league-night traffic against the API and report throughput, latency and resource use.
+
+Usage (from the backend directory):
+    python -m benchmarks.load_league_night [--clients 50] [--seconds 60] [--storage sqlite]
+        [--report load_report.json] [--compare baseline.json] [--env CACHE_ENABLED=true]
+
+Starts the API with Flask's threaded development server in its own process on a fresh SQLite,
+MariaDB (the MARIADB_* variables name a scratch database, which is overwritten) or memory
+league, seeds it, and replays a league night. Use --url to target a server that is already
+running instead; it is only seeded if it has no data. Clients arrive over --ramp seconds and
+each first loads what the frontend loads: status, courses, teams, players and matches.
+Scorers then enter a hole for every player of their match in a quick burst every
+--hole-seconds and reload the match; spectators poll the night's standings every
+--poll-seconds and reload all matches every fifth poll. Each client keeps one connection open,
+like a browser tab.
+
+The report holds throughput, latency percentiles and status counts overall and per route,
+figures per --interval to show drift over a long soak, and the server's CPU time, memory,
+threads and open files (the live figures need /proc). It is written as JSON so that runs can
+be compared with --compare. Exits with status 1 if more than --max-error-rate of the
+requests fail.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import resource
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from benchmarks.league_data import make_league
+
+HOLES = 18
+BOOTSTRAP = ('/status', '/courses', '/teams', '/players', '/matches')
+
+
+def percentile(values, fraction: float) -> float:
+    """Return a percentile of the values in milliseconds."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+
+class Client:
+    """One browser tab: a keep-alive connection and the requests made over it."""
+
+    def __init__(self, host: str, port: int, prefix: str, origin: float):
+        self.host, self.port, self.prefix, self.origin = host, port, prefix, origin
+        self.connection = None
+        # (seconds since origin, route, status, seconds taken); status 0 for no response
+        self.results = []
+        self.failures = Counter()
+
+    def call(self, method: str, path: str, route: str, body=None):
+        """Make a request, record it under route and return the decoded body if it succeeded."""
+        start = time.perf_counter()
+        status, data = 0, None
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            headers = {'Content-Type': 'application/json'} if body is not None else {}
+            self.connection.request(method, self.prefix + path, headers=headers,
+                                    body=None if body is None else json.dumps(body))
+            response = self.connection.getresponse()
+            data = response.read()
+            status = response.status
+            if response.will_close:
+                self.close()
+        except (OSError, http.client.HTTPException) as e:
+            self.failures[f'{route}: {type(e).__name__}'] += 1
+            self.close()
+        self.results.append((start - self.origin, route, status, time.perf_counter() - start))
+        if 200 <= status < 300 and data:
+            return json.loads(data)
+        return None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def pause(rng, seconds: float, stop_at: float) -> bool:
+    """Sleep for about seconds, and return False if the run ends first."""
+    wake = time.perf_counter() + rng.uniform(0.5, 1.5) * seconds
+    time.sleep(max(0.0, min(wake, stop_at) - time.perf_counter()))
+    return time.perf_counter() < stop_at
+
+
+def scorer(client: Client, rng, match_id: str, player_ids, hole_seconds: float,
+           stop_at: float):
+    """Score a match hole by hole, around again once all 18 are in."""
+    hole = 0
+    while pause(rng, hole_seconds, stop_at):
+        hole = hole % HOLES + 1
+        for player_id in player_ids:
+            client.call('PATCH', f'/matches/{match_id}/scores', 'PATCH /matches/<id>/scores',
+                        {'playerId': player_id, 'hole': hole, 'score': rng.randint(3, 8)})
+        client.call('GET', f'/matches/{match_id}', 'GET /matches/<id>')
+
+
+def spectator(client: Client, rng, season: str, day: str, poll_seconds: float,
+              stop_at: float):
+    """Poll the standings, reloading every match now and then."""
+    polls = 0
+    while pause(rng, poll_seconds, stop_at):
+        client.call('GET', f'/standings?season={season}&day={day}', 'GET /standings')
+        polls += 1
+        if polls % 5 == 0:
+            client.call('GET', '/matches', 'GET /matches')
+
+
+def run_client(client: Client, rng, arrive_at: float, stop_at: float, role):
+    """Arrive, load the app like the frontend does, then play the client's role."""
+    time.sleep(max(0.0, arrive_at - time.perf_counter()))
+    for path in BOOTSTRAP:
+        if time.perf_counter() >= stop_at:
+            break
+        client.call('GET', path, f'GET {path}')
+    role[0](client, rng, *role[1:], stop_at)
+    client.close()
+
+
+def plan_night(matches, players):
+    """Pick the date with the most matches and find each of its matches' players."""
+    by_date = Counter(match['date'] for match in matches)
+    tonight = by_date.most_common(1)[0][0]
+    roster = {}
+    for player in players:
+        roster.setdefault(player['teamId'], []).append(player['id'])
+    night = [(match['id'], roster.get(match['team1Id'], []) + roster.get(match['team2Id'], []))
+             for match in matches if match['date'] == tonight]
+    days = sorted({match['day'] for match in matches if match['date'] == tonight})
+    return tonight, night, days
+
+
+class ResourceSampler(threading.Thread):
+    """Sample a process's CPU time, memory, threads and open files from /proc."""
+
+    def __init__(self, pid: int, interval: float, origin: float):
+        super().__init__(daemon=True)
+        self.pid, self.interval, self.origin = pid, interval, origin
+        self.samples = []
+        self.stopped = threading.Event()
+        self.ticks = os.sysconf('SC_CLK_TCK')
+        self.page = os.sysconf('SC_PAGE_SIZE')
+
+    def sample(self):
+        """Return (seconds since origin, CPU seconds, RSS bytes, threads, open files)."""
+        with open(f'/proc/{self.pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        files = len(os.listdir(f'/proc/{self.pid}/fd'))
+        # Fields count from the state, the third field of the line
+        cpu = (int(fields[11]) + int(fields[12])) / self.ticks
+        return (time.perf_counter() - self.origin, cpu, int(fields[21]) * self.page,
+                int(fields[17]), files)
+
+    def run(self):
+        while True:
+            try:
+                self.samples.append(self.sample())
+            except OSError:
+                return
+            if self.stopped.wait(self.interval):
+                return
+
+
+def serve(port: int):
+    """Run the API on the development server, the way `serve` does but without the debugger."""
+    from backend.app import create_app
+    create_app().run(host='127.0.0.1', port=port, threaded=True)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(storage_type: str, tmp: str, overrides, port: int):
+    """Start the API in its own process with its data in tmp, and wait until it answers."""
+    env = {
+        **os.environ,
+        'STORAGE_TYPE': storage_type,
+        'DATABASE_PATH': os.path.join(tmp, 'league.db'),
+        'DATABASE_DIR': os.path.join(tmp, 'leagues'),
+        'MEMORY_SNAPSHOT_PATH': os.path.join(tmp, 'league.snapshot'),
+        'SCORE_BUFFER_DIR': os.path.join(tmp, 'score_buffer'),
+        'CACHE_SHARED_DIR': os.path.join(tmp, 'cache'),
+        **overrides,
+    }
+    log_path = os.path.join(tmp, 'server.log')
+    with open(log_path, 'w') as log:
+        command = f'from benchmarks.load_league_night import serve; serve({port})'
+        server = subprocess.Popen([sys.executable, '-c', command], env=env, stdout=log,
+                                  stderr=subprocess.STDOUT)
+    deadline = time.perf_counter() + 30
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            break
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.1)
+    stop_server(server)
+    with open(log_path) as log:
+        raise SystemExit(f'The server did not start:\n{log.read()[-2000:]}')
+
+
+def stop_server(server):
+    """Stop the server as Ctrl+C would, so buffered scores are flushed."""
+    if server.poll() is None:
+        server.send_signal(signal.SIGINT)
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+def megabytes(maxrss: int) -> float:
+    """Convert ru_maxrss, in kilobytes except on macOS, to megabytes."""
+    return maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def latency(values) -> dict:
+    """Summarize request times in milliseconds."""
+    return {
+        'mean': round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        'p50': round(percentile(values, 0.5), 3),
+        'p90': round(percentile(values, 0.9), 3),
+        'p99': round(percentile(values, 0.99), 3),
+        'max': round(max(values) * 1000, 3) if values else 0.0,
+    }
+
+
+def summarize(results, seconds: float) -> dict:
+    """Throughput, error rate, latency and status counts of a set of requests."""
+    failed = sum(1 for _, _, status, _ in results if not 200 <= status < 400)
+    return {
+        'requests': len(results),
+        'throughput': round(len(results) / seconds, 2) if seconds else 0.0,
+        'errors': failed,
+        'error_rate': round(failed / len(results), 5) if results else 0.0,
+        'latency_ms': latency([taken for _, _, _, taken in results]),
+        'statuses': dict(sorted(Counter(str(status) for _, _, status, _ in results).items())),
+    }
+
+
+def intervals(results, samples, interval: float, seconds: float):
+    """Split the run into intervals with their traffic and the server's resource use."""
+    rows = []
+    previous = samples[0] if samples else None
+    count = max(1, round(seconds / interval))
+    for index in range(count):
+        # The last interval takes in requests that finished after the run's nominal end
+        start = index * interval
+        end = seconds if index == count - 1 else (index + 1) * interval
+        window = [result for result in results if start <= result[0] < end or
+                  index == count - 1 and result[0] >= end]
+        times = [taken for _, _, _, taken in window]
+        row = {
+            'start': round(start, 1),
+            'requests': len(window),
+            'throughput': round(len(window) / (end - start), 2) if end > start else 0.0,
+            'errors': sum(1 for _, _, status, _ in window if not 200 <= status < 400),
+            'p50_ms': round(percentile(times, 0.5), 3),
+            'p99_ms': round(percentile(times, 0.99), 3),
+        }
+        # The last sample taken by the end of the interval
+        sample = next((s for s in reversed(samples) if s[0] <= end + 0.5), None)
+        if sample is not None and previous is not None:
+            elapsed = sample[0] - previous[0]
+            row.update(
+                cpu_percent=round((sample[1] - previous[1]) / elapsed * 100, 1) if elapsed else 0.0,
+                rss_mb=round(sample[2] / 1024 / 1024, 1), threads=sample[3], open_files=sample[4])
+            previous = sample
+        rows.append(row)
+    return rows
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5, check=False).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(report: dict, baseline: dict):
+    """Print how throughput and latency moved against a baseline report."""
+    print(f"against {baseline['environment'].get('commit')} "
+          f"({baseline['config']['storage']}, {baseline['config']['clients']} clients)")
+    rows = [('all', report['overall'], baseline['overall'])]
+    rows += [(route, stats, baseline['routes'][route]) for route, stats in report['routes'].items()
+             if route in baseline['routes']]
+    for route, now, then in rows:
+        change = (now['throughput'] / then['throughput'] - 1) * 100 if then['throughput'] else 0
+        print(f"  {route:<28} {then['throughput']:>8.1f} -> {now['throughput']:>8.1f}/s "
+              f"({change:+6.1f}%)  p99 {then['latency_ms']['p99']:8.2f} -> "
+              f"{now['latency_ms']['p99']:8.2f} ms  errors {then['error_rate']:.2%} -> "
+              f"{now['error_rate']:.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=50, help='concurrent clients')
+    parser.add_argument('--seconds', type=float, default=60, help='length of the run')
+    parser.add_argument('--ramp', type=float, default=10, help='seconds over which clients arrive')
+    parser.add_argument('--scorers', type=float, default=0.4,
+                        help='fraction of clients entering scores')
+    parser.add_argument('--hole-seconds', type=float, default=4)
+    parser.add_argument('--poll-seconds', type=float, default=5)
+    parser.add_argument('--storage', choices=('sqlite', 'mariadb', 'memory'), default='sqlite')
+    parser.add_argument('--url', help='API of a running server, e.g. http://localhost:5000/api')
+    parser.add_argument('--env', action='append', default=[], metavar='NAME=VALUE',
+                        help='environment variable for the started server (repeatable)')
+    parser.add_argument('--teams', type=int, default=40)
+    parser.add_argument('--matches', type=int, default=2000)
+    parser.add_argument('--interval', type=float, default=5, help='seconds per report interval')
+    parser.add_argument('--report', default='load_report.json')
+    parser.add_argument('--compare', help='earlier report to compare this run with')
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    overrides = dict(item.split('=', 1) for item in args.env)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        if args.url:
+            url = urlsplit(args.url)
+            host, port, prefix = url.hostname, url.port or 80, url.path.rstrip('/')
+        else:
+            host, port, prefix = '127.0.0.1', free_port(), '/api'
+            server = start_server(args.storage, tmp, overrides, port)
+        try:
+            setup = Client(host, port, prefix, time.perf_counter())
+            status = setup.call('GET', '/status', 'setup')
+            if status is None:
+                raise SystemExit(f'No API answering at {host}:{port}{prefix}')
+            if server is not None or not status['initialized']:
+                league = make_league(teams=args.teams, matches=args.matches, seed=args.seed)
+                if setup.call('POST', '/initialize', 'setup', league) is None:
+                    raise SystemExit('Seeding the league failed')
+            tonight, night, days = plan_night(setup.call('GET', '/matches', 'setup'),
+                                              setup.call('GET', '/players', 'setup'))
+            setup.close()
+
+            rng = random.Random(args.seed)
+            children = resource.getrusage(resource.RUSAGE_CHILDREN)
+            own = resource.getrusage(resource.RUSAGE_SELF)
+            origin = time.perf_counter()
+            stop_at = origin + args.seconds
+            sampler = None
+            if server is not None and os.path.isdir(f'/proc/{server.pid}'):
+                sampler = ResourceSampler(server.pid, args.interval, origin)
+                sampler.start()
+            clients, threads = [], []
+            scorers = 0
+            for index in range(args.clients):
+                client = Client(host, port, prefix, origin)
+                if (index + 1) * args.scorers >= scorers + 1:
+                    match_id, player_ids = night[scorers % len(night)]
+                    role = (scorer, match_id, player_ids, args.hole_seconds)
+                    scorers += 1
+                else:
+                    role = (spectator, tonight[:4], rng.choice(days), args.poll_seconds)
+                arrive_at = origin + args.ramp * index / args.clients
+                clients.append(client)
+                threads.append(threading.Thread(target=run_client, args=(
+                    client, random.Random(rng.random()), arrive_at, stop_at, role)))
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - origin
+            used = resource.getrusage(resource.RUSAGE_SELF)
+            if sampler is not None:
+                sampler.stopped.set()
+                sampler.join()
+        finally:
+            if server is not None:
+                stop_server(server)
+        finished = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    results = sorted(result for client in clients for result in client.results)
+    failures = Counter()
+    for client in clients:
+        failures.update(client.failures)
+    samples = sampler.samples if sampler is not None else []
+    routes = {}
+    for result in results:
+        routes.setdefault(result[1], []).append(result)
+    server_usage = None
+    if server is not None:
+        server_usage = {
+            'cpu_user_s': round(finished.ru_utime - children.ru_utime, 2),
+            'cpu_system_s': round(finished.ru_stime - children.ru_stime, 2),
+            'max_rss_mb': round(megabytes(finished.ru_maxrss), 1),
+            'peak_threads': max((s[3] for s in samples), default=None),
+            'peak_open_files': max((s[4] for s in samples), default=None),
+        }
+    report = {
+        'config': {**vars(args), 'env': overrides, 'target': args.url or args.storage,
+                   'scorer_clients': scorers, 'night': tonight, 'night_matches': len(night)},
+        'environment': {
+            'started': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'seconds': round(elapsed, 2),
+        'overall': summarize(results, elapsed),
+        'routes': {route: summarize(values, elapsed) for route, values in sorted(routes.items())},
+        'failures': dict(failures.most_common()),
+        'intervals': intervals(results, samples, args.interval, elapsed),
+        'server': server_usage,
+        'load_generator': {
+            'cpu_s': round(used.ru_utime + used.ru_stime - own.ru_utime - own.ru_stime, 2)},
+    }
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f'{args.clients} clients ({scorers} scoring) on {report["config"]["target"]} '
+          f'for {elapsed:.0f} s, night of {tonight} with {len(night)} matches')
+    for route, stats in [('all', report['overall']), *report['routes'].items()]:
+        times = stats['latency_ms']
+        print(f"{route:<28} {stats['requests']:>7} req  {stats['throughput']:>8.1f}/s  "
+              f"p50 {times['p50']:7.2f} ms  p99 {times['p99']:8.2f} ms  "
+              f"max {times['max']:8.1f} ms  errors {stats['error_rate']:.2%}")
+    for message, count in failures.most_common(5):
+        print(f'  {count:>6}  {message}')
+    if server_usage is not None:
+        print(f"server CPU {server_usage['cpu_user_s'] + server_usage['cpu_system_s']:.1f} s, "
+              f"peak RSS {server_usage['max_rss_mb']:.0f} MB, "
+              f"peak threads {server_usage['peak_threads']}, "
+              f"peak open files {server_usage['peak_open_files']}")
+    print(f"load generator CPU {report['load_generator']['cpu_s']:.1f} s; "
+          f'report written to {args.report}')
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    if report['overall']['error_rate'] > args.max_error_rate:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Stress the SQLite write path with concurrent mixed reads and writes.
+
+Usage (from the backend directory):
+    python -m benchmarks.stress_sqlite [--threads 16] [--seconds 10] [--processes 1]
+
+Every thread runs a 70/30 mix of reads and writes against one database: player and match
+reads, player history appends, match inserts and hole score updates. Each thread owns its
+own players, so the final state can be checked exactly: every acknowledged write must be
+present. With --processes > 1 each process runs its own storage (and writer thread) against
+the same file. Exits with status 1 on any error or lost write.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from backend.storage import SQLiteStorage
+from benchmarks.league_data import make_league
+
+
+def worker(storage, prefix: str, players, dates, deadline: float, seed: int, stats: dict):
+    """Run mixed operations until the deadline, recording what was written."""
+    rng = random.Random(seed)
+    latencies = {'read': [], 'write': []}
+    errors = Counter()
+    appended = Counter()
+    matches = []
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        kind = 'read'
+        try:
+            roll = rng.random()
+            if roll < 0.3:
+                storage.get_player(rng.choice(players))
+            elif roll < 0.5:
+                storage.get_matches_by_date(rng.choice(dates))
+            elif roll < 0.7:
+                storage.get_players_by_team(f't{rng.randrange(8)}')
+            elif roll < 0.82:
+                kind = 'write'
+                player_id = rng.choice(players)
+                player = storage.get_player(player_id)
+                player['history'].append({'date': '2025-06-01', 'score': rng.randint(30, 50),
+                                          'handicapAfter': player['handicap']})
+                storage.update_player(player_id, player)
+                appended[player_id] += 1
+            elif roll < 0.91:
+                kind = 'write'
+                match_id = f'{prefix}-m{len(matches)}'
+                storage.create_match({'id': match_id, 'date': rng.choice(dates), 'day': 'Tuesday',
+                                      'team1Id': 't0', 'team2Id': 't1', 'completed': False,
+                                      'scores': []})
+                matches.append(match_id)
+            else:
+                kind = 'write'
+                if matches:
+                    storage.apply_hole_scores({rng.choice(matches): {
+                        rng.choice(players): {str(rng.randint(1, 18)): rng.randint(3, 7)}}})
+        except Exception as e:  # noqa: BLE001 - every error is counted and fails the run
+            errors[f'{type(e).__name__}: {e}'] += 1
+            continue
+        latencies[kind].append(time.perf_counter() - start)
+    stats.update(latencies=latencies, errors=errors, appended=appended, matches=matches)
+
+
+def run_process(db_path: str, threads: int, seconds: float, index: int, processes: int,
+                league) -> dict:
+    """Run the worker threads of one process and verify their writes."""
+    storage = SQLiteStorage(db_path)
+    dates = sorted({match['date'] for match in league['matches']})
+    players = [player['id'] for player in league['players']]
+    before = {player_id: len(storage.get_player(player_id)['history']) for player_id in players}
+    deadline = time.perf_counter() + seconds
+    results = [{} for _ in range(threads)]
+    pool = []
+    for number in range(threads):
+        # Players are dealt out so no two threads (in any process) share one
+        owned = players[index * threads + number::threads * processes]
+        thread = threading.Thread(target=worker, args=(
+            storage, f'p{index}t{number}', owned, dates, deadline, index * 1000 + number,
+            results[number]))
+        pool.append(thread)
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    lost = 0
+    for result in results:
+        for player_id, count in result['appended'].items():
+            if len(storage.get_player(player_id)['history']) != before[player_id] + count:
+                lost += 1
+        lost += sum(1 for match_id in result['matches'] if storage.get_match(match_id) is None)
+    storage.close()
+    errors = Counter()
+    for result in results:
+        errors.update(result['errors'])
+    return {
+        'reads': [t for result in results for t in result['latencies']['read']],
+        'writes': [t for result in results for t in result['latencies']['write']],
+        'errors': errors,
+        'lost': lost,
+    }
+
+
+def _process_entry(args):
+    return run_process(*args)
+
+
+def percentile(values, fraction: float) -> float:
+    """Return a percentile of the values in milliseconds."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=16, help='threads per process')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--processes', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'stress.db')
+        league = make_league(teams=8, players_per_team=args.threads * args.processes // 4 + 4,
+                             matches=200)
+        storage = SQLiteStorage(db_path)
+        storage.initialize_data(league)
+        storage.close()
+
+        jobs = [(db_path, args.threads, args.seconds, index, args.processes, league)
+                for index in range(args.processes)]
+        if args.processes == 1:
+            outcomes = [run_process(*jobs[0])]
+        else:
+            with multiprocessing.get_context('spawn').Pool(args.processes) as pool:
+                outcomes = pool.map(_process_entry, jobs)
+
+    reads = [t for outcome in outcomes for t in outcome['reads']]
+    writes = [t for outcome in outcomes for t in outcome['writes']]
+    errors = Counter()
+    for outcome in outcomes:
+        errors.update(outcome['errors'])
+    lost = sum(outcome['lost'] for outcome in outcomes)
+    total = args.threads * args.processes
+    print(f'{total} threads in {args.processes} process(es) for {args.seconds:.0f} s')
+    for label, values in (('reads', reads), ('writes', writes)):
+        mean = statistics.mean(values) * 1000 if values else 0.0
+        print(f'{label:<7} {len(values):>8} ops  {len(values) / args.seconds:>8.0f}/s  '
+              f'mean {mean:6.2f} ms  p50 {percentile(values, 0.5):6.2f} ms  '
+              f'p99 {percentile(values, 0.99):7.2f} ms')
+    print(f'errors  {sum(errors.values())}')
+    for message, count in errors.most_common(5):
+        print(f'  {count:>6}  {message}')
+    print(f'lost writes {lost}')
+    if errors or lost:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Shared fixtures: a small league, storage backends built on temporary files and an API client.
+"""
+import pytest
+
+from backend.storage import MemoryStorage, SQLiteStorage
+
+
+def make_course(course_id: str) -> dict:
+    return {'id': course_id, 'name': f'Course {course_id}',
+            'holes': [{'number': hole, 'par': 4, 'handicap': hole} for hole in range(1, 19)]}
+
+
+@pytest.fixture
+def league():
+    """Three Monday teams; t3 has no players and only appears as the winner of m2."""
+    return {
+        'courses': [make_course('c1')],
+        'teams': [{'id': team_id, 'name': f'Team {team_id}', 'day': 'Monday'}
+                  for team_id in ('t1', 't2', 't3')],
+        'players': [
+            {'id': 'p1', 'name': 'Pat One', 'teamId': 't1', 'handicap': 8,
+             'history': [{'date': '2024-05-06', 'score': 80, 'handicapAfter': 8}]},
+            {'id': 'p2', 'name': 'Sam Two', 'teamId': 't2', 'handicap': 12, 'history': []},
+        ],
+        'matches': [
+            {'id': 'm1', 'date': '2024-05-06', 'day': 'Monday', 'team1Id': 't1',
+             'team2Id': 't2', 'courseId': 'c1', 'completed': False, 'scores': []},
+            {'id': 'm2', 'date': '2024-05-13', 'day': 'Monday', 'team1Id': 't1',
+             'team2Id': 't2', 'completed': True, 'winnerId': 't3', 'scores': []},
+        ],
+    }
+
+
+@pytest.fixture(params=('memory', 'sqlite'))
+def backend(request):
+    """Run a test against each built-in backend that needs no server."""
+    return request.param
+
+
+@pytest.fixture
+def make_storage(tmp_path):
+    """Build storages of a backend by name, closing them after the test."""
+    opened = []
+
+    def make(backend: str, integrity_mode: str = 'restrict', name: str = 'league'):
+        if backend == 'memory':
+            storage = MemoryStorage(integrity_mode=integrity_mode)
+        else:
+            storage = SQLiteStorage(str(tmp_path / f'{name}.db'), integrity_mode=integrity_mode)
+        opened.append(storage)
+        return storage
+
+    yield make
+    for storage in opened:
+        storage.close()
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, league):
+    """The API on a seeded SQLite database, with hole scores buffered until flushed."""
+    monkeypatch.setenv('STORAGE_TYPE', 'sqlite')
+    monkeypatch.setenv('DATABASE_PATH', str(tmp_path / 'golf_league.db'))
+    monkeypatch.setenv('DATABASE_DIR', str(tmp_path / 'leagues'))
+    monkeypatch.setenv('SCORE_BUFFER_DIR', str(tmp_path / 'score_buffer'))
+    monkeypatch.setenv('ARCHIVE_PATH', str(tmp_path / 'archive'))
+    monkeypatch.setenv('CACHE_ENABLED', 'false')
+    monkeypatch.setenv('SCORE_FLUSH_INTERVAL', '60')
+    monkeypatch.setenv('PROJECTION_WORKERS', '1')
+    from backend.api import routes
+    from backend.app import create_app
+
+    app = create_app()
+    routes.default_storage.initialize_data(league)
+    yield app
+    routes.tenants.close_all()
+    routes.default_storage.close()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
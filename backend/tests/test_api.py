@@ -0,0 +1,83 @@
+"""
+Conditional writes with ETag/If-Match and write-behind hole scores through the API.
+"""
+from backend.api import routes
+
+
+def player_update(handicap: int) -> dict:
+    return {'name': 'Pat One', 'teamId': 't1', 'handicap': handicap, 'history': []}
+
+
+def test_player_read_carries_version_etag(client):
+    response = client.get('/api/players/p1')
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"1"'
+
+
+def test_if_match_write_advances_version(client):
+    response = client.put('/api/players/p1', json=player_update(9), headers={'If-Match': '"1"'})
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"2"'
+    assert client.get('/api/players/p1').json['handicap'] == 9
+
+
+def test_stale_if_match_is_refused_with_412(client):
+    client.put('/api/players/p1', json=player_update(9), headers={'If-Match': '"1"'})
+    response = client.put('/api/players/p1', json=player_update(3), headers={'If-Match': '"1"'})
+    assert response.status_code == 412
+    assert response.headers['ETag'] == '"2"'
+    assert response.json['version'] == 2
+    assert client.get('/api/players/p1').json['handicap'] == 9
+
+
+def test_if_match_on_missing_record_is_412(client):
+    response = client.put('/api/players/nobody', json={**player_update(3), 'name': 'Nobody'},
+                          headers={'If-Match': '"1"'})
+    assert response.status_code == 412
+    assert response.json['version'] is None
+
+
+def test_malformed_if_match_is_400(client):
+    response = client.put('/api/players/p1', json=player_update(3),
+                          headers={'If-Match': '"1", "2"'})
+    assert response.status_code == 400
+
+
+def test_write_without_if_match_is_unconditional(client):
+    client.put('/api/players/p1', json=player_update(9))
+    response = client.put('/api/players/p1', json=player_update(3))
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"3"'
+
+
+def test_buffered_hole_scores_are_acknowledged_then_flushed(client):
+    stored = routes.default_storage.storage
+    response = client.patch('/api/matches/m1/scores',
+                            json={'playerId': 'p1', 'hole': 3, 'score': 5})
+    assert response.status_code == 202
+    assert response.json['scores'] == [{'playerId': 'p1', 'scores': {'3': 5}}]
+    # Acknowledged from the log; the match itself is written in the background
+    assert stored.get_match('m1')['scores'] == []
+    assert stored.get_match('m1')['version'] == 1
+
+    # Reading the match flushes it, so its ETag names the version holding the scores
+    response = client.get('/api/matches/m1')
+    assert response.headers['ETag'] == '"2"'
+    assert stored.get_match('m1')['scores'] == [{'playerId': 'p1', 'scores': {'3': 5}}]
+
+
+def test_hole_scores_with_stale_if_match_are_refused(client):
+    client.patch('/api/matches/m1/scores', json={'playerId': 'p1', 'hole': 1, 'score': 4})
+    response = client.patch('/api/matches/m1/scores',
+                            json={'playerId': 'p1', 'hole': 2, 'score': 6},
+                            headers={'If-Match': '"1"'})
+    assert response.status_code == 412
+    assert response.headers['ETag'] == '"2"'
+    assert client.get('/api/matches/m1').json['scores'] == [
+        {'playerId': 'p1', 'scores': {'1': 4}}]
+
+
+def test_invalid_hole_score_is_400(client):
+    response = client.patch('/api/matches/m1/scores',
+                            json={'playerId': 'p1', 'hole': 19, 'score': 5})
+    assert response.status_code == 400
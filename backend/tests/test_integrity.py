@@ -0,0 +1,82 @@
+"""
+Referential integrity of team and course deletes in restrict and cascade mode.
+"""
+import pytest
+
+from backend.storage import IntegrityViolationError
+
+
+def seeded(make_storage, backend, league, integrity_mode):
+    storage = make_storage(backend, integrity_mode)
+    assert storage.initialize_data(league)
+    return storage
+
+
+def test_restrict_refuses_team_with_players_and_matches(make_storage, backend, league):
+    storage = seeded(make_storage, backend, league, 'restrict')
+    with pytest.raises(IntegrityViolationError) as refused:
+        storage.delete_team('t1')
+    assert refused.value.references == {'players': 1, 'matches': 2}
+    assert storage.get_team('t1') is not None
+    assert storage.get_player('p1') is not None
+    assert {match['id'] for match in storage.get_matches()} == {'m1', 'm2'}
+
+
+def test_restrict_counts_won_matches(make_storage, backend, league):
+    storage = seeded(make_storage, backend, league, 'restrict')
+    with pytest.raises(IntegrityViolationError) as refused:
+        storage.delete_team('t3')
+    assert refused.value.references == {'players': 0, 'matches': 1}
+    assert storage.get_team('t3') is not None
+
+
+def test_restrict_deletes_unreferenced_team(make_storage, backend, league):
+    storage = seeded(make_storage, backend, league, 'restrict')
+    storage.create_team({'id': 't4', 'name': 'Team t4', 'day': 'Monday'})
+    assert storage.delete_team('t4')
+    assert storage.get_team('t4') is None
+    assert not storage.delete_team('t4')
+
+
+def test_cascade_deletes_players_and_matches(make_storage, backend, league):
+    storage = seeded(make_storage, backend, league, 'cascade')
+    assert storage.delete_team('t1')
+    assert storage.get_team('t1') is None
+    assert storage.get_player('p1') is None
+    assert storage.get_player('p2') is not None
+    assert storage.get_matches() == []
+
+
+def test_cascade_deletes_won_matches(make_storage, backend, league):
+    storage = seeded(make_storage, backend, league, 'cascade')
+    assert storage.delete_team('t3')
+    assert [match['id'] for match in storage.get_matches()] == ['m1']
+
+
+def test_restrict_refuses_course_used_by_matches(make_storage, backend, league):
+    storage = seeded(make_storage, backend, league, 'restrict')
+    with pytest.raises(IntegrityViolationError) as refused:
+        storage.delete_course('c1')
+    assert refused.value.references == {'matches': 1}
+    assert storage.get_match('m1')['courseId'] == 'c1'
+
+
+def test_cascade_clears_course_from_matches(make_storage, backend, league):
+    storage = seeded(make_storage, backend, league, 'cascade')
+    assert storage.delete_course('c1')
+    assert storage.get_course('c1') is None
+    assert 'courseId' not in storage.get_match('m1')
+
+
+def test_player_needs_existing_team(make_storage, backend, league):
+    storage = seeded(make_storage, backend, league, 'restrict')
+    with pytest.raises(IntegrityViolationError):
+        storage.create_player({'id': 'p9', 'name': 'Lost', 'teamId': 'missing', 'handicap': 0})
+    assert storage.get_player('p9') is None
+
+
+def test_api_answers_restricted_delete_with_409(client):
+    response = client.delete('/api/teams/t1')
+    assert response.status_code == 409
+    assert response.json['references'] == {'players': 1, 'matches': 2}
+    assert client.get('/api/teams/t1').status_code == 200
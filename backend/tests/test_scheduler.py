@@ -0,0 +1,79 @@
+"""
+Fairness of round-robin schedules.
+"""
+from collections import Counter
+from itertools import combinations
+
+import pytest
+
+from backend.services.scheduler import generate_schedule, round_robin
+
+
+def team_ids(count: int):
+    return [f't{i}' for i in range(count)]
+
+
+@pytest.mark.parametrize('count', range(2, 11))
+def test_every_pair_meets_once(count):
+    rounds = round_robin(team_ids(count))
+    assert len(rounds) == count - 1 if count % 2 == 0 else count
+    met = Counter(frozenset(pair) for pairs in rounds for pair in pairs if None not in pair)
+    assert set(met) == {frozenset(pair) for pair in combinations(team_ids(count), 2)}
+    assert set(met.values()) == {1}
+
+
+@pytest.mark.parametrize('count', range(2, 11))
+def test_every_team_plays_once_per_round(count):
+    for pairs in round_robin(team_ids(count)):
+        playing = [team for pair in pairs for team in pair if team is not None]
+        assert sorted(playing) == sorted(team_ids(count))
+
+
+@pytest.mark.parametrize('count', (3, 5, 7, 9))
+def test_odd_groups_rotate_the_bye(count):
+    byes = Counter(home or away for pairs in round_robin(team_ids(count))
+                   for home, away in pairs if home is None or away is None)
+    assert byes == Counter(team_ids(count))
+
+
+@pytest.mark.parametrize('count', range(2, 11))
+def test_sides_are_near_even(count):
+    sides = Counter()
+    for pairs in round_robin(team_ids(count)):
+        for home, away in pairs:
+            if home is not None and away is not None:
+                sides[home] += 1
+                sides[away] -= 1
+    # At most one game off an even split of team1/team2 slots
+    assert all(abs(balance) <= 2 for balance in sides.values())
+
+
+def test_round_robin_needs_two_teams():
+    assert round_robin([]) == []
+    assert round_robin(['t0']) == []
+
+
+def test_double_round_robin_swaps_sides():
+    teams = [{'id': team_id, 'name': team_id, 'day': 'Monday'} for team_id in team_ids(4)]
+    schedule = generate_schedule(teams, '2024-05-01', cycles=2)
+    sides = Counter((match['team1Id'], match['team2Id']) for match in schedule['matches'])
+    assert len(schedule['matches']) == 12
+    assert set(sides.values()) == {1}
+    assert all((away, home) in sides for home, away in sides)
+
+
+def test_schedule_groups_by_day_and_skips_dates():
+    teams = [{'id': f'm{i}', 'name': f'm{i}', 'day': 'Monday'} for i in range(3)]
+    teams += [{'id': f'w{i}', 'name': f'w{i}', 'day': 'Wednesday'} for i in range(2)]
+    schedule = generate_schedule(teams, '2024-05-01', skip_dates=['2024-05-13'])
+    mondays = sorted({match['date'] for match in schedule['matches'] if match['day'] == 'Monday'}
+                     | {bye['date'] for bye in schedule['byes']})
+    assert mondays == ['2024-05-06', '2024-05-20', '2024-05-27']
+    assert Counter(bye['teamId'] for bye in schedule['byes']) == Counter(['m0', 'm1', 'm2'])
+    for match in schedule['matches']:
+        assert match['team1Id'][0] == match['team2Id'][0] == match['day'][0].lower()
+
+
+def test_schedule_rejects_unknown_days():
+    with pytest.raises(ValueError):
+        generate_schedule([], '2024-05-01', days=['Funday'])
@@ -0,0 +1,61 @@
+"""
+Binary snapshot export and import, between backends and through the API.
+"""
+import io
+
+import pytest
+
+from backend.services import snapshot
+
+TABLES = ('courses', 'teams', 'players', 'matches')
+
+
+def contents(storage) -> dict:
+    return {'courses': storage.get_courses(), 'teams': storage.get_teams(),
+            'players': storage.get_players(), 'matches': storage.get_matches()}
+
+
+def by_id(records):
+    return sorted(records, key=lambda record: record['id'])
+
+
+@pytest.mark.parametrize('target', ('memory', 'sqlite'))
+def test_round_trip_between_backends(make_storage, backend, target, league):
+    source = make_storage(backend, name='source')
+    assert source.initialize_data(league)
+    exported = b''.join(snapshot.write_snapshot(source, chunk_records=1))
+
+    copy = make_storage(target, name='copy')
+    counts = snapshot.import_snapshot(copy, io.BytesIO(exported))
+    assert {table: counts[table] for table in TABLES} == {
+        table: len(league[table]) for table in TABLES}
+    expected, actual = contents(source), contents(copy)
+    for table in TABLES:
+        assert by_id(actual[table]) == by_id(expected[table])
+
+
+def test_truncated_snapshot_is_rejected(make_storage, league):
+    source = make_storage('memory')
+    source.initialize_data(league)
+    exported = b''.join(snapshot.write_snapshot(source))
+    with pytest.raises(ValueError):
+        snapshot.import_snapshot(make_storage('memory'), io.BytesIO(exported[:-5]))
+
+
+def test_api_round_trip_into_another_league(client):
+    exported = client.get('/api/export')
+    assert exported.status_code == 200
+    response = client.post('/api/leagues/spring/import', data=exported.data)
+    assert response.status_code == 200
+    assert response.json['matches'] == 2
+    for table in TABLES:
+        assert (by_id(client.get(f'/api/leagues/spring/{table}').json)
+                == by_id(client.get(f'/api/{table}').json))
+
+
+def test_api_import_refuses_league_with_data_unless_merging(client):
+    exported = client.get('/api/export').data
+    assert client.post('/api/import', data=exported).status_code == 409
+    response = client.post('/api/import?merge=true', data=exported)
+    assert response.status_code == 200
+    assert len(client.get('/api/players').json) == 2
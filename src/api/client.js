@@ -11,11 +11,11 @@ class ApiClient {
   async request(endpoint, options = {}) {
     const url = `${API_BASE_URL}${endpoint}`;
     const config = {
+      ...options,
       headers: {
         'Content-Type': 'application/json',
         ...options.headers,
       },
-      ...options,
     };
 
     try {
@@ -33,6 +33,12 @@ class ApiClient {
     }
   }
 
+  // Search
+  async search(query, limit = 10) {
+    const params = new URLSearchParams({ q: query, limit: String(limit) });
+    return this.request(`/search?${params}`);
+  }
+
   // Status and initialization
   async getStatus() {
     return this.request('/status');
@@ -54,6 +60,10 @@ class ApiClient {
     return this.request(`/courses/${id}`);
   }
 
+  async getCourseStrokes(id) {
+    return this.request(`/courses/${id}/strokes`);
+  }
+
   async createCourse(courseData) {
     return this.request('/courses', {
       method: 'POST',
@@ -103,6 +113,28 @@ class ApiClient {
     });
   }
 
+  async getTeamHeadToHead(id, opponentId) {
+    const query = opponentId ? `?${new URLSearchParams({ opponent: opponentId })}` : '';
+    return this.request(`/teams/${id}/h2h${query}`);
+  }
+
+  async getTeamSeasons(id) {
+    return this.request(`/teams/${id}/seasons`);
+  }
+
+  async getStandings(season, day) {
+    const params = new URLSearchParams({ season: String(season) });
+    if (day) params.set('day', day);
+    return this.request(`/standings?${params}`);
+  }
+
+  async getStandingsProjection(season, day, simulations) {
+    const params = new URLSearchParams({ season: String(season) });
+    if (day) params.set('day', day);
+    if (simulations) params.set('simulations', String(simulations));
+    return this.request(`/standings/projection?${params}`);
+  }
+
   // Player operations
   async getPlayers() {
     return this.request('/players');
@@ -119,9 +151,14 @@ class ApiClient {
     });
   }
 
-  async updatePlayer(id, playerData) {
+  /**
+   * Update a player. With a version the update fails with a conflict error if another
+   * client changed the player since that version was read.
+   */
+  async updatePlayer(id, playerData, version) {
     return this.request(`/players/${id}`, {
       method: 'PUT',
+      headers: version === undefined ? {} : { 'If-Match': `"${version}"` },
       body: JSON.stringify(playerData),
     });
   }
@@ -148,18 +185,39 @@ class ApiClient {
     });
   }
 
-  async updateMatch(id, matchData) {
+  /**
+   * Update a match. With a version the update fails with a conflict error if another
+   * client changed the match since that version was read.
+   */
+  async updateMatch(id, matchData, version) {
     return this.request(`/matches/${id}`, {
       method: 'PUT',
+      headers: version === undefined ? {} : { 'If-Match': `"${version}"` },
       body: JSON.stringify(matchData),
     });
   }
 
+  async updateHoleScores(id, scores) {
+    return this.request(`/matches/${id}/scores`, {
+      method: 'PATCH',
+      body: JSON.stringify({ scores }),
+    });
+  }
+
   async deleteMatch(id) {
     return this.request(`/matches/${id}`, {
       method: 'DELETE',
     });
   }
+
+  // Journal
+  /**
+   * Get the recorded changes to a course, team, player or match, oldest first.
+   * table is 'courses', 'teams', 'players' or 'matches'.
+   */
+  async getHistory(table, id) {
+    return this.request(`/${table}/${id}/history`);
+  }
 }
 
 // Export a singleton instance
@@ -49,6 +49,11 @@ class DataService {
     return apiClient.getCourse(id);
   }
 
+  async getCourseStrokes(id) {
+    await this.initialize();
+    return apiClient.getCourseStrokes(id);
+  }
+
   async createCourse(courseData) {
     await this.initialize();
     return apiClient.createCourse(courseData);
@@ -90,6 +95,26 @@ class DataService {
     return apiClient.deleteTeam(id);
   }
 
+  async getTeamHeadToHead(id, opponentId) {
+    await this.initialize();
+    return apiClient.getTeamHeadToHead(id, opponentId);
+  }
+
+  async getTeamSeasons(id) {
+    await this.initialize();
+    return apiClient.getTeamSeasons(id);
+  }
+
+  async getStandings(season, day) {
+    await this.initialize();
+    return apiClient.getStandings(season, day);
+  }
+
+  async getStandingsProjection(season, day, simulations) {
+    await this.initialize();
+    return apiClient.getStandingsProjection(season, day, simulations);
+  }
+
   // Player operations
   async getPlayers() {
     await this.initialize();
@@ -106,9 +131,9 @@ class DataService {
     return apiClient.createPlayer(playerData);
   }
 
-  async updatePlayer(id, playerData) {
+  async updatePlayer(id, playerData, version) {
     await this.initialize();
-    return apiClient.updatePlayer(id, playerData);
+    return apiClient.updatePlayer(id, playerData, version);
   }
 
   async deletePlayer(id) {
@@ -132,15 +157,32 @@ class DataService {
     return apiClient.createMatch(matchData);
   }
 
-  async updateMatch(id, matchData) {
+  async updateMatch(id, matchData, version) {
+    await this.initialize();
+    return apiClient.updateMatch(id, matchData, version);
+  }
+
+  async updateHoleScores(id, scores) {
     await this.initialize();
-    return apiClient.updateMatch(id, matchData);
+    return apiClient.updateHoleScores(id, scores);
   }
 
   async deleteMatch(id) {
     await this.initialize();
     return apiClient.deleteMatch(id);
   }
+
+  // Search
+  async search(query, limit = 10) {
+    await this.initialize();
+    return apiClient.search(query, limit);
+  }
+
+  // Journal
+  async getHistory(table, id) {
+    await this.initialize();
+    return apiClient.getHistory(table, id);
+  }
 }
 
 // Export a singleton instance
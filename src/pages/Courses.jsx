@@ -43,7 +43,7 @@ export default function Courses() {
         setCourses(courses.filter(c => c.id !== id));
       } catch (error) {
         console.error('Failed to delete course:', error);
-        alert('Failed to delete course.');
+        alert(`Failed to delete course: ${error.message}`);
       }
     }
   };